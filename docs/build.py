@@ -47,6 +47,7 @@ for name in (
     "pgu.__init__",
     "pgu.isovid",
     "pgu.layout",
+    "pgu.level",
     "pgu.text",
     "pgu.tilevid",
     "pgu.timer",
@@ -0,0 +1,181 @@
+"""Headless, deterministic benchmarks for pgu.
+
+The benchmarks run under the SDL dummy video driver, so no window is opened,
+and seed the random module so every run does the same work.  Results are
+plain dicts, ready to be dumped as json and compared between runs.
+
+To run them all and write the results to a file:
+
+    python -m pgu.bench -o results.json
+
+Use -l to list the benchmarks, and name some to run only those.
+
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import gc
+import sys
+import time
+import random
+
+import pygame
+
+from pgu.timer import percentile
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+_now = getattr(time, 'perf_counter', time.time)
+
+SEED = 1234
+
+# name -> benchmark function, in the order they were registered
+benchmarks = {}
+_order = []
+
+
+def benchmark(name):
+    """Decorator to register a benchmark function.
+
+    The function is called with a Recorder and the number of frames to run.
+    It should call Recorder.start and Recorder.stop around each phase of
+    each frame it wants timed, and may set values in Recorder.info.
+
+    """
+    def register(fnc):
+        if name not in benchmarks:
+            _order.append(name)
+        benchmarks[name] = fnc
+        return fnc
+    return register
+
+
+class Recorder(object):
+    """Collects the timings of a benchmark.
+
+    Attributes:
+        times -- a dict of phase name to a list of durations in seconds
+        info -- a dict of extra values to report (sizes, counts, etc)
+
+    """
+    def __init__(self):
+        self.times = {}
+        self.phases = []
+        self.info = {}
+
+    def start(self):
+        """Return a start time, to be passed to stop."""
+        return _now()
+
+    def stop(self, phase, t):
+        """Record the time since t under phase.  Returns the current time,
+        so phases can be chained."""
+        now = _now()
+        if phase not in self.times:
+            self.times[phase] = []
+            self.phases.append(phase)
+        self.times[phase].append(now - t)
+        return now
+
+
+def summarize(v):
+    """Return a dict of statistics for a list of durations."""
+    v = sorted(v)
+    n = len(v)
+    if not n:
+        return {'n': 0}
+    total = sum(v)
+    r = {'n': n, 'total': total, 'mean': total / n, 'min': v[0],
+         'max': v[-1], 'p50': percentile(v, 50), 'p95': percentile(v, 95),
+         'p99': percentile(v, 99)}
+    if total > 0:
+        r['per_sec'] = n / total
+    return r
+
+
+def _run(fnc, frames):
+    random.seed(SEED)
+    rec = Recorder()
+    gc.collect()
+    fnc(rec, frames)
+    return rec
+
+
+def run(name, frames=100, memory=True):
+    """Run one benchmark and return its results.
+
+    Arguments:
+        name -- the registered benchmark name
+        frames -- number of frames to run
+        memory -- set to 0 to skip the second run that measures allocations
+
+    The benchmark is run once for timing.  If memory is set and tracemalloc
+    is available, it is run again with tracemalloc on to find the peak
+    memory used and the number of allocated blocks still alive at the end.
+
+    """
+    fnc = benchmarks[name]
+    r = {'name': name, 'frames': frames}
+    try:
+        rec = _run(fnc, frames)
+    except Exception:
+        e = sys.exc_info()[1]
+        r['error'] = '%s: %s' % (e.__class__.__name__, e)
+        return r
+    r['phases'] = dict([(p, summarize(rec.times[p])) for p in rec.phases])
+    r['info'] = rec.info
+    if memory and tracemalloc is not None:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            _run(fnc, frames)
+            after = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        diff = after.compare_to(before, 'filename')
+        r['memory'] = {'peak_bytes': peak,
+                       'net_blocks': sum([d.count_diff for d in diff]),
+                       'net_bytes': sum([d.size_diff for d in diff])}
+    return r
+
+
+def names(prefix=None):
+    """Return the registered benchmark names, optionally only those that
+    start with prefix."""
+    _load()
+    return [n for n in _order if prefix is None or n.startswith(prefix)]
+
+
+def run_all(select=None, frames=100, memory=True):
+    """Run benchmarks and return a results dict.
+
+    Arguments:
+        select -- a list of names or name prefixes, defaults to all
+        frames -- number of frames to run each benchmark
+        memory -- set to 0 to skip measuring allocations
+
+    """
+    todo = []
+    for name in names():
+        if not select or [s for s in select if name.startswith(s)]:
+            todo.append(name)
+    results = []
+    for name in todo:
+        results.append(run(name, frames, memory))
+    return {
+        'python': sys.version.split()[0],
+        'pygame': pygame.version.ver,
+        'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+        'seed': SEED,
+        'results': results,
+        }
+
+
+def _load():
+    # importing the benchmark modules registers their benchmarks
+    from pgu.bench import engines, gui
@@ -0,0 +1,43 @@
+"""Run the pgu benchmarks, see pgu.bench."""
+
+import json
+import sys
+from optparse import OptionParser
+
+from pgu import bench
+
+usage = "usage: python -m pgu.bench [options] [name ...]"
+parser = OptionParser(usage)
+parser.add_option("-o", "--output", dest="output", metavar="FILE",
+                  help="write the json results to FILE instead of stdout")
+parser.add_option("-f", "--frames", dest="frames", type="int", default=100,
+                  help="frames to run each benchmark [default: %default]")
+parser.add_option("-l", "--list", action="store_true", dest="list",
+                  default=False, help="list the benchmarks and exit")
+parser.add_option("--no-memory", action="store_false", dest="memory",
+                  default=True, help="don't measure allocations")
+(opts,args) = parser.parse_args()
+
+if opts.list:
+    for name in bench.names():
+        print(name)
+    sys.exit(0)
+
+# some modules print as they work, keep that out of the results
+stdout, sys.stdout = sys.stdout, sys.stderr
+try:
+    results = bench.run_all(args, opts.frames, opts.memory)
+finally:
+    sys.stdout = stdout
+if opts.output:
+    f = open(opts.output, 'w')
+    try:
+        json.dump(results, f, indent=1, sort_keys=True)
+    finally:
+        f.close()
+else:
+    json.dump(results, sys.stdout, indent=1, sort_keys=True)
+    sys.stdout.write('\n')
+for r in results['results']:
+    if 'error' in r:
+        sys.stderr.write('%s: %s\n' % (r['name'], r['error']))
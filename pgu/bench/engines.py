@@ -0,0 +1,178 @@
+"""Benchmarks of the tile engines.
+
+Each engine gets a synthetic level of random tiles, a load of sprites and a
+scripted camera path.  Every frame the camera moves, then the engine's loop
+and update (or draw) are timed.  A second pass times full paints.
+
+"""
+import math
+import random
+
+import pygame
+from pygame.locals import *
+
+from pgu.bench import benchmark
+
+SW, SH = 320, 240
+LEVEL = 256, 256
+NSPRITES = 200
+NTILES = 16
+
+
+def tile_sheet(size, n=NTILES):
+    """Return a tile sheet surface of n solid, randomly colored tiles."""
+    tw, th = size
+    img = pygame.Surface((tw * n, th), SRCALPHA, 32)
+    for i in range(n):
+        img.fill((random.randrange(256), random.randrange(256),
+                  random.randrange(256), 255), (i * tw, 0, tw, th))
+    return img
+
+
+def camera(frame, frames, bounds):
+    """Return the (x, y) of the scripted camera at frame.
+
+    The camera sweeps a lissajous curve over bounds, so it scrolls in every
+    direction at varying speeds.
+
+    """
+    a = 2.0 * math.pi * frame / max(1, frames)
+    x = bounds.x + int((math.sin(a) + 1) / 2 * bounds.w)
+    y = bounds.y + int((math.sin(2 * a) + 1) / 2 * bounds.h)
+    return x, y
+
+
+def screen():
+    pygame.display.init()
+    return pygame.display.set_mode((SW, SH))
+
+
+def _vid_level(g, tile_size, bg=0):
+    w, h = LEVEL
+    g.tga_load_tiles(tile_sheet(tile_size), tile_size)
+    g.resize((w, h), bg)
+    for y in range(h):
+        trow = g.tlayer[y]
+        for x in range(w):
+            trow[x] = random.randrange(1, NTILES)
+
+
+def _vid_sprites(g, spritecls, n=NSPRITES):
+    img = pygame.Surface((8, 8))
+    img.fill((255, 255, 255))
+    w, h = g.size
+    tw, th = g.tiles[1].image.get_width(), g.tiles[1].image.get_height()
+    def loop(g, s):
+        s.rect.x = (s.rect.x + s.vx) % (w * tw)
+        s.rect.y = (s.rect.y + s.vy) % (h * th)
+    for i in range(n):
+        s = spritecls(img, (random.randrange(w * tw), random.randrange(h * th)))
+        s.vx, s.vy = random.randrange(-3, 4), random.randrange(-3, 4)
+        s.loop = loop
+        g.sprites.append(s)
+
+
+def _run_vid(rec, frames, g, scr, bounds):
+    for frame in range(frames):
+        g.view.x, g.view.y = camera(frame, frames, bounds)
+        t = rec.start()
+        g.loop()
+        t = rec.stop('loop', t)
+        g.update(scr)
+        rec.stop('update', t)
+    for frame in range(frames):
+        g.view.x, g.view.y = camera(frame, frames, bounds)
+        t = rec.start()
+        g.paint(scr)
+        rec.stop('paint', t)
+    rec.info['level'] = g.size
+    rec.info['sprites'] = len(g.sprites)
+
+
+@benchmark('engine.tilevid')
+def tilevid(rec, frames):
+    from pgu import tilevid
+    scr = screen()
+    g = tilevid.Tilevid()
+    _vid_level(g, (16, 16), 1)
+    _vid_sprites(g, tilevid.Sprite)
+    bounds = pygame.Rect(0, 0, LEVEL[0] * 16 - SW, LEVEL[1] * 16 - SH)
+    _run_vid(rec, frames, g, scr, bounds)
+
+
+@benchmark('engine.isovid')
+def isovid(rec, frames):
+    from pgu import isovid
+    scr = screen()
+    g = isovid.Isovid()
+    _vid_level(g, (32, 64), 1)
+    _vid_sprites(g, isovid.Sprite)
+    g.paint(scr)
+    _run_vid(rec, frames, g, scr, g.bounds)
+
+
+@benchmark('engine.hexvid')
+def hexvid(rec, frames):
+    # hexvid does not support sprites
+    from pgu import hexvid
+    scr = screen()
+    g = hexvid.Hexvid()
+    _vid_level(g, (32, 28), 1)
+    g.paint(scr)
+    _run_vid(rec, frames, g, scr, g.bounds)
+
+
+@benchmark('engine.newvid')
+def newvid(rec, frames):
+    from pgu import newvid
+    scr = screen()
+    w, h = LEVEL
+    layer_group = pygame.sprite.LayeredDirty()
+    bg_group = pygame.sprite.RenderUpdates()
+    sprite_group = pygame.sprite.RenderUpdates()
+    tiles = newvid.TileLayer(layer_group, tile_size=(16, 16), size=LEVEL)
+    sheet = tile_sheet((16, 16))
+    tiles.tiles = [sheet.subsurface((i * 16, 0, 16, 16)) for i in range(NTILES)]
+    for i in range(w * h):
+        tiles.ids[i] = random.randrange(1, NTILES)
+    g = newvid.NewVid(scr, layer_group, bg_group, tiles)
+    img = pygame.Surface((16, 16))
+    img.fill((255, 255, 255))
+    sprites = [newvid.PguSprite(img, (16, 16), (1, 1), {},
+                                (random.randrange(SW // 16),
+                                 random.randrange(SH // 16)),
+                                layer_group, sprite_group)
+               for i in range(NSPRITES)]
+    bounds = pygame.Rect(0, 0, w * 16 - SW, h * 16 - SH)
+    for frame in range(frames):
+        view = pygame.Rect(camera(frame, frames, bounds), (SW, SH))
+        t = rec.start()
+        for s in sprites:
+            s.move(((s.pos.x + random.randrange(-1, 2)) % (SW // 16),
+                    (s.pos.y + random.randrange(-1, 2)) % (SH // 16)))
+        t = rec.stop('loop', t)
+        g.draw(scr, view)
+        rec.stop('draw', t)
+    rec.info['level'] = LEVEL
+    rec.info['sprites'] = len(sprites)
+
+
+@benchmark('engine.newvid.move')
+def newvid_move(rec, frames):
+    """Move 10k newvid sprites around a 256x256 map."""
+    from pgu import newvid
+    w, h = LEVEL
+    image = pygame.Surface((16, 16))
+    sprites = [newvid.PguSprite(image, newvid.Pos(16, 16), newvid.Pos(1, 1),
+                                {}, newvid.Pos(random.randrange(w),
+                                               random.randrange(h)))
+               for n in range(10000)]
+    steps = [(random.randrange(-1, 2), random.randrange(-1, 2))
+             for n in range(len(sprites))]
+    for frame in range(frames):
+        t = rec.start()
+        for s, (dx, dy) in zip(sprites, steps):
+            s.move(((s.pos.x + dx) % w, (s.pos.y + dy) % h))
+        rec.stop('move', t)
+    rec.info['sprites'] = len(sprites)
+    rec.info['moves_per_sec'] = len(sprites) * frames / sum(rec.times['move'])
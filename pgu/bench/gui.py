@@ -0,0 +1,329 @@
+"""Benchmarks of the gui.
+
+Each benchmark builds a synthetic widget tree in an App, then times:
+
+    init -- creating the App and widgets, App.init and the first paint
+    paint -- a full App.paint
+    update -- App.update after one random widget is repainted
+    resize -- App.update after App.chsize, ie. a relayout of the tree
+    chsize -- App.update after one random widget changes size
+    event -- App.event for a mouse motion, press or release at a random
+             position
+    focus -- App.event for an arrow key, moving the focus
+
+Every shape is registered at several sizes (gui.<shape>.<n>), so running
+'gui.table' gives a scaling curve by widget count.  The widget count is in
+the info of each result.  gui.table.retained is gui.table with every cell
+retained (see Widget.retained).  gui.vlist is gui.list with a
+VirtualList.
+
+gui.textarea.edit times moving the cursor (cursor) and typing (type) in a
+TextArea of 10000 lines, each followed by an App.update.
+
+gui.send times Widget.send of mouse motion events to widgets with
+callbacks of each kind: plain values, magic arguments and bound methods.
+
+gui.text times a HUD of text.write and text.writewrap calls, with the text
+cache emptied before each frame (cold) and kept (warm).
+
+The gui.theme.<name> benchmarks time the startup of each of the bundled
+themes: creating the Theme (load) and then loading all of its images and
+fonts (warmup).  The .bundle variants do the same from a compiled copy of
+the theme, see theme.compile_theme.
+
+"""
+import os
+import random
+import shutil
+import tempfile
+
+import pygame
+from pygame.locals import *
+
+from pgu.bench import benchmark
+
+SW, SH = 640, 480
+
+
+def screen():
+    pygame.display.init()
+    pygame.font.init()
+    return pygame.display.set_mode((SW, SH))
+
+
+def walk(w):
+    """Return a list of the widgets in the tree rooted at w."""
+    seen = set()
+    r = []
+    todo = [w]
+    while todo:
+        w = todo.pop()
+        if id(w) in seen:
+            continue
+        seen.add(id(w))
+        r.append(w)
+        todo.extend(getattr(w, 'widgets', ()))
+        if getattr(w, 'widget', None) is not None:
+            todo.append(w.widget)
+    return r
+
+
+def leaves(w):
+    """Return a list of the widgets in the tree rooted at w that contain no
+    other widgets."""
+    return [c for c in walk(w) if not getattr(c, 'widgets', None) and
+            getattr(c, 'widget', None) is None]
+
+
+def _run_gui(rec, frames, build):
+    from pgu import gui
+    scr = screen()
+
+    t = rec.start()
+    app = gui.App()
+    top = build(gui)
+    app.init(top, scr)
+    app.paint(scr)
+    rec.stop('init', t)
+
+    for frame in range(frames):
+        t = rec.start()
+        app.paint(scr)
+        rec.stop('paint', t)
+
+    ws = leaves(top)
+    for frame in range(frames):
+        random.choice(ws).repaint()
+        t = rec.start()
+        app.update(scr)
+        rec.stop('update', t)
+
+    for frame in range(frames):
+        app.chsize()
+        t = rec.start()
+        app.update(scr)
+        rec.stop('resize', t)
+        app.update(scr)
+
+    for frame in range(frames):
+        random.choice(ws).chsize()
+        t = rec.start()
+        app.update(scr)
+        rec.stop('chsize', t)
+        app.update(scr)
+
+    types = (MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP)
+    for frame in range(frames):
+        pos = random.randrange(SW), random.randrange(SH)
+        etype = types[frame % len(types)]
+        if etype == MOUSEMOTION:
+            e = pygame.event.Event(etype, {'pos': pos, 'rel': (1, 1),
+                                           'buttons': (0, 0, 0)})
+        else:
+            e = pygame.event.Event(etype, {'pos': pos, 'button': 1})
+        t = rec.start()
+        app.event(e)
+        rec.stop('event', t)
+        app.update(scr)
+
+    keys = (K_UP, K_RIGHT, K_DOWN, K_LEFT)
+    for frame in range(frames):
+        e = pygame.event.Event(KEYDOWN, {'key': random.choice(keys), 'mod': 0,
+                                         'unicode': u''})
+        t = rec.start()
+        app.event(e)
+        rec.stop('focus', t)
+        app.update(scr)
+
+    rec.info['widgets'] = len(walk(app))
+    rec.info['box_cache'] = app.theme.box_stats()
+    rec.info['retained'] = app.retained_stats()
+
+
+def _nested(depth):
+    def build(gui):
+        inner = gui.Button('leaf')
+        for n in range(depth):
+            t = gui.Table()
+            t.tr()
+            t.td(gui.Label('%d' % n))
+            t.td(inner)
+            inner = t
+        return gui.ScrollArea(inner, SW, SH)
+    return build
+
+
+def _table(n, retained=False):
+    def build(gui):
+        t = gui.Table()
+        for y in range(n):
+            t.tr()
+            for x in range(n):
+                if (x + y) % 2:
+                    t.td(gui.Button('%d,%d' % (x, y), retained=retained))
+                else:
+                    t.td(gui.Label('%d,%d' % (x, y), retained=retained))
+        return gui.ScrollArea(t, SW, SH)
+    return build
+
+
+def _list(n):
+    def build(gui):
+        l = gui.List(SW - 40, SH)
+        for i in range(n):
+            l.add('item %d' % i, value=i)
+        return l
+    return build
+
+
+def _vlist(n):
+    def build(gui):
+        l = gui.VirtualList(SW - 40, SH)
+        for i in range(n):
+            l.add('item %d' % i, value=i)
+        return l
+    return build
+
+
+def _textarea(n):
+    def build(gui):
+        text = '\n'.join(['line %d of the text area' % i for i in range(n)])
+        return gui.TextArea(text, SW, SH)
+    return build
+
+
+def _register(shape, sizes, make):
+    for n in sizes:
+        def fnc(rec, frames, build=make(n)):
+            _run_gui(rec, frames, build)
+        benchmark('gui.%s.%d' % (shape, n))(fnc)
+
+_register('nested', (4, 16, 64), _nested)
+_register('table', (5, 10, 20), _table)
+_register('table.retained', (5, 10, 20), lambda n: _table(n, True))
+_register('list', (25, 100, 400), _list)
+_register('vlist', (400, 5000, 50000), _vlist)
+_register('textarea', (100, 500, 2000), _textarea)
+
+
+@benchmark('gui.textarea.edit')
+def textarea_edit(rec, frames):
+    from pgu import gui
+    scr = screen()
+    app = gui.App()
+    text = '\n'.join(['line %d of the text area' % i for i in range(10000)])
+    ta = gui.TextArea(text, SW, SH)
+    app.init(ta, scr)
+    ta.focus()
+    app.update(scr)
+    keys = (K_UP, K_RIGHT, K_DOWN, K_LEFT)
+    for frame in range(frames):
+        e = pygame.event.Event(KEYDOWN, {'key': keys[frame % len(keys)],
+                                         'mod': 0, 'unicode': u''})
+        t = rec.start()
+        app.event(e)
+        app.update(scr)
+        rec.stop('cursor', t)
+    for frame in range(frames):
+        e = pygame.event.Event(KEYDOWN, {'key': K_a, 'mod': 0, 'unicode': u'a'})
+        t = rec.start()
+        app.event(e)
+        app.update(scr)
+        rec.stop('type', t)
+    rec.info['lines'] = len(ta.lines)
+
+
+class _Handler(object):
+    def __init__(self):
+        self.n = 0
+
+    def moved(self, _event, value):
+        self.n += 1
+
+
+@benchmark('gui.send')
+def send(rec, frames):
+    from pgu import gui
+    screen()
+    gui.App()
+    handler = _Handler()
+    def plain(value):
+        handler.n += 1
+    def magic(_widget, _code, _event, value):
+        handler.n += 1
+    ws = []
+    for i in range(300):
+        w = gui.Widget()
+        w.connect(MOUSEMOTION, (plain, magic, handler.moved)[i % 3], i)
+        ws.append(w)
+    e = pygame.event.Event(MOUSEMOTION, {'pos': (0, 0), 'rel': (1, 1),
+                                         'buttons': (0, 0, 0)})
+    for frame in range(frames):
+        t = rec.start()
+        for w in ws:
+            w.send(MOUSEMOTION, e)
+        rec.stop('send', t)
+    rec.info['callbacks'] = len(ws)
+    rec.info['sends_per_sec'] = handler.n / sum(rec.times['send'])
+
+
+@benchmark('gui.text')
+def text(rec, frames):
+    from pgu import text
+    scr = screen()
+    font = pygame.font.SysFont('default', 20)
+    para = ' '.join(['word%d' % i for i in range(200)])
+    rect = pygame.Rect(0, 100, SW, SH-100)
+    def hud(frame):
+        for i in range(10):
+            text.write(scr, font, (10, 10*i), (255, 255, 255),
+                       'score %d' % (i*100))
+        text.writewrap(scr, font, rect, (255, 255, 255), para)
+    for kind in ('cold', 'warm'):
+        for frame in range(frames):
+            if kind == 'cold':
+                text.cache.clear()
+            t = rec.start()
+            hud(frame)
+            rec.stop(kind, t)
+    rec.info.update(text.cache.stats())
+
+
+def _run_theme(rec, frames, dirs):
+    from pgu import gui
+    screen()
+    for frame in range(frames):
+        t = rec.start()
+        theme = gui.Theme(dirs)
+        t = rec.stop('load', t)
+        theme.warmup()
+        rec.stop('warmup', t)
+    rec.info['values'] = len(theme.cache)
+
+
+def _theme(name):
+    def fnc(rec, frames):
+        _run_theme(rec, frames, name)
+    return fnc
+
+
+def _theme_bundle(name):
+    def fnc(rec, frames):
+        from pgu.gui import theme
+        tmp = tempfile.mkdtemp()
+        try:
+            dname = os.path.join(tmp, name)
+            shutil.copytree(theme._find_dir(name), dname)
+            theme.compile_theme(dname)
+            # the bundle must be newer than the files copied with it
+            mtime = max([os.path.getmtime(os.path.join(dname, f))
+                         for f in os.listdir(dname)]) + 1
+            os.utime(os.path.join(dname, theme.BUNDLE), (mtime, mtime))
+            _run_theme(rec, frames, dname)
+        finally:
+            shutil.rmtree(tmp)
+    return fnc
+
+for name in ('default', 'clean', 'gray', 'tools'):
+    benchmark('gui.theme.%s' % name)(_theme(name))
+    benchmark('gui.theme.%s.bundle' % name)(_theme_bundle(name))
@@ -1,8 +1,15 @@
 """a state engine.
 """
+import time
+import json
+from array import array
 import pygame
 from pygame.locals import *
 
+from pgu.timer import percentile
+
+_clock = getattr(time, 'perf_counter', time.time)
+
 class State(object):
     """Template Class -- for a state.
 
@@ -25,6 +32,8 @@ class State(object):
         """Template Method - Paint the screen.  Called once after the state is selected.
 
         State is responsible for calling pygame.display.flip() or whatever.
+        When the game runs at a fixed rate, game.alpha is how far (0 to 1)
+        the frame is between the last loop and the next, for interpolation.
 
         """
         return
@@ -42,7 +51,8 @@ class State(object):
         return
 
     def loop(self):
-        """Template Method - Run a logic loop, called once per frame."""
+        """Template Method - Run a logic loop, called once per frame, or at
+        the fixed rate given to Game.run."""
         return
 
     def event(self,e):
@@ -58,7 +68,20 @@ class Quit(State):
 
 
 class Game(object):
-    """Template Class - The state engine."""
+    """Template Class - The state engine.
+
+    Attributes:
+        step -- seconds per State.loop in fixed rate mode, or None
+        max_steps -- the most State.loop calls made in a single frame
+        alpha -- fraction of a step since the last State.loop (0 to 1)
+        steps -- number of State.loop calls made in the last frame
+
+    """
+    step = None
+    max_steps = 5
+    alpha = 1.0
+    steps = 0
+    profiler = None
 
     def fnc(self,f,v=None):
         s = self.state
@@ -72,44 +95,108 @@ class Game(object):
             return 1
         return 0
 
-    def run(self,state,screen=None):
+    def run(self,state,screen=None,hz=0,max_steps=5):
         """Run the state engine, this is a infinite loop (until a quit occurs).
 
         Arguments:
             game -- a state engine
             screen -- the screen
+            hz -- if set, run State.loop at a fixed hz times a second,
+                  independent of how often the screen is painted
+            max_steps -- in fixed rate mode, the most times State.loop is
+                  called to catch up in a single frame.  Time beyond that
+                  is dropped, so a slow loop can not stall the game.
 
         """
         self.quit = 0
         self.state = state
         if screen != None: self.screen = screen
+        if hz: self.step = 1.0/hz
+        else: self.step = None
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self._last = _clock()
 
         self.init()
 
         while not self.quit:
             self.loop()
 
+    def profile(self,size=300):
+        """Start recording frame timings, see FrameProfiler.
+
+        Arguments:
+            size -- the number of recent frames to keep, or 0 to stop profiling
+
+        Returns the FrameProfiler.
+
+        """
+        if size: self.profiler = FrameProfiler(size)
+        else: self.profiler = None
+        return self.profiler
+
     def loop(self):
+        prof = self.profiler
+        if prof is None:
+            self._loop(None)
+            return
+        prof.begin()
+        self._loop(prof)
+        prof.end()
+
+    def _loop(self,prof):
         s = self.state
         if not hasattr(s,'_init') or s._init:
             s._init = 0
             if self.fnc('init'): return
-        else:
+            self._last = _clock()
+            self.accumulator = 0.0
+        elif self.step is None:
             if self.fnc('loop'): return
+        else:
+            if self.fixed_loop(): return
+        if prof: prof.mark('loop')
         if not hasattr(s,'_paint') or s._paint:
             s._paint = 0
             if self.fnc('paint',self.screen): return
         else:
             if self.fnc('update',self.screen): return
+        if prof: prof.mark('paint')
 
         for e in pygame.event.get():
             #NOTE: this might break API?
             #if self.event(e): return
             if not self.event(e):
                 if self.fnc('event',e): return
+        if prof: prof.mark('event')
         self.tick()
+        if prof: prof.mark('tick')
         return
 
+    def fixed_loop(self):
+        """Call State.loop once for every step of time that has passed.
+
+        Returns 1 if the state changed.
+
+        """
+        now = _clock()
+        self.accumulator += now - self._last
+        self._last = now
+        step = self.step
+        self.steps = 0
+        while self.accumulator >= step:
+            if self.steps == self.max_steps:
+                self.accumulator %= step
+                break
+            self.accumulator -= step
+            self.steps += 1
+            if self.fnc('loop'):
+                # The time left over belongs to the old state
+                self.accumulator = 0.0
+                return 1
+        self.alpha = self.accumulator/step
+        return 0
+
     def init(self):
         """Template Method - called at the beginning of State.run() to initialize things."""
         return
@@ -128,3 +215,116 @@ class Game(object):
         if e.type is QUIT:
             self.state = Quit(self)
             return 1
+
+
+class FrameProfiler(object):
+    """Records how long each phase of a frame takes.
+
+    Game.profile() attaches one of these to the engine.  Every frame it
+    records the time spent in the state loop, paint/update, the event pump
+    and tick, in seconds.  Only the last size frames are kept.
+
+    States can time their own sections by calling mark(name) on
+    game.profiler; the time since the previous mark is recorded under name.
+
+    Arguments:
+        size -- the number of recent frames to keep
+
+    Attributes:
+        phases -- the names of the phases recorded, in order
+        count -- the number of frames recorded so far
+        hooks -- functions called with the profiler at the end of each frame
+
+    """
+    def __init__(self,size=300):
+        self.size = size
+        self.phases = ['loop','paint','event','tick']
+        self.times = {}
+        for name in self.phases + ['frame']:
+            self.times[name] = array('d',[0.0])*size
+        self.count = 0
+        self.hooks = []
+        self._frame = {}
+
+    def begin(self):
+        """Start a frame."""
+        self._frame = {}
+        self._start = self._last = _clock()
+
+    def mark(self,name):
+        """Record the time since the last mark as part of phase name."""
+        now = _clock()
+        f = self._frame
+        f[name] = f.get(name,0.0) + now - self._last
+        self._last = now
+
+    def end(self):
+        """Finish a frame."""
+        f = self._frame
+        times = self.times
+        i = self.count % self.size
+        for name in f:
+            if name not in times:
+                self.phases.append(name)
+                times[name] = array('d',[0.0])*self.size
+        for name in self.phases:
+            times[name][i] = f.get(name,0.0)
+        times['frame'][i] = _clock() - self._start
+        self.count += 1
+        for hook in self.hooks:
+            hook(self)
+
+    def history(self,name='frame'):
+        """Return the recorded times of a phase, oldest first."""
+        a = self.times[name]
+        if self.count <= self.size:
+            return a[:self.count].tolist()
+        i = self.count % self.size
+        return a[i:].tolist() + a[:i].tolist()
+
+    def percentile(self,p,name='frame'):
+        """Return the p'th percentile (0 to 100) of a phase's times."""
+        return percentile(sorted(self.history(name)),p)
+
+    def stats(self,name='frame'):
+        """Return a dict of the mean, min, max, p50, p95 and p99 of a phase."""
+        v = self.history(name)
+        r = {'mean':0.0,'min':0.0,'max':0.0}
+        if v:
+            r = {'mean':sum(v)/len(v),'min':min(v),'max':max(v)}
+        for p in (50,95,99):
+            r['p%d'%p] = self.percentile(p,name)
+        return r
+
+    def summary(self):
+        """Return the stats of every phase and the whole frame."""
+        r = {}
+        for name in self.phases + ['frame']:
+            r[name] = self.stats(name)
+        return r
+
+    def dump_csv(self,fname):
+        """Write the recorded frames to a csv file, one row per frame."""
+        names = self.phases + ['frame']
+        cols = [self.history(name) for name in names]
+        f = open(fname,'w')
+        try:
+            f.write(','.join(names)+'\n')
+            for row in zip(*cols):
+                f.write(','.join(['%f'%v for v in row])+'\n')
+        finally:
+            f.close()
+
+    def dump_json(self,fname):
+        """Write the recorded frames and a summary to a json file."""
+        names = self.phases + ['frame']
+        data = {
+            'frames':self.count,
+            'times':dict([(name,self.history(name)) for name in names]),
+            'summary':self.summary(),
+            }
+        f = open(fname,'w')
+        try:
+            json.dump(data,f,indent=1,sort_keys=True)
+        finally:
+            f.close()
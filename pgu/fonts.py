@@ -6,9 +6,40 @@ future versions of pgu!
 
 print('pgu.fonts - This module is alpha, and is subject to change.')
 
+from collections import OrderedDict
+
 import pygame
 from pygame.locals import *
 
+from .text import _style
+
+
+def _cached(cache, size, key, fnc):
+    """Return cache[key], calling fnc() for it if it is missing.  The cache
+    is an OrderedDict, which keeps only the size most recently used."""
+    img = cache.pop(key, None)
+    if img is None:
+        img = fnc()
+        if len(cache) >= size:
+            cache.popitem(last=False)
+    cache[key] = img
+    return img
+
+
+def _recolor(img, color):
+    """Set the pixels of img that are more than half opaque to color."""
+    try:
+        mask = pygame.mask.from_surface(img, 128)
+        mask.to_surface(img, setcolor=color, unsetcolor=None)
+    except AttributeError:
+        # pygame before 2.0 has no Mask.to_surface
+        w, h = img.get_size()
+        for y in range(0, h):
+            for x in range(0, w):
+                if img.get_at((x, y))[3] > 128:
+                    img.set_at((x, y), color)
+
+
 class TileFont(object):
     """Creates an instance of the TileFont class.  Interface compatible
     with pygame.Font
@@ -22,10 +53,14 @@ class TileFont(object):
         hints -- a string of hints "abcdefg..."
         scale -- size to scale font to
         sensitive -- case sensitivity
+        cache -- the number of rendered strings to keep
+
+    The surfaces returned by render are cached, so must not be drawn on.
 
     """
 
-    def __init__(self, fname, size, hints, scale=None, sensitive=False):
+    def __init__(self, fname, size, hints, scale=None, sensitive=False,
+                 cache=256):
 
         self.image = pygame.image.load(fname)
 
@@ -47,15 +82,24 @@ class TileFont(object):
                 if x >= w: x, y = 0, y+th
 
         self.colors = {}
+        self.glyphs = {}
+        self.cache = cache
+        self._rendered = OrderedDict()
 
     def size(self, text):
         tw, th = self.scale
         return len(text)*tw, th
 
     def render(self, text, antialias=0, color=(255, 255, 255), background=None):
+        color = tuple(color)
+        if background is not None: background = tuple(background)
+        key = (text, color, background, tuple(self.scale))
+        return _cached(self._rendered, self.cache, key,
+                       lambda: self._render(text, color, background))
+
+    def _render(self, text, color, background):
         size = self.size(text)
-        scale = self.scale
-        tw, th = self._size
+        scale = tuple(self.scale)
         if background == None:
             s = pygame.Surface(size).convert_alpha()
             s.fill((0, 0, 0, 0))
@@ -65,26 +109,29 @@ class TileFont(object):
 
         if not self.sensitive: text = text.lower()
 
-        if color not in self.colors: self.colors[color] = {}
-        colored = self.colors[color]
-
         x, y = 0, 0
         for c in text:
             if c in self.chars:
-                if c not in colored:
-                    img = self.chars[c].convert_alpha()
-                    for yy in xrange(0, th):
-                        for xx in xrange(0, tw):
-                            r, g, b, a = img.get_at((xx, yy))
-                            if a > 128:
-                                img.set_at((xx, yy), color)
-                    colored[c] = img
-                img = colored[c]
-                if scale != (tw, th): img = pygame.transform.scale(img, scale)
-                s.blit(img, (x, y))
+                s.blit(self._glyph(c, color, scale), (x, y))
             x += scale[0]
         return s
 
+    def _glyph(self, c, color, scale):
+        """Return the image of c in color at scale."""
+        img = self.glyphs.get((c, color, scale))
+        if img is None:
+            if color not in self.colors: self.colors[color] = {}
+            colored = self.colors[color]
+            if c not in colored:
+                img = self.chars[c].convert_alpha()
+                _recolor(img, color)
+                colored[c] = img
+            img = colored[c]
+            if scale != tuple(self._size):
+                img = pygame.transform.scale(img, scale)
+            self.glyphs[(c, color, scale)] = img
+        return img
+
 
 class BorderFont(object):
     """A decorator for normal fonts, adds a border. Interface compatible with pygame.Font.
@@ -92,12 +139,17 @@ class BorderFont(object):
     Arguments:
         size -- width of border; defaults 0
         color -- color of border; default (0, 0, 0)
+        cache -- the number of rendered strings to keep
+
+    The surfaces returned by render are cached, so must not be drawn on.
 
     """
-    def __init__(self, font, size=1, color=(0, 0, 0)):
+    def __init__(self, font, size=1, color=(0, 0, 0), cache=256):
         self.font = font
         self._size = size
         self.color = color
+        self.cache = cache
+        self._rendered = OrderedDict()
 
     def size(self, text):
         w, h = self.font.size(text)
@@ -105,6 +157,14 @@ class BorderFont(object):
         return w+s*2, h+s*2
 
     def render(self, text, antialias=0, color=(255, 255, 255), background=None):
+        color = tuple(color)
+        if background is not None: background = tuple(background)
+        key = (text, antialias, color, background, self._size, tuple(self.color),
+               _style(self.font))
+        return _cached(self._rendered, self.cache, key,
+                       lambda: self._render(text, antialias, color, background))
+
+    def _render(self, text, antialias, color, background):
         size = self.size(text)
 
         if background == None:
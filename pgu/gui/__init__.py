@@ -19,11 +19,11 @@ from .surface import subsurface, ProxySurface
 from .const import *
 
 from .container import Container
-from .app import App, Desktop
+from .app import App, Desktop, coalesce_events
 from .table import Table
 from .document import Document
 #html
-from .area import SlideBox, ScrollArea, List
+from .area import SlideBox, ScrollArea, List, VirtualList
 
 from .form import Form
 from .group import Group
@@ -2,6 +2,7 @@
 
 import pygame
 import os
+from collections import OrderedDict
 from pygame.locals import *
 
 from . import pguglobals
@@ -9,6 +10,35 @@ from . import container
 from .theme import Theme
 from .const import *
 
+def coalesce_events(events):
+    """Return the list of events with bursts of events merged together.
+
+    Consecutive mouse motion events with no buttons held become one event,
+    at the last position and with the sum of their rel.  Motion with a
+    button held (a drag) is kept whole, as widgets may draw along it.  Of
+    consecutive video expose or resize events only the last is kept.
+
+    """
+    r = []
+    last = None
+    for e in events:
+        if last is not None and e.type == last.type:
+            if (e.type == MOUSEMOTION and not any(e.buttons) and
+                    not any(last.buttons)):
+                args = dict(e.dict)
+                args['rel'] = (last.rel[0] + e.rel[0], last.rel[1] + e.rel[1])
+                e = pygame.event.Event(MOUSEMOTION, args)
+                r[-1] = e
+                last = e
+                continue
+            if e.type == VIDEOEXPOSE or e.type == VIDEORESIZE:
+                r[-1] = e
+                last = e
+                continue
+        r.append(e)
+        last = e
+    return r
+
 class App(container.Container):
     """The top-level widget for an application.
 
@@ -33,10 +63,26 @@ class App(container.Container):
     # this is used when transforming the mouse position from screen
     # coordinates into the subsurface coordinates.
     appArea = None
+    # Bumped whenever the whole application must be laid out again
+    _layout_gen = 0
+    # The index of the widgets Container._move_focus may move to
+    _focus_index = None
+    # Whether App.loop merges bursts of events, see coalesce_events
+    coalesce = True
+    # The most time (in milliseconds) App.loop spends handling events before
+    # updating the display.  Events left over are handled on the next loop.
+    event_time = None
+    _pending = ()
+    # The most memory, in bytes, used to keep the paintings of retained
+    # widgets (see Widget.retained).  The least recently painted are dropped
+    # first.
+    retained_budget = 16 * 1024 * 1024
+    _retained_bytes = 0
 
     def __init__(self, theme=None, **params):
         """Create a new application given the (optional) theme instance."""
         self.set_global_app()
+        self._retained = OrderedDict()
 
         if (not theme):
             name = os.getenv("PGU_THEME", "").strip()
@@ -56,6 +102,7 @@ class App(container.Container):
         self.widget = None
         self._chsize = False
         self._repaint = False
+        self._resized = {}
 
         self.screen = None
         self.container = None
@@ -104,6 +151,41 @@ class App(container.Container):
             w.rect.size = w.resize()
 
         self._chsize = False
+        self._resized = {}
+
+    def _relayout(self):
+        # Lay out again the widgets that changed size.  Each one is resized,
+        # then its containers, until one is found whose size did not
+        # change.  Only that part of the tree is repainted, unless the
+        # change reaches the top, in which case the whole app is resized.
+        for w in list(self._resized):
+            c = w
+            while True:
+                rect = pygame.Rect(c.rect)
+                old = getattr(c, '_natural_size', None)
+                size = c.resize()
+                if size == old:
+                    c.rect.size = c.resize(rect.w, rect.h)
+                    break
+                p = c.container
+                if p is None or p is self:
+                    self.resize()
+                    self._repaint = True
+                    return
+                # Its container must measure it again
+                c._size_dirty = True
+                c = p
+
+            # Repaint from a widget that paints its own background, so
+            # nothing of the old layout is left behind
+            while c is not self and not c.background:
+                c = c.container
+            if c is self:
+                self._repaint = True
+            else:
+                c.repaint()
+        # Ignore any size changes signalled while laying out
+        self._resized = {}
 
     def init(self, widget=None, screen=None, area=None):
         """Initialize the application.
@@ -177,10 +259,27 @@ class App(container.Container):
 
     def loop(self):
         """Performs one iteration of the PGU application loop, which
-        processes events and update the pygame display."""
+        processes events and update the pygame display.
+
+        Bursts of events are merged first (see coalesce_events), unless
+        App.coalesce is False.  If App.event_time is set, events that do not
+        fit in that many milliseconds are left for the next loop.
+
+        """
         self.set_global_app()
 
-        for e in pygame.event.get():
+        events = pygame.event.get()
+        if self._pending:
+            events = self._pending + events
+        if self.coalesce:
+            events = coalesce_events(events)
+        self._pending = ()
+        start = pygame.time.get_ticks()
+        for n, e in enumerate(events):
+            if (n and self.event_time is not None and
+                pygame.time.get_ticks() - start >= self.event_time):
+                self._pending = events[n:]
+                break
             if not (e.type == QUIT and self.mywindow):
                 self.event(e)
         rects = self.update(self.screen)
@@ -192,7 +291,7 @@ class App(container.Container):
         if (screen):
             self.screen = screen
 
-        if self._chsize:
+        if self._chsize or self._resized:
             self._chsize = False
             self.resize()
 
@@ -212,6 +311,9 @@ class App(container.Container):
             self._chsize = False
             return None
 
+        if self._resized:
+            self._relayout()
+
         if self._repaint:
             self.paint(self.screen)
             self._repaint = False
@@ -254,7 +356,42 @@ class App(container.Container):
     def repaintall(self):
         self._repaint = True
 
-    def chsize(self):
+    def retained_stats(self):
+        """Return (widgets, bytes) of the paintings kept for retained
+        widgets."""
+        return len(self._retained), self._retained_bytes
+
+    def _retain(self, w, key, s):
+        self._unretain(w)
+        size = s.get_bytesize() * s.get_width() * s.get_height()
+        if size > self.retained_budget:
+            return
+        self._retained[w] = (key, s, size)
+        self._retained_bytes += size
+        while self._retained_bytes > self.retained_budget:
+            old, (key, s, size) = self._retained.popitem(last=False)
+            self._retained_bytes -= size
+
+    def _unretain(self, w):
+        r = self._retained.pop(w, None)
+        if r is not None:
+            self._retained_bytes -= r[2]
+
+    def chsize(self, w=None):
+        """Schedule a resize of the application.
+
+        Arguments:
+            w -- the widget that changed size.  Only the part of the app
+                affected by it is laid out again, see App.update.  If not
+                given, every widget is laid out again.
+
+        """
+        if (w is not None and w is not self and self.widget is not None and
+                not self._chsize):
+            self._resized[w] = w
+            return
+        if (w is None):
+            self._layout_gen += 1
         if (not self._chsize):
             self._chsize = True
             self._repaint = True
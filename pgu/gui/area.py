@@ -5,10 +5,20 @@ import os
 from . import pguglobals
 from .const import *
 from . import surface
-from . import container, table
+from . import container, table, widget
 from . import group
 from . import basic, button, slider
 
+def _backing(surf, size, s):
+    # Return surf cleared, if it is the size and format to back s, otherwise
+    # a new surface
+    if (surf is not None and surf.get_size() == size and
+        surf.get_bitsize() == s.get_bitsize() and
+        surf.get_masks() == s.get_masks()):
+        surf.fill((0,0,0,0))
+        return surf
+    return pygame.Surface(size,0,s)
+
 class SlideBox(container.Container):
     """A scrollable area with no scrollbars.
 
@@ -49,11 +59,13 @@ class SlideBox(container.Container):
         self.add(val, 0, 0)
 
     def paint(self, s):
-        #if not hasattr(self,'surface'):
-        self.surface = pygame.Surface((self.max_rect.w,self.max_rect.h),0,s)
-        #self.surface.fill((0,0,0,0))
+        # The surfaces are kept from one paint to the next, unless the size
+        # or format needed changes
+        self.surface = _backing(getattr(self, 'surface', None),
+                                (self.max_rect.w,self.max_rect.h), s)
         pguglobals.app.theme.render(self.surface,self.style.background,pygame.Rect(0,0,self.max_rect.w,self.max_rect.h))
-        self.bkgr = pygame.Surface((s.get_width(),s.get_height()),0,s)
+        self.bkgr = _backing(getattr(self, 'bkgr', None),
+                             (s.get_width(),s.get_height()), s)
         self.bkgr.blit(s,(0,0))
         container.Container.paint(self,self.surface)
         s.blit(self.surface,(-self.offset[0],-self.offset[1]))
@@ -86,6 +98,12 @@ class SlideBox(container.Container):
                 if r2.colliderect(s_rect):
                     s.blit(self.surface.subsurface(r),r2)
                     rets.append(r2)
+        elif self._scroll(s, rects):
+            rets.append(s_rect)
+        elif self._covers(s, self.offset):
+            # Opaque content over the whole view hides the background
+            s.blit(self.surface,(0,0),pygame.Rect(self.offset[0],self.offset[1],s.get_width(),s.get_height()))
+            rets.append(s_rect)
         else:
             s.blit(self.bkgr,(0,0))
             sub = pygame.Rect(self.offset[0],self.offset[1],min(s.get_width(),self.max_rect.w-self.offset[0]),min(s.get_height(),self.max_rect.h-self.offset[1]))
@@ -99,6 +117,65 @@ class SlideBox(container.Container):
         self._offset = self.offset[:]
         return rets
 
+    def _covers(self, s, offset):
+        # Whether the content surface is opaque and covers all of s at offset
+        view = pygame.Rect(offset[0], offset[1],
+                           s.get_width(), s.get_height())
+        return (self.surface.get_rect().contains(view) and
+                not self.surface.get_flags() & pygame.SRCALPHA)
+
+    def _scroll(self, s, rects):
+        # Scroll what is already on s by the change in offset, then blit just
+        # the bands uncovered, and the rects changed, from self.surface.
+        # This is only done if s shows nothing but the content at the old
+        # offset, otherwise returns False.
+        w, h = s.get_width(), s.get_height()
+        dx, dy = self._offset[0]-self.offset[0], self._offset[1]-self.offset[1]
+        if abs(dx) >= w or abs(dy) >= h:
+            return False
+        if not (self._covers(s, self.offset) and self._covers(s, self._offset)):
+            return False
+        # Surface.scroll only moves the pixels in the clip rect
+        if s.get_clip() != s.get_rect():
+            return False
+        if self._overlapped():
+            return False
+        s.scroll(dx, dy)
+        bands = []
+        if dx > 0: bands.append(pygame.Rect(0, 0, dx, h))
+        elif dx < 0: bands.append(pygame.Rect(w + dx, 0, -dx, h))
+        if dy > 0: bands.append(pygame.Rect(0, 0, w, dy))
+        elif dy < 0: bands.append(pygame.Rect(0, h + dy, w, -dy))
+        for r in rects:
+            r = r.move(-self.offset[0], -self.offset[1]).clip(0, 0, w, h)
+            if r.w and r.h:
+                bands.append(r)
+        for r in bands:
+            s.blit(self.surface, r.topleft, r.move(self.offset))
+        return True
+
+    def _overlapped(self):
+        # Whether anything painted over this box could be on the screen: a
+        # widget after it, or after one of its containers, or a window other
+        # than the top one (which is painted again after every update)
+        rect = self.get_abs_rect()
+        w, c = self, self.container
+        ancestors = []
+        while c:
+            after = c.widgets[c.widgets.index(w)+1:] if w in c.widgets else []
+            for o in after:
+                if o.get_abs_rect().colliderect(rect):
+                    return True
+            ancestors.append(c)
+            w, c = c, c.container
+        app = pguglobals.app
+        for win in app.windows:
+            if win is app.mywindow or win in ancestors:
+                continue
+            if win.get_abs_rect().colliderect(rect):
+                return True
+        return False
+
     def proxy_update(self, s):
         rects = container.Container.update(self, surface.ProxySurface(parent=None,
                                                     rect=self.max_rect,
@@ -120,13 +197,12 @@ class SlideBox(container.Container):
         if e.type in [MOUSEBUTTONDOWN, MOUSEBUTTONUP, MOUSEMOTION]:
             pos = (e.pos[0] + self.offset[0], e.pos[1] + self.offset[1])
             if self.max_rect.collidepoint(pos):
-                e_params = {'pos': pos }
-                if e.type == MOUSEMOTION:
-                    e_params['buttons'] = e.buttons
-                    e_params['rel'] = e.rel
-                else:
-                    e_params['button'] = e.button
-                e = pygame.event.Event(e.type, e_params)
+                widget._relative_event(self._area_event, e,
+                                       -self.offset[0], -self.offset[1])
+                return
+        container.Container.event(self, e)
+
+    def _area_event(self, e):
         container.Container.event(self, e)
 
 #class SlideBox(Area):
@@ -432,3 +508,304 @@ class List(ScrollArea):
         self.group.widgets.remove(item)
         self.table.remove_row(item.style.row)
 
+
+
+class _Heights(object):
+    # The heights of the rows of a VirtualList.  They are kept in a Fenwick
+    # tree too, so the offset of a row and the row at an offset are found
+    # in O(log n).
+
+    def __init__(self):
+        self.heights = []
+        self.tree = [0]
+        self.total = 0
+
+    def __len__(self):
+        return len(self.heights)
+
+    def append(self, h):
+        self.heights.append(h)
+        n = len(self.heights)
+        # tree[n] is the sum of the heights of rows n - lowbit(n) to n - 1
+        self.tree.append(h + self.offset(n - 1) - self.offset(n - (n & -n)))
+        self.total += h
+
+    def rebuild(self, heights):
+        self.heights = list(heights)
+        tree = [0] + self.heights
+        size = len(tree)
+        for i in range(1, size):
+            j = i + (i & -i)
+            if j < size:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.total = sum(self.heights)
+
+    def set(self, row, h):
+        d = h - self.heights[row]
+        if not d:
+            return
+        self.heights[row] = h
+        self.total += d
+        tree = self.tree
+        i = row + 1
+        while i < len(tree):
+            tree[i] += d
+            i += i & -i
+
+    def offset(self, row):
+        """Return the top of the row."""
+        tree = self.tree
+        r = 0
+        while row > 0:
+            r += tree[row]
+            row -= row & -row
+        return r
+
+    def find(self, y):
+        """Return the row at offset y."""
+        tree = self.tree
+        n = len(tree) - 1
+        step = 1
+        while step * 2 <= n:
+            step *= 2
+        row = 0
+        while step:
+            if row + step <= n and tree[row + step] <= y:
+                row += step
+                y -= tree[row]
+            step //= 2
+        return row
+
+
+class _VirtualRows(container.Container):
+    # The rows of a VirtualList in view.  Only these rows have widgets, the
+    # widgets of rows scrolled out of view are used again for others.
+
+    def __init__(self, owner, **params):
+        container.Container.__init__(self, **params)
+        self.owner = owner
+        self.offset = 0
+        self._bound = {}
+        self._free = []
+
+    def resize(self, width=None, height=None):
+        return self.style.width, self.style.height
+
+    def unbind(self):
+        """Let go of the widgets of all the rows."""
+        for item in self._bound.values():
+            self._unbind(item)
+        self._bound = {}
+        self.widgets = []
+
+    def _unbind(self, item):
+        if self.myfocus is item: self.blur(item)
+        if self.myhover is item: self.exit(item)
+        if item._recycle:
+            self._free.append(item)
+
+    def _layout(self, width, height):
+        owner = self.owner
+        heights = owner._heights
+        total = heights.total
+        row = heights.find(self.offset)
+        y = heights.offset(row) - self.offset
+        old = self._bound
+        # Free the rows leaving the view first, so the rows coming into
+        # view can have their widgets
+        last = heights.find(self.offset + height - 1)
+        for n in [n for n in old if n < row or n > last]:
+            self._unbind(old.pop(n))
+        bound = {}
+        while row < len(heights) and y < height:
+            item = old.pop(row, None)
+            if item is None:
+                item = owner._bind(row, self._free)
+                item.container = self
+                item.rect.w, item.rect.h = item.resize(width=width)
+                heights.set(row, item.rect.h)
+            item.rect.x, item.rect.y = 0, y
+            bound[row] = item
+            y += heights.heights[row]
+            row += 1
+        for item in old.values():
+            self._unbind(item)
+        self._bound = bound
+        self.widgets = [bound[n] for n in sorted(bound)]
+        owner.group.widgets = list(self.widgets)
+        if heights.total != total:
+            owner.chsize()
+
+    def paint(self, s):
+        self._layout(s.get_width(), s.get_height())
+        self.toupdate = {}
+        self.topaint = {}
+        for w in self.widgets:
+            self._paint_item(s, w)
+
+    def _paint_item(self, s, w):
+        r = w.rect
+        if s.get_rect().contains(r):
+            w.paint(surface.subsurface(s, r))
+            return
+        # The row is only partly in view
+        tmp = pygame.Surface(r.size, 0, s)
+        tmp.blit(s, (0, 0), r)
+        w.paint(tmp)
+        s.blit(tmp, r.topleft)
+
+    def update(self, s):
+        if self.myfocus: self.toupdate[self.myfocus] = self.myfocus
+        ws = self.widgets
+        bounds = s.get_rect()
+        updates = []
+        for w in self.topaint:
+            if w in ws:
+                self._paint_item(s, w)
+                updates.append(w.rect.clip(bounds))
+        for w in self.toupdate:
+            if w in ws and bounds.contains(w.rect):
+                us = w.update(surface.subsurface(s, w.rect))
+                if us:
+                    for u in us:
+                        updates.append(pygame.Rect(u.x + w.rect.x,
+                                                   u.y + w.rect.y, u.w, u.h))
+        self.topaint = {}
+        self.toupdate = {}
+        return updates
+
+
+class VirtualList(table.Table):
+    """A list of items in an area, for very long lists.
+
+    Works like List, except that only the items in view have widgets, so
+    adding an item is cheap and the list is painted in the same time
+    however long it is.  Until an item is first shown its height is taken
+    to be row_height.
+
+    Example:
+        l = gui.VirtualList(200, 300)
+        for n in range(50000):
+            l.add('item %d' % n, value=n)
+
+    """
+
+    def __init__(self, width, height, row_height=None, step=None, **params):
+        """VirtualList constructor.
+
+        Arguments:
+            width, height -- size of the list
+            row_height -- the height to take an item to be until it has
+                been shown, defaults to the height of a text item
+            step -- how far clicks on the scrollbar icons scroll, defaults
+                to row_height
+
+        """
+        params.setdefault('cls', 'list')
+        table.Table.__init__(self, width=width, height=height, **params)
+        self.rows = _VirtualRows(self, cls=self.cls+".content")
+        self._entries = []
+        self._heights = _Heights()
+        self.group = None
+        self.value = None
+        self._new_group()
+
+        if row_height is None:
+            row_height = _List_Item('Xg').resize()[1]
+        self.row_height = row_height
+
+        self.vscrollbar = slider.VScrollBar(0, 0, 0, 0,
+                                            step=step or row_height)
+        self.vscrollbar.connect(CHANGE, self._vscrollbar_changed, None)
+
+    def _new_group(self):
+        self.group = group.Group()
+        self.group.connect(CHANGE, self._change, None)
+
+    def _change(self, value):
+        self.value = self.group.value
+        self.send(CHANGE)
+
+    def add(self, label, image=None, value=None):
+        """Add an item to the end of the list."""
+        self._entries.append((label, image, value))
+        self._heights.append(self.row_height)
+        self.chsize()
+
+    def remove(self, value):
+        """Remove the (first) item with the value."""
+        for n, entry in enumerate(self._entries):
+            if entry[2] == value:
+                break
+        else:
+            return
+        del self._entries[n]
+        heights = self._heights.heights
+        self._heights.rebuild(heights[:n] + heights[n + 1:])
+        self.rows.unbind()
+        self.chsize()
+
+    def clear(self):
+        """Clear the list."""
+        self._entries = []
+        self._heights.rebuild([])
+        self.rows.unbind()
+        self._new_group()
+        self.value = None
+        self.rows.offset = 0
+        self.chsize()
+
+    def _bind(self, row, free):
+        # Return a widget for the item at row
+        label, image, value = self._entries[row]
+        if free and image is None and type(label) == str:
+            item = free.pop()
+            item.widget.value = label
+            item.value = value
+            item.pcls = ""
+        else:
+            item = _List_Item(label, image=image, value=value)
+            item._recycle = image is None and type(label) == str
+        item.group = self.group
+        return item
+
+    def resize(self, width=None, height=None):
+        rows = self.rows
+        vs = self.vscrollbar
+
+        table.Table.clear(self)
+        self.tr()
+        self.td(rows)
+        self.td(vs)
+
+        xt,xr,xb,xl = pguglobals.app.theme.getspacing(rows)
+        rows.style.height = self.style.height - (xt+xb)
+
+        total = self._heights.total
+        vs.min = 0
+        vs.max = max(0, total - rows.style.height)
+        vs.style.height = self.style.height
+        vs.size = vs.style.height * rows.style.height // max(1, total)
+        vs.rect.w,vs.rect.h = vs.resize()
+        rows.style.width = self.style.width - (vs.rect.w + xl+xr)
+        rows.offset = vs.value
+
+        return table.Table.resize(self,width,height)
+
+    def _vscrollbar_changed(self, value):
+        self.rows.offset = self.vscrollbar.value
+        self.rows.repaint()
+
+    def event(self, e):
+        if table.Table.event(self, e):
+            return True
+        # mouse wheel scrolling
+        if e.type == MOUSEBUTTONDOWN:
+            if e.button == 4:
+                self.vscrollbar._click(-1)
+                return True
+            elif e.button == 5:
+                self.vscrollbar._click(1)
+                return True
+        return False
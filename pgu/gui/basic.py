@@ -9,6 +9,7 @@ import pygame
 
 from .const import *
 from . import widget
+from .. import text
 from .errors import PguError
 
 #############
@@ -107,7 +108,7 @@ class Label(widget.Widget):
 
     def paint(self,s):
         """Renders the label onto the given surface in the upper-left corner."""
-        s.blit(self.font.render(self.value, 1, self.style.color),(0,0))
+        s.blit(text.render(self.font, self.value, 1, self.style.color),(0,0))
 
     def set_text(self, txt):
         """Set the text of this label."""
@@ -5,6 +5,7 @@ from pygame.locals import *
 from .const import *
 from . import widget, surface
 from . import basic
+from .. import text
 
 class _button(widget.Widget):
     # The underlying 'value' accessed by the getter and setters below
@@ -347,4 +348,4 @@ class Link(_button):
         self.style.width, self.style.height = self.font.size(self.value)
 
     def paint(self,s):
-        s.blit(self.font.render(self.value, 1, self.style.color),(0,0))
+        s.blit(text.render(self.font, self.value, 1, self.style.color),(0,0))
@@ -9,6 +9,9 @@ from . import pguglobals
 from .surface import ProxySurface
 from .errors import StyleError
 
+# The size of the cells of the grids used to find widgets by position
+_CELL = 64
+
 class Container(widget.Widget):
     """The base container widget, can be used as a template as well as stand alone."""
 
@@ -18,6 +21,10 @@ class Container(widget.Widget):
     myfocus = None
     # The currently open window
     mywindow = None
+    # Containers with at least this many widgets keep a grid of where they
+    # are, to find the widgets under the mouse quickly
+    hit_index_min = 32
+    _hit_index = None
 
     def __init__(self,**params):
         super(Container, self).__init__(**params)
@@ -54,7 +61,7 @@ class Container(widget.Widget):
                 # This hack isn't perfect and so it's not enabled by default, but only by
                 # themes that explicitly request it.
                 alpha = pguglobals.app.theme.getstyle("pgu", "", "themealpha")
-            except StyleError,e:
+            except StyleError as e:
                 alpha = False
 
             if (alpha):
@@ -95,6 +102,7 @@ class Container(widget.Widget):
                 continue
             us = w.update(surface.subsurface(s,w.rect))
             if us:
+                self._unretain(w)
                 for u in us:
                     updates.append(pygame.rect.Rect(u.x + w.rect.x,u.y+w.rect.y,u.w,u.h))
 
@@ -115,20 +123,32 @@ class Container(widget.Widget):
         self.topaint = {}
         self.toupdate = {}
 
+        if updates and pguglobals.app:
+            pguglobals.app._unretain(self)
         return updates
 
     def repaint(self,w=None):
         if not w:
             return widget.Widget.repaint(self)
         self.topaint[w] = w
+        self._unretain(w)
         self.reupdate()
 
     def reupdate(self,w=None):
         if not w:
             return widget.Widget.reupdate(self)
         self.toupdate[w] = w
+        self._unretain(w)
         self.reupdate()
 
+    def _unretain(self, w):
+        # w and this container are about to be drawn over, so their retained
+        # paintings are out of date
+        app = pguglobals.app
+        if app:
+            app._unretain(w)
+            app._unretain(self)
+
     def paint(self,s):
         self.toupdate = {}
         self.topaint = {}
@@ -141,11 +161,46 @@ class Container(widget.Widget):
                 print(s.get_width(), s.get_height(), w.rect)
                 print("")
             else:
-                w.paint(sub)
+                self._paint_widget(w, sub)
 
         for w in self.windows:
             w.paint(self.top_surface(s,w))
 
+    def _paint_widget(self, w, s):
+        """Paint the child widget w, or if it is retained, blit the copy kept
+        of it instead.
+
+        The copy is kept until the widget (or anything in it) is repainted,
+        updated or changes size.  It includes whatever w was painted over,
+        so it is also dropped if w or a container above it moves or changes
+        pcls.
+
+        """
+        app = pguglobals.app
+        if not w.retained or not app or not isinstance(s, pygame.Surface):
+            w.paint(s)
+            return
+        key = [tuple(w.rect), w.pcls]
+        c = self
+        while c is not None:
+            key.append((tuple(c.rect), c.pcls))
+            c = c.container
+        key = tuple(key)
+        r = app._retained.pop(w, None)
+        if r is not None and r[0] == key and r[1].get_size() == s.get_size():
+            app._retained[w] = r
+            if r[1].get_flags() & SRCALPHA:
+                # copy the pixels over, rather than blending them
+                s.fill((0, 0, 0, 0))
+                s.blit(r[1], (0, 0), None, BLEND_RGBA_MAX)
+            else:
+                s.blit(r[1], (0, 0))
+            return
+        if r is not None:
+            app._retained_bytes -= r[2]
+        w.paint(s)
+        app._retain(w, key, s.copy())
+
     def top_surface(self,s,w):
         x,y = s.get_abs_offset()
         s = s.get_abs_parent()
@@ -174,7 +229,7 @@ class Container(widget.Widget):
                 if self.myfocus: self.blur(self.myfocus)
             elif e.type == MOUSEBUTTONDOWN:
                 h = None
-                for w in self.widgets:
+                for w in self._hits(e.pos):
                     if not w.disabled:
                         # Focusable not considered, since that is only for tabs
                         if w.collidepoint(e.pos):
@@ -186,7 +241,7 @@ class Container(widget.Widget):
                 if 1 in e.buttons:
                     if self.myfocus: ws = [self.myfocus]
                     else: ws = []
-                else: ws = self.widgets
+                else: ws = self._hits(e.pos)
 
                 h = None
                 for w in ws:
@@ -200,37 +255,22 @@ class Container(widget.Widget):
                 w = self.myhover
 
                 if w and w is not self.myfocus:
-                    sub = pygame.event.Event(e.type,{
-                        'buttons':e.buttons,
-                        'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y),
-                        'rel':e.rel})
-                    used = w._event(sub)
+                    used = widget._relative_event(w._event, e,
+                                                  w.rect.x, w.rect.y)
 
         w = self.myfocus
         if w:
             if e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN:
-                sub = pygame.event.Event(e.type,{
-                    'button':e.button,
-                    'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y)})
+                used = widget._relative_event(w._event, e, w.rect.x, w.rect.y)
             elif e.type == CLICK and self.myhover is w:
-                sub = pygame.event.Event(e.type,{
-                    'button':e.button,
-                    'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y)})
+                used = widget._relative_event(w._event, e, w.rect.x, w.rect.y)
             elif e.type == MOUSEMOTION:
-                sub = pygame.event.Event(e.type,{
-                    'buttons':e.buttons,
-                    'pos':(e.pos[0]-w.rect.x,e.pos[1]-w.rect.y),
-                    'rel':e.rel})
+                used = widget._relative_event(w._event, e, w.rect.x, w.rect.y)
             elif (e.type == KEYDOWN or e.type == KEYUP):
-                sub = e
-            else:
-                sub = None
+                used = w._event(e)
 
             #elif e.type == CLICK: #a dead click
-            #    sub = None
-
-            if (sub):
-                used = w._event(sub)
+            #    pass
 
         if not used and e.type is KEYDOWN:
             if e.key is K_TAB and self.myfocus:
@@ -253,54 +293,109 @@ class Container(widget.Widget):
                 return True
         return used
 
+    def _hits(self, pos):
+        # Return the widgets that pos may be over, in order.  The grid is
+        # rebuilt whenever a widget was added, removed or moved, which is
+        # told by keeping a copy of the widgets and rects it was built from.
+        ws = self.widgets
+        if len(ws) < self.hit_index_min:
+            return ws
+        rects = [w.rect for w in ws]
+        index = self._hit_index
+        if index is None or index[0] != ws or index[1] != rects:
+            rects = [pygame.Rect(r) for r in rects]
+            items = [(n, w, rects[n]) for n, w in enumerate(ws)]
+            index = self._hit_index = (list(ws), rects) + _grid(items)
+        ws, rects, grid, always, bounds = index
+        hits = grid.get((pos[0] // _CELL, pos[1] // _CELL), [])
+        if always:
+            hits = sorted(hits + always)
+        return [item[1] for item in hits]
+
     def _move_focus(self,dx_,dy_):
         myfocus = self.myfocus
         if not self.myfocus: return
 
-        widgets = self._get_widgets(pguglobals.app)
-        #if myfocus not in widgets: return
-        #widgets.remove(myfocus)
-        if myfocus in widgets:
-            widgets.remove(myfocus)
+        # The grid is rebuilt whenever a widget or container was added,
+        # removed or moved, as _hits does
+        app = pguglobals.app
+        key = self._get_rects(app)
+        index = app._focus_index
+        if index is None or index[0] != key:
+            key = [_copy_rect(r) for r in key]
+            items = [(n, w, w.get_abs_rect())
+                     for n, w in enumerate(self._get_widgets(app, True))]
+            index = app._focus_index = (key,) + _grid(items, True)
+        key, grid, always, bounds = index
+
         rect = myfocus.get_abs_rect()
         fx,fy = rect.centerx,rect.centery
 
-        def sign(v):
-            if v < 0: return -1
-            if v > 0: return 1
-            return 0
-
-        dist = []
-        for w in widgets:
-            wrect = w.get_abs_rect()
-            wx,wy = wrect.centerx,wrect.centery
-            dx,dy = wx-fx,wy-fy
-            if dx_ > 0 and wrect.left < rect.right: continue
-            if dx_ < 0 and wrect.right > rect.left: continue
-            if dy_ > 0 and wrect.top < rect.bottom: continue
-            if dy_ < 0 and wrect.bottom > rect.top: continue
-            dist.append((dx*dx+dy*dy,w))
-        if not len(dist): return
-        dist.sort()
-        d,w = dist.pop(0)
-        w.focus()
-
-    def _get_widgets(self,c):
+        # Look through the grid in rings around the focus, nearest first,
+        # until no widget further out could be nearer than the best found
+        x0, y0 = fx // _CELL, fy // _CELL
+        minx, miny, maxx, maxy = bounds
+        far = max(abs(minx-x0), abs(maxx-x0), abs(miny-y0), abs(maxy-y0))
+        best = None
+        for r in range(far + 1):
+            if best and r > 1 and best[0] <= ((r-1)*_CELL)**2: break
+            xlo, xhi = max(minx, x0-r), min(maxx, x0+r)
+            ylo, yhi = max(miny, y0-r), min(maxy, y0+r)
+            if dx_ > 0: xlo = max(xlo, x0)
+            if dx_ < 0: xhi = min(xhi, x0)
+            if dy_ > 0: ylo = max(ylo, y0)
+            if dy_ < 0: yhi = min(yhi, y0)
+            for y in range(ylo, yhi+1):
+                if abs(y-y0) == r: xs = range(xlo, xhi+1)
+                else: xs = [x for x in (x0-r, x0+r) if xlo <= x <= xhi]
+                for x in xs:
+                    for n, w, wrect in grid.get((x, y), ()):
+                        if w is myfocus or w.disabled or not w.focusable:
+                            continue
+                        if dx_ > 0 and wrect.left < rect.right: continue
+                        if dx_ < 0 and wrect.right > rect.left: continue
+                        if dy_ > 0 and wrect.top < rect.bottom: continue
+                        if dy_ < 0 and wrect.bottom > rect.top: continue
+                        dx,dy = wrect.centerx-fx,wrect.centery-fy
+                        d = (dx*dx+dy*dy,n)
+                        if best is None or d < best[:2]: best = d + (w,)
+        if best is None: return
+        best[2].focus()
+
+    def _get_widgets(self,c,every=False):
+        # Return the widgets that may take focus under c, or with every
+        # set, all of the widgets that are not containers
         widgets = []
         if c.mywindow:
-            widgets.extend(self._get_widgets(c.mywindow))
+            widgets.extend(self._get_widgets(c.mywindow,every))
         else:
             for w in c.widgets:
                 if isinstance(w,Container):
-                    widgets.extend(self._get_widgets(w))
-                elif not w.disabled and w.focusable:
+                    widgets.extend(self._get_widgets(w,every))
+                elif every or (not w.disabled and w.focusable):
                     widgets.append(w)
         return widgets
 
+    def _get_rects(self,c):
+        # Return the rects that the absolute rects of the widgets under c
+        # depend on: those of c, and of each widget and container under it
+        rects = [c, c.rect, c._rect_content]
+        if c.mywindow:
+            rects.extend(self._get_rects(c.mywindow))
+        else:
+            for w in c.widgets:
+                if isinstance(w,Container):
+                    rects.extend(self._get_rects(w))
+                else:
+                    rects.append(w)
+                    rects.append(w.rect)
+        return rects
+
     def remove(self,w):
         """Remove a widget from the container."""
         self.blur(w)
         self.widgets.remove(w)
+        if pguglobals.app: pguglobals.app._unretain(w)
         #self.repaint()
         self.chsize()
 
@@ -447,3 +542,43 @@ class Container(widget.Widget):
                 if (tmp): return tmp
         return None
 
+
+def _collides(w):
+    # Whether w uses the plain rect collision of Widget
+    if 'collidepoint' in w.__dict__: return False
+    f = type(w).collidepoint
+    return getattr(f, '__func__', f) is _widget_collidepoint
+
+_widget_collidepoint = getattr(widget.Widget.collidepoint, '__func__',
+                               widget.Widget.collidepoint)
+
+def _copy_rect(r):
+    # Return a copy of r if it is a rect, otherwise r
+    if isinstance(r, pygame.Rect): return pygame.Rect(r)
+    return r
+
+def _grid(items, centers=False):
+    # Return (grid, always, bounds) for a list of (n, widget, rect).  The
+    # grid maps each (x, y) cell to the items whose rect overlaps it, or
+    # with centers set, whose rect's centre is in it.  Items that do their
+    # own collision testing are put in always instead.
+    grid = {}
+    always = []
+    minx = miny = maxx = maxy = 0
+    for item in items:
+        n, w, r = item
+        if not centers and not _collides(w):
+            always.append(item)
+            continue
+        if centers:
+            x0 = x1 = r.centerx // _CELL
+            y0 = y1 = r.centery // _CELL
+        else:
+            x0, x1 = r.left // _CELL, (r.right-1) // _CELL
+            y0, y1 = r.top // _CELL, (r.bottom-1) // _CELL
+        minx, miny = min(minx, x0), min(miny, y0)
+        maxx, maxy = max(maxx, x1), max(maxy, y1)
+        for y in range(y0, y1+1):
+            for x in range(x0, x1+1):
+                grid.setdefault((x, y), []).append(item)
+    return grid, always, (minx, miny, maxx, maxy)
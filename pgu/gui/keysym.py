@@ -5,6 +5,7 @@ from pygame.locals import *
 
 from .const import *
 from . import widget
+from .. import text
 
 class Keysym(widget.Widget):
     """A keysym input. This is deprecated and is scheduled to be removed from PGU."""
@@ -44,7 +45,7 @@ class Keysym(widget.Widget):
         for p in pygame.key.name(self.value).split(): name += p.capitalize()+" "
         #r.x = self.style.padding_left;
         #r.y = self.style.padding_bottom;
-        s.blit(self.style.font.render(name, 1, self.style.color), r)
+        s.blit(text.render(self.style.font, name, 1, self.style.color), r)
 
     @property
     def value(self):
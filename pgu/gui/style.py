@@ -33,11 +33,28 @@ class Style(object):
             return False
 
     def __getattr__(self, attr):
-        # Lookup the attribute
+        obj = self.obj
+        theme = pguglobals.app.theme
+        # The resolved attributes of each (cls, pcls) are shared by all the
+        # widgets using them, see Theme.styles
         try:
-            value = pguglobals.app.theme.getstyle(self.obj.cls, self.obj.pcls, attr)
-        except StyleError:
-            value = 0
+            styles = theme.styles
+        except AttributeError:
+            styles = {}
+        key = (obj.cls, obj.pcls)
+        try:
+            resolved = styles[key]
+        except KeyError:
+            resolved = styles[key] = {}
+        try:
+            value = resolved[attr]
+        except KeyError:
+            # Lookup the attribute
+            try:
+                value = theme.getstyle(obj.cls, obj.pcls, attr)
+            except StyleError:
+                value = 0
+            resolved[attr] = value
 
         if attr in (
             'border_top','border_right','border_bottom','border_left',
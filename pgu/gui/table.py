@@ -5,6 +5,7 @@ import sys
 
 from .const import *
 from . import container
+from . import pguglobals
 
 class Table(container.Container):
     """A table style container widget.
@@ -36,6 +37,10 @@ class Table(container.Container):
         self._trok = False
         self._hpadding = params.get("hpadding", 0)
         self._vpadding = params.get("vpadding", 0)
+        self._cells_changed = True
+        self._layout_gen = None
+        self._layout_key = None
+        self._layout_grid = None
 
     def getRows(self):
         return len(self._rows)
@@ -56,6 +61,7 @@ class Table(container.Container):
                 #print 'removing widget'
                 self.widgets.remove(cell["widget"])
         del self._rows[n]
+        self._cells_changed = True
         #print "got here"
 
         for w in self.widgets:
@@ -73,6 +79,7 @@ class Table(container.Container):
         self._rows = []
         self._curRow = 0
         self._trok = False
+        self._cells_changed = True
 
         self.widgets = []
 
@@ -81,6 +88,7 @@ class Table(container.Container):
         #print 'clear', self, self._rows
 
     def _addRow(self):
+        self._cells_changed = True
         self._rows.append([None for x in range(self.getColumns())])
 
     def tr(self):
@@ -93,6 +101,7 @@ class Table(container.Container):
             self._addRow()
 
     def _addColumn(self):
+        self._cells_changed = True
         if not self._rows:
             self._addRow()
         for row in self._rows:
@@ -112,6 +121,7 @@ class Table(container.Container):
         w.style.row = row #HACK - to work with gal's list
         w.style.col = col #HACK - to work with gal's list
         self._rows[row][col] = {"widget":w, "colspan":colspan, "rowspan":rowspan}
+        self._cells_changed = True
         self.widgets.append(self._rows[row][col]["widget"])
 
         #set the spanned columns
@@ -187,34 +197,66 @@ class Table(container.Container):
         for arow in range(row , row + rowspan):
             for acell in range(col, col + colspan): #incorrect?
                 self._rows[arow][acell] = False
+        self._cells_changed = True
         self.widgets.remove(w)
         self.chsize()
 
 
 
     def resize(self, width=None, height=None):
-        #if 1 or self.getRows() == 82:
-            #print ''
-            #print 'resize', self.getRows(), self.getColumns(), width, height
-            #import inspect
-            #for obj, fname, line, fnc, code, n in inspect.stack()[9:20]:
-            #    print fname, line, ':', fnc, code[0].strip()
-
+        # The layout is cached between calls.  Only the cells whose widget
+        # has changed size (see Widget.chsize) are resized again, and only
+        # the rows and columns they are in are measured again.  Adding or
+        # removing cells, or a call to App.chsize, lays out the whole table.
+        gen = getattr(pguglobals.app, '_layout_gen', 0)
+        full = self._cells_changed or gen != self._layout_gen
+        if full:
+            self._cells = []
+            self._spans = []
+            for row in range(self.getRows()):
+                for col in range(self.getColumns()):
+                    cell = self._rows[row][col]
+                    if cell and cell is not True:
+                        self._cells.append((row, col, cell))
+                        if cell["colspan"] > 1 or cell["rowspan"] > 1:
+                            self._spans.append((row, col, cell))
 
         #resize the widgets to their smallest size
-        for w in self.widgets:
-            w.rect.w, w.rect.h = w.resize()
+        resized = []
+        dirtyrows, dirtycols = set(), set()
+        for item in self._cells:
+            row, col, cell = item
+            w = cell["widget"]
+            if full or w._size_dirty:
+                w.rect.w, w.rect.h = size = w.resize()
+                if size != cell.get("size"):
+                    cell["size"] = size
+                    dirtyrows.add(row)
+                    dirtycols.add(col)
+                resized.append(item)
+
+        key = (width, height, self.style.width, self.style.height,
+               self._hpadding, self._vpadding)
+        if not full and not resized and key == self._layout_key:
+            return self._layout_size
 
         #calculate row heights and column widths
-        rowsizes = [0 for y in range(self.getRows())]
-        columnsizes = [0 for x in range(self.getColumns())]
-        for row in range(self.getRows()):
-            for cell in range(self.getColumns()):
-                if self._rows[row][cell] and self._rows[row][cell] is not True:
-                    if not self._rows[row][cell]["colspan"] > 1:
-                        columnsizes[cell] = max(columnsizes[cell], self._rows[row][cell]["widget"].rect.w)
-                    if not self._rows[row][cell]["rowspan"] > 1:
-                        rowsizes[row] = max(rowsizes[row], self._rows[row][cell]["widget"].rect.h)
+        if full:
+            self._rowmax = [0 for y in range(self.getRows())]
+            self._colmax = [0 for x in range(self.getColumns())]
+            dirtyrows = range(self.getRows())
+            dirtycols = range(self.getColumns())
+        for row in dirtyrows:
+            self._rowmax[row] = max([0] + [cell["size"][1]
+                for cell in self._rows[row]
+                if cell and cell is not True and cell["rowspan"] == 1])
+        for col in dirtycols:
+            self._colmax[col] = max([0] + [cells[col]["size"][0]
+                for cells in self._rows
+                if cells[col] and cells[col] is not True and
+                   cells[col]["colspan"] == 1])
+        rowsizes = self._rowmax[:]
+        columnsizes = self._colmax[:]
 
         #distribute extra space if necessary for wide colspanning/rowspanning
         def _table_div(a, b, c):
@@ -222,25 +264,20 @@ class Table(container.Container):
             if r != 0 and (c%b)<r: v += 1
             return v
 
-        for row in range(self.getRows()):
-            for cell in range(self.getColumns()):
-                if self._rows[row][cell] and self._rows[row][cell] is not True:
-                    if self._rows[row][cell]["colspan"] > 1:
-                        columns = range(cell, cell + self._rows[row][cell]["colspan"])
-                        totalwidth = 0
-                        for acol in columns:
-                            totalwidth += columnsizes[acol]
-                        if totalwidth < self._rows[row][cell]["widget"].rect.w:
-                            for acol in columns:
-                                columnsizes[acol] += _table_div(self._rows[row][cell]["widget"].rect.w - totalwidth, self._rows[row][cell]["colspan"], acol)
-                    if self._rows[row][cell]["rowspan"] > 1:
-                        rows = range(row, row + self._rows[row][cell]["rowspan"])
-                        totalheight = 0
-                        for arow in rows:
-                            totalheight += rowsizes[arow]
-                        if totalheight < self._rows[row][cell]["widget"].rect.h:
-                            for arow in rows:
-                                rowsizes[arow] += _table_div(self._rows[row][cell]["widget"].rect.h - totalheight, self._rows[row][cell]["rowspan"], arow)
+        for row, cell, span in self._spans:
+            cw, ch = span["size"]
+            if span["colspan"] > 1:
+                columns = range(cell, cell + span["colspan"])
+                totalwidth = sum(columnsizes[cell:cell + span["colspan"]])
+                if totalwidth < cw:
+                    for acol in columns:
+                        columnsizes[acol] += _table_div(cw - totalwidth, span["colspan"], acol)
+            if span["rowspan"] > 1:
+                rows = range(row, row + span["rowspan"])
+                totalheight = sum(rowsizes[row:row + span["rowspan"]])
+                if totalheight < ch:
+                    for arow in rows:
+                        rowsizes[arow] += _table_div(ch - totalheight, span["rowspan"], arow)
 
         # Now calculate the total width and height occupied by the rows and columns
         rowsizes = [sz+2*self._vpadding for sz in rowsizes]
@@ -260,31 +297,39 @@ class Table(container.Container):
             for n in range(0, len(rowsizes)):
                 rowsizes[n] += rowsizes[n] * amount
 
-        #set the widget's position by calculating their row/column x/y offset
-        cellpositions = [[[sum(columnsizes[0:cell]), sum(rowsizes[0:row])] for cell in range(self.getColumns())] for row in range(self.getRows())]
-        for row in range(self.getRows()):
-            for cell in range(self.getColumns()):
-                if self._rows[row][cell] and self._rows[row][cell] is not True:
-                    x, y = cellpositions[row][cell]
-                    w = sum(columnsizes[cell:cell+self._rows[row][cell]["colspan"]])
-                    h = sum(rowsizes[row:row+self._rows[row][cell]["rowspan"]])
-
-                    widget = self._rows[row][cell]["widget"]
-                    widget.rect.x = x
-                    widget.rect.y = y
-                    if 1 and (w, h) != (widget.rect.w, widget.rect.h):
-#                         if h > 20:
-#                             print widget.widget.__class__.__name__, (widget.rect.w, widget.rect.h), '=>', (w, h)
-                        widget.rect.w, widget.rect.h = widget.resize(w, h)
-
-                    #print self._rows[row][cell]["widget"].rect
+        #the x/y offset of each column/row
+        xs, ys = [0], [0]
+        for sz in columnsizes: xs.append(xs[-1] + sz)
+        for sz in rowsizes: ys.append(ys[-1] + sz)
 
-        #print columnsizes
-        #print sum(columnsizes)
-        #size = sum(columnsizes), sum(rowsizes); print size
+        #if no row or column moved, only the resized cells need placing
+        grid = (columnsizes, rowsizes)
+        if full or grid != self._layout_grid:
+            todo = self._cells
+        else:
+            todo = resized
 
+        #set the widget's position by calculating their row/column x/y offset
+        for row, cell, span in todo:
+            colspan, rowspan = span["colspan"], span["rowspan"]
+            if colspan == 1: w = columnsizes[cell]
+            else: w = sum(columnsizes[cell:cell+colspan])
+            if rowspan == 1: h = rowsizes[row]
+            else: h = sum(rowsizes[row:row+rowspan])
+
+            widget = span["widget"]
+            widget.rect.x = xs[cell]
+            widget.rect.y = ys[row]
+            if (w, h) != (widget.rect.w, widget.rect.h):
+                widget.rect.w, widget.rect.h = widget.resize(w, h)
+
+        self._cells_changed = False
+        self._layout_gen = gen
+        self._layout_key = key
+        self._layout_grid = grid
         #return the tables final size
-        return sum(columnsizes), sum(rowsizes)
+        self._layout_size = xs[-1], ys[-1]
+        return self._layout_size
 
 
 class _Table_td(container.Container):
@@ -1,11 +1,29 @@
 """
 """
+from bisect import bisect_right
+
 import pygame
 from pygame.locals import *
 
 from .const import *
 from . import widget
 
+def _common(a, b, limit, tail=False):
+    # Return how many items (at most limit) the lists a and b have the same
+    # at the start, or the end if tail is set
+    lo, hi = 0, max(limit, 0)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if tail:
+            same = a[len(a) - mid:] == b[len(b) - mid:]
+        else:
+            same = a[:mid] == b[:mid]
+        if same:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
 class TextArea(widget.Widget):
     """A multi-line text input.
 
@@ -15,6 +33,14 @@ class TextArea(widget.Widget):
         w = TextArea("Groucho\nHarpo\nChico\nGummo\nZeppo\n\nMarx", 200, 400, 12)
 
     """
+
+    # The (value, width, font) the lines were last worked out for
+    _lines_key = None
+    # The content area as painted, before the text was drawn on it
+    _bkgr = None
+    # The line the cursor was last drawn on
+    _cursor_line = None
+
     def __init__(self, value="", width = 120, height = 30, size=20, **params):
         params.setdefault('cls', 'input')
         params.setdefault('width', width)
@@ -26,6 +52,9 @@ class TextArea(widget.Widget):
         self.vscroll = 0                # The number of lines that the TextArea is currently scrolled
         self.font = self.style.font        # The font used for rendering the text
         self.cursor_w = 2                 # Cursor width (NOTE: should be in a style)
+        self._rendered = {}               # The rendered lines, by text
+        self._rendered_key = None         # The (font, color) they were rendered with
+        self._dirty = set()               # The lines to draw again in update
         w, h = self.font.size("e"*size)
         if not self.style.height: self.style.height = h
         if not self.style.width: self.style.width = w
@@ -55,45 +84,96 @@ class TextArea(widget.Widget):
         if (self.vpos < self.vscroll):
             self.vscroll = self.vpos
         elif ((self.vpos - self.vscroll + 1) * self.line_h > self.rect.h):
-            self.vscroll = - (self.rect.h / self.line_h - self.vpos - 1)
-
-        # Blit each of the lines in turn
-        cnt = 0
-        for line in self.lines:
+            self.vscroll = - (self.rect.h // self.line_h - self.vpos - 1)
+
+        # Keep the background, so update can draw single lines again
+        self._bkgr = s.copy()
+        self._dirty = set()
+
+        # Blit each of the lines in view in turn.  Only the lines painted
+        # are kept rendered.
+        rendered = self._rendered
+        if self._rendered_key != (self.font, self.style.color):
+            rendered = {}
+        self._rendered = {}
+        self._rendered_key = (self.font, self.style.color)
+        for cnt in range(self.vscroll, len(self.lines)):
             line_pos = (0, (cnt - self.vscroll) * self.line_h)
-            if (line_pos[1] >= 0) and (line_pos[1] < self.rect.h):
-                s.blit( self.font.render(line, 1, self.style.color), line_pos )
-            cnt += 1
+            if line_pos[1] >= self.rect.h:
+                break
+            line = self.lines[cnt]
+            img = rendered.get(line)
+            if img is None:
+                img = self.font.render(line, 1, self.style.color)
+            self._rendered[line] = img
+            s.blit(img, line_pos)
 
         # If the textarea is focused, then also show the cursor
+        self._cursor_line = None
+        if self.container.myfocus is self:
+            r = self.getCursorRect()
+            s.fill(self.style.color, r)
+            self._cursor_line = self.vpos
+
+    def update(self, s):
+        # Draw the lines the cursor moved between again, see _cursor_moved
+        if not self._dirty:
+            return []
+        rects = []
+        bounds = s.get_rect()
+        for cnt in self._dirty:
+            if cnt is None or cnt >= len(self.lines):
+                continue
+            line_pos = (0, (cnt - self.vscroll) * self.line_h)
+            if line_pos[1] < 0 or line_pos[1] >= self.rect.h:
+                continue
+            r = pygame.Rect(line_pos, (s.get_width(), self.line_h)).clip(bounds)
+            s.blit(self._bkgr, r, r)
+            line = self.lines[cnt]
+            img = self._rendered.get(line)
+            if img is None:
+                img = self._rendered[line] = self.font.render(
+                    line, 1, self.style.color)
+            s.blit(img, line_pos)
+            rects.append(r)
+        self._dirty = set()
+
+        self._cursor_line = None
         if self.container.myfocus is self:
             r = self.getCursorRect()
             s.fill(self.style.color, r)
+            self._cursor_line = self.vpos
+        return rects
+
+    def _cursor_moved(self):
+        # Called when only the cursor may have moved.  If the text is as it
+        # was painted and the cursor is still in view, just the line it was
+        # on and the line it is on are drawn again.  Otherwise the whole
+        # TextArea is repainted.
+        if (self._bkgr is None or self._lines_key is None or
+            self._lines_key[0] != self.value):
+            self.repaint()
+            return
+        self.updateCursorPos()
+        if (self.vpos < self.vscroll or
+            (self.vpos - self.vscroll + 1) * self.line_h > self.rect.h):
+            self.repaint()
+            return
+        self._dirty.add(self._cursor_line)
+        self._dirty.add(self.vpos)
+        self.reupdate()
 
     # This function updates self.vpos and self.hpos based on self.pos
     def updateCursorPos(self):
         self.vpos = 0 # Reset the current line that the cursor is on
         self.hpos = 0
 
-        line_cnt = 0
-        char_cnt = 0
-
-        for line in self.lines:
-            line_char_start = char_cnt # The number of characters at the start of the line
-
-            # Keep track of the character count for words
-            char_cnt += len(line)
-
-            # If our cursor count is still less than the cursor position, then we can update our cursor line to assume that it's at least on this line
-            if (char_cnt > self.pos):
-                self.vpos = line_cnt
-                self.hpos = self.pos - line_char_start
-
-                break # Now that we know where our cursor is, we exit the loop
-
-            line_cnt += 1
-
-        if (char_cnt <= self.pos) and (len(self.lines) > 0):
+        # The cursor is on the first line that ends after it
+        line_cnt = bisect_right(self._line_ends, self.pos)
+        if line_cnt < len(self.lines):
+            self.vpos = line_cnt
+            self.hpos = self.pos - (self._line_ends[line_cnt] - len(self.lines[line_cnt]))
+        elif (len(self.lines) > 0):
             self.vpos = len(self.lines) - 1
             self.hpos = len(self.lines[ self.vpos ] )
 
@@ -129,39 +209,105 @@ class TextArea(widget.Widget):
 
     # This function sets the cursor position by the horizontal/vertical cursor position.
     def setCursorByHVPos(self):
-        line_cnt = 0
-        char_cnt = 0
-
-        for line in self.lines:
-            line_char_start = char_cnt # The number of characters at the start of the line
-
-            # Keep track of the character count for words
-            char_cnt += len(line)
-
-            # If we're on the proper line
-            if (line_cnt == self.vpos):
-                # Make sure that we're not trying to go over the edge of the current line
-                if ( self.hpos > len(line) ):
-                    self.hpos = len(line) - 1
-                # Set the cursor position
-                self.pos = line_char_start + self.hpos
-                break    # Now that we've set our cursor position, we exit the loop
-
-            line_cnt += 1
+        if (self.vpos < 0) or (self.vpos >= len(self.lines)):
+            return
+        line = self.lines[self.vpos]
+        # Make sure that we're not trying to go over the edge of the current line
+        if ( self.hpos > len(line) ):
+            self.hpos = len(line) - 1
+        # Set the cursor position
+        self.pos = self._line_ends[self.vpos] - len(line) + self.hpos
 
     # Splits up the text found in the control's value, and assigns it into the lines array
     def doLines(self, max_line_w):
-        self.line_h = 10
-        self.lines = [] # Create an empty starter list to start things out.
-
+        key = (self.value, max_line_w, self.font)
+        if key == self._lines_key:
+            return
+
+        texts = self.value.split('\n')
+        if len(texts) > 1 and not texts[0]:
+            # A line break at the very start is not taken as one
+            texts[0:2] = ['\n' + texts[1]]
+
+        # Each paragraph (the text between hard line breaks) is wrapped on
+        # its own, so only the paragraphs changed since last time need to
+        # be wrapped again, and their lines spliced in
+        if self._lines_key is None or self._lines_key[1:] != key[1:]:
+            old = []
+            self.lines = []
+            self._line_ends = []    # The character count at the end of each line
+            self._first_line = []   # The first line of each paragraph
+            self._wrapped = []      # The lines of each paragraph, see _wrap
+            moved = 0
+        else:
+            old = self._texts
+            moved = len(self.value) - len(self._lines_key[0])
+        # The first and last paragraphs are wrapped differently, so neither
+        # is counted as the same unless it stays first or last
+        n = min(len(old), len(texts))
+        head = _common(old, texts, n - 1)
+        tail = _common(old, texts, n - 1 - head, True)
+        a, b, c = head, len(old) - tail, len(texts) - tail
+
+        # The lines of old paragraphs a to b are replaced by those of new
+        # paragraphs a to c
+        if a < len(old): la = self._first_line[a]
+        else: la = len(self.lines)
+        if b < len(old): lb = self._first_line[b]
+        else: lb = len(self.lines)
+        if la: char_cnt = self._line_ends[la - 1]
+        else: char_cnt = 0
+        last = len(texts) - 1
+        lines = []
+        ends = []
+        first = []
+        wrapped = []
+        for cnt in range(a, c):
+            w = self._wrap(texts[cnt], cnt == 0, cnt == last, max_line_w)
+            wrapped.append(w)
+            first.append(la + len(lines))
+            for line in w[0]:
+                char_cnt += len(line)
+                ends.append(char_cnt)
+            lines.extend(w[0])
+
+        self.lines[la:lb] = lines
+        self._line_ends[la:lb] = ends
+        if moved:
+            rest = self._line_ends[la + len(ends):]
+            self._line_ends[la + len(ends):] = [e + moved for e in rest]
+        self._first_line[a:b] = first
+        if len(lines) != lb - la:
+            d = len(lines) - (lb - la)
+            rest = self._first_line[a + len(first):]
+            self._first_line[a + len(first):] = [f + d for f in rest]
+        self._wrapped[a:b] = wrapped
+        self._texts = texts
+
+        # The line height is from the last text measured
+        self.line_h = self._wrapped[-1][1]
+        self._lines_key = key
+
+    # Returns the lines of one paragraph of the value, wrapped to max_line_w,
+    # and the height of the last text measured
+    def _wrap(self, text, first, last, max_line_w):
+        lines = []
+
+        # Wrap the paragraph as it is in the whole value: after the line
+        # break before it, if there is one, up to the line break after it
         inx = 0
         line_start = 0
+        if not last:
+            text = text + "\n"
+        if not first:
+            text = "\n" + text
+            line_start = 1
         while inx >= 0:
             # Find the next breakable whitespace
             # HACK: Find a better way to do this to include tabs and system characters and whatnot.
             prev_word_start = inx # Store the previous whitespace
-            spc_inx = self.value.find(' ', inx+1)
-            nl_inx = self.value.find('\n', inx+1)
+            spc_inx = text.find(' ', inx+1)
+            nl_inx = text.find('\n', inx+1)
 
             if (min(spc_inx, nl_inx) == -1):
                 inx = max(spc_inx, nl_inx)
@@ -169,33 +315,33 @@ class TextArea(widget.Widget):
                 inx = min(spc_inx, nl_inx)
 
             # Measure the current line
-            lw, self.line_h = self.font.size( self.value[ line_start : inx ] )
+            lw, line_h = self.font.size( text[ line_start : inx ] )
 
             # If we exceeded the max line width, then create a new line
             if (lw > max_line_w):
                 #Fall back to the previous word start
-                self.lines.append(self.value[ line_start : prev_word_start + 1 ])
+                lines.append(text[ line_start : prev_word_start + 1 ])
                 line_start = prev_word_start + 1
                 # TODO: Check for extra-long words here that exceed the length of a line, to wrap mid-word
 
             # If we reached the end of our text
             if (inx < 0):
                 # Then make sure we added the last of the line
-                if (line_start < len( self.value ) ):
-                    self.lines.append( self.value[ line_start : len( self.value ) ] )
+                if (line_start < len( text ) ):
+                    lines.append( text[ line_start : len( text ) ] )
                 else:
-                    self.lines.append('')
-            # If we reached a hard line break
-            elif (self.value[inx] == "\n"):
+                    lines.append('')
+            # If we reached the hard line break at the end of the paragraph
+            elif (text[inx] == "\n"):
                 # Then make a line break here as well.
-                newline = self.value[ line_start : inx + 1 ]
+                newline = text[ line_start : inx + 1 ]
                 newline = newline.replace("\n", " ") # HACK: We know we have a newline character, which doesn't print nicely, so make it into a space. Comment this out to see what I mean.
-                self.lines.append( newline )
-
-                line_start = inx + 1
+                lines.append( newline )
+                break
             else:
                 # Otherwise, we just continue progressing to the next space
                 pass
+        return lines, line_h
 
     def _setvalue(self, v):
         self.__dict__['value'] = v
@@ -258,10 +404,10 @@ class TextArea(widget.Widget):
                         self.pos += len(c)
                 except: #ignore weird characters
                     pass
-            self.repaint()
+            self._cursor_moved()
         elif e.type == MOUSEBUTTONDOWN:
             self.setCursorByXY(e.pos)
-            self.repaint()
+            self._cursor_moved()
 
         elif e.type == FOCUS:
             self.repaint()
@@ -3,6 +3,10 @@
 """
 """
 import os, re
+import json
+from collections import OrderedDict
+import struct
+import zlib
 import pygame
 
 try:
@@ -28,6 +32,9 @@ class Theme(object):
 
     # Image extensions automatically recognized by the theme class
     image_extensions = (".gif", ".jpg", ".bmp", ".png", ".tga")
+    # The most pixels of rendered boxes to keep, see Theme.render.  At 32
+    # bits a pixel the default is 8MB.  Set it to 0 to turn the cache off.
+    max_box_pixels = 2*1024*1024
 
     def __init__(self, dirs='default'):
         """Theme constructor.
@@ -46,6 +53,15 @@ class Theme(object):
         self.config = {}
         self._loaded = []
         self.cache = {}
+        # Image file name -> (size, mode, bundle data, offset, length) of
+        # the images in theme bundles
+        self._pixels = {}
+        # (cls, pcls) -> {attr: value} of the styles looked up by widgets
+        self.styles = {}
+        # (box, w, h) -> the rendered box, least recently used first
+        self._boxes = OrderedDict()
+        self._box_pixels = 0
+        self.box_hits = self.box_misses = 0
         self._preload(dirs)
         pygame.font.init()
 
@@ -58,70 +74,52 @@ class Theme(object):
             self._loaded.append(d)
 
     def _load(self, name):
-        #theme_dir = themes[name]
-
-        #try to load the local dir, or absolute path
-        dnames = [name]
-
-        #if the package isn't installed and people are just
-        #trying out the scripts or examples
-        dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "data", "themes", name))
-
-        #if the package is installed, and the package is installed
-        #in /usr/lib/python2.3/site-packages/pgu/
-        #or c:\python23\lib\site-packages\pgu\
-        #the data is in ... lib/../share/ ...
-        dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "share", "pgu", "themes", name))
-        dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "..", "share", "pgu", "themes", name))
-        dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "share", "pgu", "themes", name))
-        for dname in dnames:
-            if os.path.isdir(dname): break
-
-        if not os.path.isdir(dname):
-            raise Exception('could not find theme '+name)
-
-        # Normalize the path to make it look nicer (gets rid of the ..'s)
-        dname = os.path.normpath(dname)
-
-        # Try parsing the theme in the custom txt file format
-        fname = os.path.join(dname, "config.txt")
-        if os.path.isfile(fname):
-            try:
-                f = open(fname)
-                for line in f.readlines():
-                    args = line.strip().split()
-
-                    if len(args) < 3:
-                        continue
+        # Loading may change how any style resolves
+        self.styles.clear()
+        self.cache.clear()
 
-                    pcls = ""
-                    (cls, attr, vals) = (args[0], args[1], args[2:])
-                    if (":" in cls):
-                        (cls, pcls) = cls.split(":")
+        dname = _find_dir(name)
 
-                    self.config[cls, pcls, attr] = (dname, vals)
-            finally:
-                f.close()
+        # Use the compiled bundle, if there is one and it is up to date
+        if _bundle_fresh(dname):
+            self._load_bundle(dname)
             return
 
-        # Try parsing the theme data as an ini file
-        fname = os.path.join(dname, "style.ini")
-        if os.path.isfile(fname):
-            cfg = ConfigParser()
-            f = open(fname, 'r')
-            cfg.readfp(f)
-            for section in cfg.sections():
-                cls = section
-                pcls = ''
-                if cls.find(":")>=0:
-                    cls, pcls = cls.split(":")
-                for attr in cfg.options(section):
-                    vals = cfg.get(section, attr).strip().split()
-                    self.config[cls, pcls, attr] = (dname, vals)
-            return
+        for (cls, pcls, attr, vals) in _read_config(dname):
+            self.config[cls, pcls, attr] = (dname, vals)
 
-        # The folder probably doesn't contain a theme
-        raise IOError("Cannot load theme: missing style.ini or config.txt")
+    def _load_bundle(self, dname):
+        f = open(os.path.join(dname, BUNDLE), 'rb')
+        try:
+            data = f.read()
+        finally:
+            f.close()
+        if len(data) < _BUNDLE_HEADER.size:
+            raise IOError("Cannot load theme bundle: truncated file")
+        (magic, version, size) = _BUNDLE_HEADER.unpack_from(data, 0)
+        if magic != _BUNDLE_MAGIC or version != _BUNDLE_VERSION:
+            raise IOError("Cannot load theme bundle: not a version %d bundle"
+                          % _BUNDLE_VERSION)
+        offset = _BUNDLE_HEADER.size
+        table = json.loads(data[offset:offset+size].decode('utf-8'))
+        offset += size
+
+        for (cls, pcls, attr, vals) in table['config']:
+            self.config[str(cls), str(pcls), str(attr)] = (
+                dname, [str(v) for v in vals])
+        for (fname, w, h, mode, start, length) in table['images']:
+            self._pixels[os.path.join(dname, fname)] = (
+                (w, h), str(mode), data, offset+start, length)
+
+    def warmup(self):
+        """Load every image, font and color in the theme now, rather than
+        the first time a widget uses them."""
+        for (cls, pcls, attr) in list(self.config.keys()):
+            try:
+                self._get(cls, pcls, attr)
+            except (IOError, pygame.error):
+                # A missing file; it is reported if a widget ever uses it
+                pass
 
     def _get(self, cls, pcls, attr):
         key = (cls, pcls, attr)
@@ -136,7 +134,14 @@ class Theme(object):
 
         if (os.path.splitext(vals[0].lower())[1] in self.image_extensions):
             # This is an image attribute
-            v = pygame.image.load(os.path.join(dname, vals[0]))
+            fname = os.path.join(dname, vals[0])
+            if fname in self._pixels:
+                # Already decoded by compile_theme
+                (size, mode, data, start, length) = self._pixels[fname]
+                data = zlib.decompress(data[start:start+length])
+                v = pygame.image.fromstring(data, size, mode)
+            else:
+                v = pygame.image.load(fname)
 
         elif (attr == "color" or attr == "background"):
             # This is a color value
@@ -253,6 +258,7 @@ class Theme(object):
             ttw = left+right
             tth = top+bottom
 
+            natural = (width == None and height == None)
             tilew, tileh = None, None
             if width != None: tilew = width-ttw
             if height != None: tileh = height-tth
@@ -283,8 +289,13 @@ class Theme(object):
             rect.y += (w.style.valign+1)*dy/2
 
             w._rect_content = rect
+            w._size_dirty = False
+            size = (w._rect_margin.w, w._rect_margin.h)
+            if natural:
+                # The size it asks for, see App.chsize
+                w._natural_size = size
 
-            return (w._rect_margin.w, w._rect_margin.h)
+            return size
         return theme_resize
 
 
@@ -339,22 +350,10 @@ class Theme(object):
                 # set before a mouse event is received. In this case we'll ignore the event.
                 return func(e)
 
-            if e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN:
-                sub = pygame.event.Event(e.type, {
-                    'button':e.button,
-                    'pos':(e.pos[0]-rect.x, e.pos[1]-rect.y)})
-            elif e.type == CLICK:
-                sub = pygame.event.Event(e.type, {
-                    'button':e.button,
-                    'pos':(e.pos[0]-rect.x, e.pos[1]-rect.y)})
-            elif e.type == MOUSEMOTION:
-                sub = pygame.event.Event(e.type, {
-                    'buttons':e.buttons,
-                    'pos':(e.pos[0]-rect.x, e.pos[1]-rect.y),
-                    'rel':e.rel})
-            else:
-                sub = e
-            return func(sub)
+            if (e.type == MOUSEBUTTONUP or e.type == MOUSEBUTTONDOWN or
+                e.type == CLICK or e.type == MOUSEMOTION):
+                return widget._relative_event(func, e, rect.x, rect.y)
+            return func(e)
 
         return theme_event
 
@@ -440,6 +439,60 @@ class Theme(object):
 #        destx = x
 #        desty = y
 
+        # Boxes are rendered once for each size and then blitted whole, if
+        # the tiles of the box do not overlap
+        tilew, tileh = int(box.get_width()/3), int(box.get_height()/3)
+        if (self.max_box_pixels and w*h <= self.max_box_pixels and
+                w >= tilew*2 and h >= tileh*2 and
+                (box.get_flags() & pygame.SRCALPHA or box.get_alpha() is None)):
+            key = (box, w, h)
+            img = self._boxes.pop(key, None)
+            if img is None:
+                self.box_misses += 1
+                img = self._render_box(box, w, h)
+                self._box_pixels += w*h
+                while self._box_pixels > self.max_box_pixels:
+                    (_box, bw, bh), _img = self._boxes.popitem(last=False)
+                    self._box_pixels -= bw*bh
+            else:
+                self.box_hits += 1
+            self._boxes[key] = img
+            surf.blit(img, (x, y))
+            return
+
+        self._render_tiles(surf, box, r)
+
+    def _render_box(self, box, w, h):
+        # Return a new surface of box rendered at w, h
+        if box.get_flags() & pygame.SRCALPHA:
+            # Copy the pixels without blending, so the result blends just as
+            # the tiles would
+            img = pygame.Surface((w, h), pygame.SRCALPHA, box)
+            img.fill((0, 0, 0, 0))
+            self._render_tiles(img, box, pygame.Rect(0, 0, w, h),
+                               pygame.BLEND_RGBA_MAX)
+            return img
+        img = pygame.Surface((w, h), 0, box)
+        key = box.get_colorkey()
+        if key is not None:
+            img.fill(key)
+            img.set_colorkey(key)
+        self._render_tiles(img, box, pygame.Rect(0, 0, w, h))
+        return img
+
+    def box_stats(self):
+        """Return a dict of the box cache statistics: hits, misses,
+        hit_rate, and the number of boxes and their pixels cached."""
+        n = self.box_hits + self.box_misses
+        rate = 0.0
+        if n: rate = self.box_hits / float(n)
+        return {'hits': self.box_hits, 'misses': self.box_misses,
+                'hit_rate': rate, 'boxes': len(self._boxes),
+                'pixels': self._box_pixels}
+
+    def _render_tiles(self, surf, box, r, flags=0):
+        x, y, w, h=r.x, r.y, r.w, r.h
+
         # Calculate the size of each tile
         tilew, tileh = int(box.get_width()/3), int(box.get_height()/3)
         xx, yy = x+w, y+h
@@ -451,48 +504,198 @@ class Theme(object):
         src.x, src.y = tilew, tileh
         for dest.y in range(y+tileh, yy-tileh, tileh):
             for dest.x in range(x+tilew, xx-tilew, tilew):
-                surf.blit(box, dest, src)
+                surf.blit(box, dest, src, flags)
 
         # Render the top side of the box
         surf.set_clip(pygame.Rect(x+tilew, y, w-tilew*2, tileh))
         src.x, src.y, dest.y = tilew, 0, y
         for dest.x in range(x+tilew, xx-tilew*2+tilew, tilew):
-            surf.blit(box, dest, src)
+            surf.blit(box, dest, src, flags)
 
         # Render the bottom side
         surf.set_clip(pygame.Rect(x+tilew, yy-tileh, w-tilew*2, tileh))
         src.x, src.y, dest.y = tilew, tileh*2, yy-tileh
         for dest.x in range(x+tilew, xx-tilew*2+tilew, tilew):
-            surf.blit(box, dest, src)
+            surf.blit(box, dest, src, flags)
 
         # Render the left side
         surf.set_clip(pygame.Rect(x, y+tileh, xx, h-tileh*2))
         src.y, src.x, dest.x = tileh, 0, x
         for dest.y in range(y+tileh, yy-tileh*2+tileh, tileh):
-            surf.blit(box, dest, src)
+            surf.blit(box, dest, src, flags)
 
         # Render the right side
         surf.set_clip(pygame.Rect(xx-tilew, y+tileh, xx, h-tileh*2))
         src.y, src.x, dest.x=tileh, tilew*2, xx-tilew
         for dest.y in range(y+tileh, yy-tileh*2+tileh, tileh):
-            surf.blit(box, dest, src)
+            surf.blit(box, dest, src, flags)
 
         # Render the upper-left corner
         surf.set_clip()
         src.x, src.y, dest.x, dest.y = 0, 0, x, y
-        surf.blit(box, dest, src)
+        surf.blit(box, dest, src, flags)
 
         # Render the upper-right corner
         src.x, src.y, dest.x, dest.y = tilew*2, 0, xx-tilew, y
-        surf.blit(box, dest, src)
+        surf.blit(box, dest, src, flags)
 
         # Render the lower-left corner
         src.x, src.y, dest.x, dest.y = 0, tileh*2, x, yy-tileh
-        surf.blit(box, dest, src)
+        surf.blit(box, dest, src, flags)
 
         # Render the lower-right corner
         src.x, src.y, dest.x, dest.y = tilew*2, tileh*2, xx-tilew, yy-tileh
-        surf.blit(box, dest, src)
+        surf.blit(box, dest, src, flags)
+
+
+BUNDLE = "theme.bundle"
+
+_BUNDLE_MAGIC = b'PGUT'
+_BUNDLE_VERSION = 1
+_BUNDLE_HEADER = struct.Struct('<4sHI')
+
+def _find_dir(name):
+    # Return the directory of the named theme
+    #theme_dir = themes[name]
+
+    #try to load the local dir, or absolute path
+    dnames = [name]
+
+    #if the package isn't installed and people are just
+    #trying out the scripts or examples
+    dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "data", "themes", name))
+
+    #if the package is installed, and the package is installed
+    #in /usr/lib/python2.3/site-packages/pgu/
+    #or c:\python23\lib\site-packages\pgu\
+    #the data is in ... lib/../share/ ...
+    dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "share", "pgu", "themes", name))
+    dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..", "..", "share", "pgu", "themes", name))
+    dnames.append(os.path.join(os.path.dirname(__file__), "..", "..", "share", "pgu", "themes", name))
+    for dname in dnames:
+        if os.path.isdir(dname): break
+
+    if not os.path.isdir(dname):
+        raise Exception('could not find theme '+name)
+
+    # Normalize the path to make it look nicer (gets rid of the ..'s)
+    return os.path.normpath(dname)
+
+def _read_config(dname):
+    # Return a list of (cls, pcls, attr, vals) parsed from the theme in dname
+    config = []
+
+    # Try parsing the theme in the custom txt file format
+    fname = os.path.join(dname, "config.txt")
+    if os.path.isfile(fname):
+        try:
+            f = open(fname)
+            for line in f.readlines():
+                args = line.strip().split()
+
+                if len(args) < 3:
+                    continue
+
+                pcls = ""
+                (cls, attr, vals) = (args[0], args[1], args[2:])
+                if (":" in cls):
+                    (cls, pcls) = cls.split(":")
+
+                config.append((cls, pcls, attr, vals))
+        finally:
+            f.close()
+        return config
+
+    # Try parsing the theme data as an ini file
+    fname = os.path.join(dname, "style.ini")
+    if os.path.isfile(fname):
+        cfg = ConfigParser()
+        f = open(fname, 'r')
+        cfg.readfp(f)
+        for section in cfg.sections():
+            cls = section
+            pcls = ''
+            if cls.find(":")>=0:
+                cls, pcls = cls.split(":")
+            for attr in cfg.options(section):
+                vals = cfg.get(section, attr).strip().split()
+                config.append((cls, pcls, attr, vals))
+        return config
+
+    # The folder probably doesn't contain a theme
+    raise IOError("Cannot load theme: missing style.ini or config.txt")
+
+def _bundle_fresh(dname):
+    # Whether dname has a bundle newer than every other file in it
+    fname = os.path.join(dname, BUNDLE)
+    if not os.path.isfile(fname):
+        return False
+    t = os.path.getmtime(fname)
+    for name in os.listdir(dname):
+        if name != BUNDLE and os.path.getmtime(os.path.join(dname, name)) > t:
+            return False
+    return True
+
+def compile_theme(name, out=None):
+    """Compile a theme dir into a single bundle file.
+
+    The bundle holds the parsed config and the decoded pixels of every
+    image the config uses.  Fonts are still loaded from the theme dir.
+    Theme uses a theme.bundle in place of the files in the theme dir as
+    long as it is newer than all of them.
+
+    Whether a bundle pays off depends on the theme: it saves decoding the
+    image files, but costs parsing its table.  Time both with the
+    gui.theme benchmarks (see pgu.bench) before shipping one.  For the
+    bundled themes the difference in load plus warmup is under a
+    millisecond either way.
+
+    Arguments:
+        name -- name or path of the theme dir, as passed to Theme
+        out -- file to write the bundle to, defaults to theme.bundle in
+            the theme dir
+
+    Returns the name of the bundle file.
+
+    """
+    dname = _find_dir(name)
+    if out is None:
+        out = os.path.join(dname, BUNDLE)
+
+    config = _read_config(dname)
+    images = []
+    blocks = []
+    seen = set()
+    offset = 0
+    for (cls, pcls, attr, vals) in config:
+        fname = vals[0]
+        if (os.path.splitext(fname.lower())[1] not in Theme.image_extensions
+                or fname in seen):
+            continue
+        seen.add(fname)
+        if not os.path.isfile(os.path.join(dname, fname)):
+            # Left for Theme to complain about, if it is ever used
+            continue
+        img = pygame.image.load(os.path.join(dname, fname))
+        mode = "RGB"
+        if img.get_flags() & pygame.SRCALPHA or img.get_colorkey() is not None:
+            mode = "RGBA"
+        data = zlib.compress(pygame.image.tostring(img, mode))
+        images.append((fname, img.get_width(), img.get_height(), mode,
+                       offset, len(data)))
+        blocks.append(data)
+        offset += len(data)
+
+    table = json.dumps({'config': config, 'images': images}).encode('utf-8')
+    f = open(out, 'wb')
+    try:
+        f.write(_BUNDLE_HEADER.pack(_BUNDLE_MAGIC, _BUNDLE_VERSION, len(table)))
+        f.write(table)
+        for data in blocks:
+            f.write(data)
+    finally:
+        f.close()
+    return out
 
 
 class Background(widget.Widget):
@@ -12,6 +12,69 @@ class SignalCallback(object):
     func = None
     # The parameters to pass to the function (as a list)
     params = None
+    # The arguments to call the function with, worked out by Widget.connect
+    args = ()
+    # (index, name) of the arguments in args to replace with magic values
+    magic = ()
+
+def _bind_args(func, params):
+    # Work out how to call func for Widget.send, returning the arguments
+    # and a list of (index, name) of those to fill with magic values.
+    # Arguments named _event, _code or _widget get the magic values, the
+    # others are filled from params in order.
+    values = list(params)
+
+    # Attempt to be compatible with previous versions of python
+    try:
+        code = func.__code__
+    except AttributeError:
+        code = getattr(func, 'func_code', None)
+    if (code is None):
+        # Not a python function, so the arguments can't be inspected
+        return tuple(values), ()
+
+    nargs = code.co_argcount
+    names = list(code.co_varnames)[:nargs]
+
+    # If the function is bound to an instance, remove the first argument name. Again
+    # we keep compatibility with older versions of python.
+    if (hasattr(func, "__self__") and hasattr(func.__self__, "__class__") or
+        hasattr(func,'im_class')):
+        names.pop(0)
+
+    args = []
+    magic = []
+    for name in names:
+        if name in ('_event', '_code', '_widget'):
+            magic.append((len(args), name))
+            args.append(None)
+        elif len(values):
+            args.append(values.pop(0))
+        else:
+            break
+    args.extend(values)
+    return tuple(args), tuple(magic)
+
+def _relative_event(func, e, dx, dy):
+    # Call func(e) with the pos of the mouse event e moved by (-dx, -dy), as
+    # the widgets inside a container see it, then move it back.  This saves
+    # making a new event at every level of the widget tree, but means that
+    # the pos of an event changes once the handler returns: handlers that
+    # keep an event must keep a copy (see _copy_event).
+    d = e.dict
+    pos = d['pos']
+    d['pos'] = (pos[0] - dx, pos[1] - dy)
+    try:
+        return func(e)
+    finally:
+        d['pos'] = pos
+
+def _copy_event(e):
+    # Return a copy of the event e if it has a pos, which may be changed
+    # after it is handled, see _relative_event
+    if e is None or 'pos' not in e.dict:
+        return e
+    return pygame.event.Event(e.type, dict(e.dict))
 
 class Widget(object):
     """Base class for all PGU graphical objects.
@@ -42,6 +105,8 @@ class Widget(object):
     container = None
     # Whether this widget has been painted yet
     _painted = False
+    # Whether this widget needs to be resized by its container
+    _size_dirty = True
     # The widget used to paint the background
     background = None
     # ...
@@ -53,6 +118,9 @@ class Widget(object):
     connects = None
     # The area covered by the widget, relative to the parent widget
     rect = None
+    # Whether to keep a copy of the widget as painted, to be blitted instead
+    # of painting it again while nothing in it has changed (see Container)
+    retained = False
 
     def __init__(self, **params):
         """Create a new Widget instance given the style parameters.
@@ -74,6 +142,9 @@ class Widget(object):
             focusable -- True if this widget can receive focus via Tab, etc.
                 (default is True)
             disabled -- True of this widget is disabled (defaults is False)
+            retained -- True to keep a copy of this widget as painted, so a
+                static widget (and everything in it) is painted with one
+                blit (default is False)
             value -- initial value
 
         """
@@ -86,6 +157,7 @@ class Widget(object):
 
         self.focusable = params['focusable']
         self.disabled = params['disabled']
+        if 'retained' in params: self.retained = params['retained']
 
         self.rect = pygame.Rect(params.get('x',0),
                                 params.get('y',0),
@@ -159,6 +231,16 @@ class Widget(object):
     def chsize(self):
         """Signal that this widget has changed its size."""
 
+        # Mark this widget and the containers above it, so that only the
+        # parts of the layout they are in are redone.  Their retained
+        # paintings are out of date.
+        app = pguglobals.app
+        w = self
+        while w is not None:
+            w._size_dirty = True
+            if app: app._unretain(w)
+            w = w.container
+
         if (not self._painted):
             return
 
@@ -166,7 +248,7 @@ class Widget(object):
             return
 
         if (pguglobals.app):
-            pguglobals.app.chsize()
+            pguglobals.app.chsize(self)
 
     def update(self,s):
         """Updates the surface and returns a rect list of updated areas
@@ -262,6 +344,7 @@ class Widget(object):
         cb = SignalCallback()
         cb.func = func
         cb.params = params
+        cb.args, cb.magic = _bind_args(func, params)
         self.connects[code].append(cb)
 
     # Remove signal handlers from the given event code. If func is specified,
@@ -289,36 +372,19 @@ class Widget(object):
         if (not code in self.connects):
             return
         # Trigger all connected signal handlers
+        magic = None
         for cb in self.connects[code]:
-            func = cb.func
-            values = list(cb.params)
-
-            # Attempt to be compatible with previous versions of python
-            try:
-                code = func.__code__
-            except:
-                code = func.func_code
-
-            nargs = code.co_argcount
-            names = list(code.co_varnames)[:nargs]
-
-            # If the function is bound to an instance, remove the first argument name. Again
-            # we keep compatibility with older versions of python.
-            if (hasattr(func, "__self__") and hasattr(func.__self__, "__class__") or
-                hasattr(func,'im_class')):
-                names.pop(0)
-
-            args = []
-            magic = {'_event':event,'_code':code,'_widget':self}
-            for name in names:
-                if name in magic.keys():
-                    args.append(magic[name])
-                elif len(values):
-                    args.append(values.pop(0))
-                else:
-                    break
-            args.extend(values)
-            func(*args)
+            if (not cb.magic):
+                cb.func(*cb.args)
+                continue
+            if (magic is None):
+                # Callbacks are given a copy of the event, so they may keep it
+                magic = {'_event':_copy_event(event),'_code':code,
+                         '_widget':self}
+            args = list(cb.args)
+            for (n, name) in cb.magic:
+                args[n] = magic[name]
+            cb.func(*args)
 
     def _event(self,e):
         if self.disabled: return
@@ -333,6 +399,9 @@ class Widget(object):
         your widget handles TABs or arrow keys, and you don't want those to
         also alter the focus.)
 
+        The pos of a mouse event is only valid until this returns, so to
+        keep an event, keep a copy: pygame.event.Event(e.type, dict(e.dict))
+
         This should be implemented by a subclass.
 
         """
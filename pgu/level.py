@@ -0,0 +1,336 @@
+"""A compact binary level format, with a fast memory-mapped loader.
+
+A level file is a header, a table of layers, the chunks of each layer and a
+table of sprite spawns.  All values are little-endian.
+
+    header  -- magic 'PGUL', version, flags, width, height (in tiles),
+               chunk width, chunk height, number of layers, number of
+               spawns, offset of the spawn table
+    layers  -- for each layer: name (16 bytes), bytes per tile id (1 or 2),
+               compressed (0 or 1), then an (offset, length) index entry for
+               each of its chunks
+    chunks  -- each chunk is its tile ids, row major, zlib compressed if the
+               layer is compressed.  Chunks on the right and bottom edges
+               are clipped to the level.
+    spawns  -- (x, y, code) for each sprite spawn point
+
+Uncompressed layers are exposed straight out of the memory map without
+copying (under python 2 the ids are copied into an array, as mmap does not
+support memoryview there).  Levels saved with a single chunk have a
+contiguous layer which can be handed to a newvid.TileLayer as is.
+
+tga_to_level converts the tga levels used by vid.tga_load_level.
+
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+import pygame
+
+MAGIC = b'PGUL'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sHHIIHHHIQ')
+_LAYER = struct.Struct('<16sBB')
+_INDEX = struct.Struct('<QI')
+_SPAWN = struct.Struct('<iiI')
+
+_TYPECODES = {1: 'B', 2: 'H'}
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+class LevelError(Exception):
+    """Raised when a level file can not be read."""
+    pass
+
+
+class Layer(object):
+    """One layer of a Level.  Create these with Level.
+
+    Attributes:
+        name -- the layer name
+        itemsize -- bytes per tile id
+        compressed -- whether the chunks are zlib compressed
+
+    """
+    def __init__(self, level, name, itemsize, compressed, index):
+        self.level = level
+        self.name = name
+        self.itemsize = itemsize
+        self.compressed = compressed
+        self.index = index
+        self._data = None
+
+    def chunk(self, pos):
+        """Return the tile ids of the chunk at pos (cx, cy), row major."""
+        level = self.level
+        offset, length = self.index[pos[1] * level.chunks[0] + pos[0]]
+        if self.compressed:
+            x, y, w, h = level.chunk_rect(pos)
+            try:
+                data = zlib.decompress(level.map[offset:offset + length])
+            except zlib.error:
+                data = b''
+            if len(data) != w * h * self.itemsize:
+                raise LevelError("layer %s: bad chunk %d, %d" % (
+                        self.name, pos[0], pos[1]))
+            return _ids(data, self.itemsize)
+        return level._view(offset, length, self.itemsize)
+
+    @property
+    def data(self):
+        """All of the tile ids, row major.  This is only a view of the file
+        if the layer is a single uncompressed chunk, otherwise the chunks
+        are copied into an array."""
+        if self._data is not None:
+            return self._data
+        level = self.level
+        if level.chunks == (1, 1):
+            data = self.chunk((0, 0))
+        else:
+            w, h = level.size
+            data = array(_TYPECODES[self.itemsize], [0]) * (w * h)
+            for cy in range(level.chunks[1]):
+                for cx in range(level.chunks[0]):
+                    x, y, cw, ch = level.chunk_rect((cx, cy))
+                    ids = self.chunk((cx, cy))
+                    for row in range(ch):
+                        i = (y + row) * w + x
+                        data[i:i + cw] = array(data.typecode,
+                                ids[row * cw:row * cw + cw])
+        if not self.compressed:
+            self._data = data
+        return data
+
+    def get(self, pos):
+        """Return the tile id at pos (x, y)."""
+        level = self.level
+        cw, ch = level.chunk_size
+        cx, cy = pos[0] // cw, pos[1] // ch
+        x, y, w, h = level.chunk_rect((cx, cy))
+        return self.chunk((cx, cy))[(pos[1] - y) * w + pos[0] - x]
+
+    def rows(self):
+        """Return a list of the rows of the layer."""
+        data = self.data
+        w, h = self.level.size
+        return [data[y * w:y * w + w] for y in range(h)]
+
+
+class Level(object):
+    """A level file opened with a memory map.
+
+    Arguments:
+        fname -- the level file to open
+
+    Attributes:
+        size -- (w, h) of the level in tiles
+        chunk_size -- (w, h) of each chunk in tiles
+        chunks -- (w, h) of the level in chunks
+        layers -- a dict of layer name to Layer
+        layer_names -- the layer names, in file order
+        spawns -- a list of (x, y, code) sprite spawns
+
+    """
+    def __init__(self, fname):
+        self.file = open(fname, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            self.file.close()
+            raise LevelError("%s: empty or unreadable level" % fname)
+        try:
+            self._memory = memoryview(self.map)
+        except TypeError:
+            self._memory = None
+        self._read(fname)
+
+    def _read(self, fname):
+        m = self.map
+        if len(m) < _HEADER.size:
+            raise LevelError("%s: truncated level" % fname)
+        (magic, version, flags, w, h, cw, ch, nlayers, nspawns,
+                spawn_offset) = _HEADER.unpack_from(m, 0)
+        if magic != MAGIC:
+            raise LevelError("%s: not a level file" % fname)
+        if version != VERSION:
+            raise LevelError("%s: unsupported version %d" % (fname, version))
+        if not cw or not ch:
+            raise LevelError("%s: chunks are %dx%d" % (fname, cw, ch))
+        self.size = (w, h)
+        self.chunk_size = (cw, ch)
+        self.chunks = ((w + cw - 1) // cw, (h + ch - 1) // ch)
+        nchunks = self.chunks[0] * self.chunks[1]
+
+        if _HEADER.size + nlayers * (_LAYER.size + nchunks * _INDEX.size) > \
+                len(m):
+            raise LevelError("%s: truncated layer table" % fname)
+        if spawn_offset + nspawns * _SPAWN.size > len(m):
+            raise LevelError("%s: truncated spawn table" % fname)
+
+        self.layers = {}
+        self.layer_names = []
+        offset = _HEADER.size
+        for n in range(nlayers):
+            name, itemsize, compressed = _LAYER.unpack_from(m, offset)
+            offset += _LAYER.size
+            name = name.rstrip(b'\0').decode('utf-8')
+            if itemsize not in _TYPECODES:
+                raise LevelError("%s: layer %s has %d byte tile ids" % (
+                        fname, name, itemsize))
+            index = []
+            for i in range(nchunks):
+                entry = _INDEX.unpack_from(m, offset)
+                offset += _INDEX.size
+                pos = i % self.chunks[0], i // self.chunks[0]
+                x, y, rw, rh = self.chunk_rect(pos)
+                if entry[0] + entry[1] > len(m) or (not compressed and
+                        entry[1] != rw * rh * itemsize):
+                    raise LevelError("%s: layer %s has a bad chunk %d, %d" % (
+                            (fname, name) + pos))
+                index.append(entry)
+            self.layers[name] = Layer(self, name, itemsize, compressed, index)
+            self.layer_names.append(name)
+
+        self.spawns = []
+        for n in range(nspawns):
+            self.spawns.append(_SPAWN.unpack_from(m, spawn_offset))
+            spawn_offset += _SPAWN.size
+
+    def _view(self, offset, length, itemsize):
+        if self._memory is None or (itemsize != 1 and _BIG_ENDIAN):
+            return _ids(self.map[offset:offset + length], itemsize)
+        v = self._memory[offset:offset + length]
+        if itemsize != 1:
+            v = v.cast(_TYPECODES[itemsize])
+        return v
+
+    def chunk_rect(self, pos):
+        """Return the (x, y, w, h) of the chunk at pos, in tiles."""
+        cw, ch = self.chunk_size
+        x, y = pos[0] * cw, pos[1] * ch
+        return x, y, min(cw, self.size[0] - x), min(ch, self.size[1] - y)
+
+    def close(self):
+        """Close the level.  Any layer data still in use must be released
+        first."""
+        self.layers = {}
+        if self._memory is not None:
+            self._memory.release()
+        self.map.close()
+        self.file.close()
+
+
+def _ids(data, itemsize):
+    a = array(_TYPECODES[itemsize])
+    if hasattr(a, 'frombytes'):
+        a.frombytes(data)
+    else:
+        a.fromstring(data)
+    if _BIG_ENDIAN:
+        a.byteswap()
+    return a
+
+
+def save_level(fname, size, layers, chunk_size=None, compress=False,
+        spawns=()):
+    """Save a level file.
+
+    Arguments:
+        fname -- the file to save to
+        size -- (w, h) of the level in tiles
+        layers -- a list of (name, ids), where ids is a list of rows or a
+                  flat row major sequence of w*h tile ids (0 to 65535)
+        chunk_size -- (w, h) of each chunk, defaults to the whole level
+        compress -- set to 1 to zlib compress each chunk
+        spawns -- a list of (x, y, code) sprite spawns
+
+    """
+    w, h = size
+    if chunk_size is None:
+        chunk_size = size
+    cw, ch = chunk_size
+    nx, ny = (w + cw - 1) // cw, (h + ch - 1) // ch
+
+    flat = []
+    for name, ids in layers:
+        if len(ids) and hasattr(ids[0], '__len__'):
+            ids = [n for row in ids for n in row]
+        if len(ids) != w * h:
+            raise ValueError("layer %s is not %dx%d" % (name, w, h))
+        flat.append((name, ids))
+
+    table_size = _HEADER.size + len(flat) * (
+            _LAYER.size + nx * ny * _INDEX.size)
+    offset = table_size
+    table = []
+    blocks = []
+    for name, ids in flat:
+        itemsize = 1 if max(ids or [0]) < 256 else 2
+        index = []
+        for cy in range(ny):
+            for cx in range(nx):
+                x, y = cx * cw, cy * ch
+                rw, rh = min(cw, w - x), min(ch, h - y)
+                a = array(_TYPECODES[itemsize])
+                for row in range(y, y + rh):
+                    a.extend(ids[row * w + x:row * w + x + rw])
+                if _BIG_ENDIAN:
+                    a.byteswap()
+                if hasattr(a, 'tobytes'):
+                    data = a.tobytes()
+                else:
+                    data = a.tostring()
+                if compress:
+                    data = zlib.compress(data)
+                index.append((offset, len(data)))
+                blocks.append(data)
+                offset += len(data)
+        table.append((name, itemsize, index))
+
+    f = open(fname, 'wb')
+    try:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, w, h, cw, ch, len(table),
+                len(spawns), offset))
+        for name, itemsize, index in table:
+            f.write(_LAYER.pack(name.encode('utf-8'), itemsize,
+                    1 if compress else 0))
+            for entry in index:
+                f.write(_INDEX.pack(*entry))
+        for data in blocks:
+            f.write(data)
+        for spawn in spawns:
+            f.write(_SPAWN.pack(*spawn))
+    finally:
+        f.close()
+
+
+def tga_to_level(fname, out, chunk_size=None, compress=False):
+    """Convert a tga level to a level file.
+
+    The red, green and blue channels become the 'tiles', 'background' and
+    'codes' layers (see vid.tga_load_level), and every non-zero code is
+    added to the spawn table.
+
+    Arguments:
+        fname -- tga level to convert, or a pygame.Surface
+        out -- the level file to save to
+        chunk_size -- (w, h) of each chunk, defaults to the whole level
+        compress -- set to 1 to zlib compress each chunk
+
+    """
+    if isinstance(fname, pygame.Surface):
+        img = fname
+    else:
+        img = pygame.image.load(fname)
+    w, h = img.get_width(), img.get_height()
+    data = bytearray(pygame.image.tostring(img, 'RGBA'))
+    tlayer, blayer, clayer = data[0::4], data[1::4], data[2::4]
+    spawns = [(i % w, i // w, c) for i, c in enumerate(clayer) if c]
+    save_level(out, (w, h), [('tiles', tlayer), ('background', blayer),
+            ('codes', clayer)], chunk_size, compress, spawns)
@@ -21,18 +21,52 @@ Bible of the same name for historical reasons.)
 import pygame
 from pygame.rect import Rect
 from pygame.locals import *
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from array import array
+import os
 import yaml
 
-PosT = namedtuple('Pos',('x', 'y', 'z'))
+from pgu.level import Level
+
+class PosT(namedtuple('Pos', ('x', 'y', 'z'))):
+    """An (x, y, z) position.  Use Pos to create these."""
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'Pos(x=%r, y=%r, z=%r)' % self
+
+_tuple_new = tuple.__new__
+_interned = {}
+# the most positions Pos will intern
+MAX_INTERNED = 1 << 16
 
-PosL = lambda x, y, z=0: PosT(x, y, z)
 def Pos(*args):
-    if type(args[0]) == PosT:
-        return args[0]
-    if type(args[0]) == tuple:
-        return PosL(*(args[0]))
-    return PosL(*args)
+    """Return a Pos from x, y[, z], a tuple of them, or another Pos.
+
+    Positions are immutable, so integer positions are interned: asking for
+    the same one again returns the same object without allocating.
+
+    """
+    if len(args) == 1:
+        args = args[0]
+        if args.__class__ is PosT:
+            return args
+        if args.__class__ is not tuple:
+            args = tuple(args)
+    for n in args:
+        if n.__class__ is not int:
+            if len(args) == 2:
+                return _tuple_new(PosT, (args[0], args[1], 0))
+            return _tuple_new(PosT, args)
+    p = _interned.get(args)
+    if p is None:
+        if len(args) == 2:
+            p = _tuple_new(PosT, (args[0], args[1], 0))
+        else:
+            p = _tuple_new(PosT, args)
+        if len(_interned) < MAX_INTERNED:
+            _interned[args] = p
+    return p
 # Iso and Hex use 3 coords, so make this support it by default
 
 
@@ -40,19 +74,30 @@ class GeometryMixin(object):
     """basic geometyr mixin for square/rectangle geometries"""
     def get_pos(self, coords, offset=None):
         """Get a tile index from a pixel coord"""
-        coords = Pos(coords)
+        x, y = coords[0], coords[1]
         if offset is not None:
-            offset = Pos(offset)
-        else:
-            offset =  Pos(0,0)
-        coords = Pos(coords.x + offset.x, coords.y + offset.y)
-        return Pos(coords.x / self.size.x, coords.y / self.size.y)
+            x, y = x + offset[0], y + offset[1]
+        return Pos(x / self.size[0], y / self.size[1])
+
+    def get_pos_many(self, coords, offset=None):
+        """Get a list of tile indexes from a list of pixel coords"""
+        sx, sy = self.size[0], self.size[1]
+        if offset is None:
+            return [Pos(c[0] / sx, c[1] / sy) for c in coords]
+        ox, oy = offset[0], offset[1]
+        return [Pos((c[0] + ox) / sx, (c[1] + oy) / sy) for c in coords]
 
     def dist(self, sprite):
         return max(abs(self.pos.x - sprite.pos.x),
                    abs(self.pos.y - sprite.pos.y),
                    abs(self.pos.z - sprite.pos.z))
 
+    def dist_many(self, sprites):
+        """Return a list of the dist to each of sprites"""
+        x, y, z = self.pos
+        return [max(abs(x - p[0]), abs(y - p[1]), abs(z - p[2]))
+                for p in [s.pos for s in sprites]]
+
 
 class BaseSprite(pygame.sprite.DirtySprite):
     def __init__(self, image, tile_size, size, attributes, pos, *groups):
@@ -60,26 +105,24 @@ class BaseSprite(pygame.sprite.DirtySprite):
         self.tile_size = Pos(tile_size)
         self.size = Pos(size)
         self.pos = Pos(pos)
-        self.old_pos = Pos(self.pos)
+        self.old_pos = self.pos
         self.rect = self.get_surface_pos(pos)
         self.old_rect = Rect(self.rect)
         pygame.sprite.DirtySprite.__init__(self, *groups)
 
     def move(self, pos):
-        self.old_pos = Pos(self.pos)
-        self.pos = Pos(pos)
-        surf_pos = self.get_surface_pos(pos)
-        self.rect = Rect(surf_pos.x, surf_pos.y, self.tile_size.x, self.tile_size.y)
+        self.old_pos = self.pos
+        self.pos = pos = Pos(pos)
+        self.rect = self.get_surface_pos(pos)
         self.old_rect = Rect(self.rect)
-        self.dirty = 1 if self.dirty < 2 else 2
+        if self.dirty < 2:
+            self.dirty = 1
 
     def get_surface_pos(self, pos):
         """Return a position to blit based on the tile coords passed in.
         useful for iso and hex grids."""
-        pos = Pos(pos)
-        top_left = pos.x * self.tile_size[0]
-        top_right = pos.y * self.tile_size[1]
-        return Rect(top_left, top_right, self.tile_size.x, self.tile_size.y)
+        tw, th = self.tile_size[0], self.tile_size[1]
+        return Rect(pos[0] * tw, pos[1] * th, tw, th)
 
 
 class Tile(BaseSprite):
@@ -147,6 +190,11 @@ class TileMap(GeometryMixin, SpriteCollectionMixin):
     def load_map(self, map_file):
         raise NotImplemented
 
+    def update_view(self, view):
+        """Called with the view before each draw.  Returns True if the
+        background needs to be redrawn."""
+        return False
+
     def set_bg(self):
         self.bg_group.draw(self.surface)
         self.layer_group._bgd = self.surface
@@ -162,6 +210,535 @@ class TileMap(GeometryMixin, SpriteCollectionMixin):
         self.surface.blit(tile)
 
 
+class Chunk(object):
+    """A rectangular region of a ChunkedTileMap.
+
+    Attributes:
+        pos -- (cx, cy) chunk coords
+        rect -- the area of the map covered, in tile coords
+        ids -- 2d array of tile ids, indexed [y][x] relative to the chunk
+        sprites -- the Tile sprites created for this chunk
+        dirty -- set once a tile of the chunk has been changed
+
+    """
+    def __init__(self, pos, rect, ids):
+        self.pos = pos
+        self.rect = rect
+        self.ids = ids
+        self.sprites = []
+        self.dirty = False
+
+
+class ChunkCache(object):
+    """A bounded, least recently used cache of map chunks.
+
+    Arguments:
+        load -- load(pos) returns the chunk at chunk coords pos
+        unload -- unload(chunk) is called when a chunk is evicted
+        max_chunks -- the number of chunks to keep resident
+
+    Dirty chunks (see Chunk) are evicted like any other; their changes are
+    lost unless unload keeps them.
+
+    """
+    def __init__(self, load, unload=None, max_chunks=16):
+        self.load = load
+        self.unload = unload
+        self.max_chunks = max_chunks
+        self.chunks = OrderedDict()
+
+    def __contains__(self, pos):
+        return pos in self.chunks
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def get(self, pos):
+        """Return the chunk at pos, loading it if it is not resident.  This
+        may evict other chunks, as require does."""
+        self.require((pos, ))
+        return self.chunks[pos]
+
+    def _touch(self, pos):
+        # load the chunk at pos if needed and make it the most recently used
+        chunks = self.chunks
+        if pos in chunks:
+            chunk = chunks.pop(pos)
+        else:
+            chunk = self.load(pos)
+        chunks[pos] = chunk
+
+    def require(self, positions):
+        """Make the chunks at positions resident, evicting the least recently
+        used chunks that are not required.  Returns a list of the chunks that
+        were loaded or evicted (empty if nothing changed).
+
+        """
+        chunks = self.chunks
+        changed = []
+        for pos in positions:
+            if pos not in chunks:
+                changed.append(pos)
+            self._touch(pos)
+        needed = set(positions)
+        n = len(chunks)
+        for pos in list(chunks.keys()):
+            if n <= self.max_chunks:
+                break
+            if pos in needed:
+                continue
+            self.evict(pos)
+            changed.append(pos)
+            n -= 1
+        return changed
+
+    def evict(self, pos):
+        chunk = self.chunks.pop(pos)
+        if self.unload is not None:
+            self.unload(chunk)
+
+    def clear(self):
+        for pos in list(self.chunks.keys()):
+            self.evict(pos)
+
+
+class ChunkLoaderMixin(object):
+    """Mixin to read a chunked map from disk.
+
+    The map file is a yaml document:
+
+        size: [1024, 1024]      # in tiles
+        tile_size: [16, 16]     # in pixels
+        chunk_size: [32, 32]    # in tiles
+        tiles: tiles.tga        # tile sheet, sliced into tile_size images
+        chunks: level_%d_%d.tga # chunk images, % (cx, cy)
+
+    Each chunk is a tga level (see vid.tga_load_level); the red channel holds
+    the tile id.  Paths are relative to the map file.  split_tga_level will
+    create the chunks from a single tga level.
+
+    Instead of size, chunk_size and chunks the map may name a level file
+    (see level) and optionally which of its layers to use:
+
+        level: world.lvl
+        layer: tiles
+
+    Tiles that are changed are not written to disk.  When a changed chunk
+    is evicted its tile ids are kept in edits, and used in place of the ones
+    on disk when it is loaded again, until another map is loaded.
+
+    Attributes:
+        max_chunks -- the number of chunks to keep resident
+        preload -- how many chunks around the view to load ahead of time
+        edits -- the tile ids of the changed chunks that are not resident,
+                 by chunk coords
+
+    """
+    max_chunks = 16
+    preload = 1
+    layer = None
+
+    def load_map(self, map_file):
+        with open(map_file) as f:
+            data = yaml.safe_load(f)
+        base = os.path.dirname(map_file)
+        self.tile_size = Pos(tuple(data['tile_size']))
+        self.chunks.clear()
+        self.edits = {}
+        if 'level' in data:
+            level = Level(os.path.join(base, data['level']))
+            self.layer = level.layers[data.get('layer', 'tiles')]
+            self.size = Pos(level.size)
+            self.chunk_size = Pos(level.chunk_size)
+        else:
+            self.layer = None
+            self.size = Pos(tuple(data['size']))
+            self.chunk_size = Pos(tuple(data['chunk_size']))
+            self.chunk_path = os.path.join(base, data['chunks'])
+        self.load_tiles(os.path.join(base, data['tiles']))
+
+    def load_tiles(self, fname):
+        """Slice a tile sheet into tile images."""
+        self.tiles = load_tile_sheet(fname, self.tile_size)
+
+    def read_chunk(self, pos):
+        """Return the tile ids of the chunk at pos, as a 2d array."""
+        if self.layer is not None:
+            ids = self.layer.chunk(pos)
+            w = self.layer.level.chunk_rect(pos)[2]
+            return [ids[i:i + w] for i in range(0, len(ids), w)]
+        img = pygame.image.load(self.chunk_path % pos)
+        w, h = img.get_width(), img.get_height()
+        get_at = img.get_at
+        return [[get_at((x, y))[0] for x in range(w)] for y in range(h)]
+
+    def chunk_rect(self, pos):
+        """Return the area covered by the chunk at pos, in tile coords."""
+        cw, ch = self.chunk_size.x, self.chunk_size.y
+        return Rect(pos[0] * cw, pos[1] * ch, cw, ch)
+
+    def chunks_in_view(self, view):
+        """Return the chunk coords needed to display view (in pixels)."""
+        tw, th = self.tile_size.x, self.tile_size.y
+        cw, ch = self.chunk_size.x * tw, self.chunk_size.y * th
+        mx = (self.size.x + self.chunk_size.x - 1) // self.chunk_size.x
+        my = (self.size.y + self.chunk_size.y - 1) // self.chunk_size.y
+        n = self.preload
+        x1 = max(0, view.left // cw - n)
+        y1 = max(0, view.top // ch - n)
+        x2 = min(mx, (view.right - 1) // cw + n + 1)
+        y2 = min(my, (view.bottom - 1) // ch + n + 1)
+        return [(x, y) for y in range(y1, y2) for x in range(x1, x2)]
+
+    def require_view(self, view):
+        """Load the chunks around view.  Returns True if any were loaded or
+        evicted."""
+        self.chunks.max_chunks = self.max_chunks
+        return len(self.chunks.require(self.chunks_in_view(view))) != 0
+
+    def get_chunk(self, pos):
+        """Return the chunk holding pos (in tiles), loading it."""
+        return self.chunks.get((pos[0] // self.chunk_size.x,
+                pos[1] // self.chunk_size.y))
+
+    def get_tile(self, pos):
+        """Return the tile id at pos (in tiles), loading its chunk."""
+        chunk = self.get_chunk(pos)
+        return chunk.ids[pos[1] - chunk.rect.y][pos[0] - chunk.rect.x]
+
+
+class ChunkedTileMap(ChunkLoaderMixin, TileMap):
+    """A TileMap that is streamed from disk a chunk at a time.
+
+    Only the chunks near the view are kept in memory; the rest are loaded as
+    the view approaches them and evicted (their sprites removed from the
+    groups) once more than max_chunks are resident.  See ChunkLoaderMixin
+    for the map file format and how changed tiles are kept.
+
+    The tiles are drawn into the view sized background, so their sprites
+    are only added to groups, not to layer_group or bg_group.  A tile given
+    to set_tile whose image is not one of tiles is drawn as it is until its
+    chunk is evicted.
+
+    """
+    def __init__(self, layer_group, bg_group, map_file=None, *groups):
+        self.chunks = ChunkCache(self.load_chunk, self.unload_chunk,
+                self.max_chunks)
+        self.edits = {}
+        self.tile_groups = groups
+        self.view = Rect(0, 0, 0, 0)
+        self.surface = None
+        self._dirty = False
+        TileMap.__init__(self, layer_group, bg_group, map_file, *groups)
+
+    def load_chunk(self, pos):
+        if pos in self.edits:
+            chunk = Chunk(pos, self.chunk_rect(pos), self.edits.pop(pos))
+            chunk.dirty = True
+        else:
+            chunk = Chunk(pos, self.chunk_rect(pos), self.read_chunk(pos))
+        tiles = self.tiles
+        for y, row in enumerate(chunk.ids):
+            for x, n in enumerate(row):
+                chunk.sprites.append(Tile(tiles[n], self.tile_size, Pos(1, 1),
+                        {}, Pos(chunk.rect.x + x, chunk.rect.y + y),
+                        *self.tile_groups))
+        return chunk
+
+    def unload_chunk(self, chunk):
+        if chunk.dirty:
+            self.edits[chunk.pos] = chunk.ids
+        for sprite in chunk.sprites:
+            sprite.kill()
+        chunk.sprites = []
+
+    def update_view(self, view):
+        changed = self.require_view(view)
+        if changed or self._dirty or view != self.view:
+            self.view = Rect(view)
+            self._dirty = False
+            return True
+        return False
+
+    def set_bg(self):
+        view = self.view
+        if self.surface is None or self.surface.get_size() != view.size:
+            self.surface = pygame.Surface(view.size)
+        self.surface.fill((0, 0, 0))
+        blit = self.surface.blit
+        ox, oy = view.x, view.y
+        for chunk in self.chunks.chunks.values():
+            for sprite in chunk.sprites:
+                if view.colliderect(sprite.rect):
+                    blit(sprite.image, (sprite.rect.x - ox, sprite.rect.y - oy))
+        self.layer_group._bgd = self.surface
+
+    def set_tile(self, tile, pos):
+        """Replace the Tile at pos (in tiles) with tile, and its tile id with
+        the index of tile.image in tiles, if it is there."""
+        chunk = self.get_chunk(pos)
+        x, y = pos[0] - chunk.rect.x, pos[1] - chunk.rect.y
+        row = list(chunk.ids[y])
+        i = y * len(row) + x
+        chunk.sprites[i].kill()
+        tile.move(pos)
+        tile.add(*self.tile_groups)
+        chunk.sprites[i] = tile
+        if tile.image in self.tiles:
+            row[x] = self.tiles.index(tile.image)
+            chunk.ids[y] = row
+        chunk.dirty = True
+        self._dirty = True
+
+
+class TileLayer(GeometryMixin):
+    """A background layer drawn straight from an array of tile ids.
+
+    This is a lightweight replacement for a TileMap full of Tile sprites:
+    the layer is a flat, row major array of tile ids and only the tiles
+    inside the view are blitted.  It is drawn into a view sized background
+    surface, which NewVid uses to clear the layer_group, so the whole layer
+    costs the LayeredDirty group nothing.  Use PguSprite for the things that
+    move.
+
+    Arguments:
+        layer_group -- the LayeredDirty group drawn over this layer
+        tiles -- a list of tile images, indexed by tile id
+        tile_size -- (w, h) of a tile in pixels
+        size -- (w, h) of the layer in tiles
+        ids -- optional sequence of w*h tile ids
+
+    """
+    def __init__(self, layer_group, tiles=None, tile_size=(16, 16),
+            size=(0, 0), ids=None):
+        self.layer_group = layer_group
+        self.tiles = tiles if tiles is not None else []
+        self.tile_size = Pos(tuple(tile_size))
+        self.size = Pos(tuple(size))
+        if ids is None:
+            ids = array('H', [0]) * (self.size.x * self.size.y)
+        self.ids = ids
+        self.view = Rect(0, 0, 0, 0)
+        self.surface = None
+        self._dirty = True
+
+    def load_tiles(self, fname):
+        """Slice a tile sheet into tile images."""
+        self.tiles = load_tile_sheet(fname, self.tile_size)
+
+    def load_tga(self, fname):
+        """Load the tile ids from a tga level (see vid.tga_load_level)."""
+        img = pygame.image.load(fname)
+        w, h = img.get_width(), img.get_height()
+        get_at = img.get_at
+        self.size = Pos(w, h)
+        self.ids = array('H', [get_at((x, y))[0]
+                for y in range(h) for x in range(w)])
+        self._dirty = True
+
+    def load_level(self, fname, name='tiles'):
+        """Load the tile ids from a layer of a level file (see level).
+
+        A layer saved as a single uncompressed chunk is used straight out of
+        the memory mapped file; it is copied the first time set is called.
+
+        """
+        level = Level(fname)
+        self.size = Pos(level.size)
+        self.ids = level.layers[name].data
+        self._dirty = True
+
+    def get(self, pos):
+        """Return the tile id at pos (in tiles)."""
+        return self.ids[pos[1] * self.size.x + pos[0]]
+
+    def set(self, pos, n):
+        """Set the tile id at pos (in tiles), redrawing it if it is visible.
+        Tile ids are 0 to 65535."""
+        i = pos[1] * self.size.x + pos[0]
+        if self.ids[i] == n:
+            return
+        self.ids = _writable(self.ids, n)
+        self.ids[i] = n
+        self._draw_tile(pos, n)
+
+    def _draw_tile(self, pos, n):
+        # redraw the tile at pos (in tiles) if it is in view
+        if self.surface is None:
+            return
+        tw, th = self.tile_size.x, self.tile_size.y
+        r = Rect(pos[0] * tw - self.view.x, pos[1] * th - self.view.y, tw, th)
+        if r.colliderect(self.surface.get_rect()):
+            self.surface.blit(self.tiles[n], r)
+            self.layer_group.repaint_rect(r)
+
+    def update_view(self, view):
+        if self._dirty or view != self.view:
+            self.view = Rect(view)
+            self._dirty = False
+            return True
+        return False
+
+    def set_bg(self):
+        view = self.view
+        if self.surface is None or self.surface.get_size() != view.size:
+            self.surface = pygame.Surface(view.size)
+        self.surface.fill((0, 0, 0))
+        self.draw(self.surface, view)
+        self.layer_group._bgd = self.surface
+
+    def get_bg(self):
+        return self.surface
+
+    def visible(self, view, rect=None):
+        """Return the tile rect covered by view (in pixels), clipped to the
+        layer or to rect (in tiles)."""
+        tw, th = self.tile_size.x, self.tile_size.y
+        x1, y1 = view.left // tw, view.top // th
+        x2 = (view.right + tw - 1) // tw
+        y2 = (view.bottom + th - 1) // th
+        if rect is None:
+            rect = Rect(0, 0, self.size.x, self.size.y)
+        return Rect(x1, y1, x2 - x1, y2 - y1).clip(rect)
+
+    def draw(self, surface, view):
+        """Blit the tiles inside view (in pixels) to surface."""
+        r = self.visible(view)
+        self._draw_ids(surface, view, self.ids, self.size.x, r, 0, 0)
+
+    def _draw_ids(self, surface, view, ids, pitch, r, x0, y0):
+        # blit the tiles of r (in map tiles) from ids, where tile x0, y0 is
+        # at index 0 and each row is pitch ids long
+        tiles = self.tiles
+        blit = surface.blit
+        tw, th = self.tile_size.x, self.tile_size.y
+        yy = r.y * th - view.y
+        for y in range(r.y - y0, r.bottom - y0):
+            i = y * pitch + r.x - x0
+            xx = r.x * tw - view.x
+            for n in ids[i:i + r.w]:
+                blit(tiles[n], (xx, yy))
+                xx += tw
+            yy += th
+
+
+class ChunkedTileLayer(ChunkLoaderMixin, TileLayer):
+    """A TileLayer that is streamed from disk a chunk at a time.
+
+    This keeps only the tile ids of the chunks near the view resident; no
+    sprites are created.  See ChunkLoaderMixin for the map file format and
+    how changed tiles are kept.
+
+    """
+    def __init__(self, layer_group, map_file=None):
+        TileLayer.__init__(self, layer_group)
+        self.ids = None
+        self.edits = {}
+        self.chunks = ChunkCache(self.load_chunk, self.unload_chunk,
+                self.max_chunks)
+        if map_file is not None:
+            self.load_map(map_file)
+
+    def load_chunk(self, pos):
+        if pos in self.edits:
+            ids, size = self.edits.pop(pos)
+            chunk = Chunk(pos, self.chunk_rect(pos), ids)
+            chunk.rect.size = size
+            chunk.dirty = True
+            return chunk
+        if self.layer is not None:
+            return Chunk(pos, Rect(self.layer.level.chunk_rect(pos)),
+                    self.layer.chunk(pos))
+        rows = self.read_chunk(pos)
+        ids = array('H', [n for row in rows for n in row])
+        chunk = Chunk(pos, self.chunk_rect(pos), ids)
+        if rows:
+            chunk.rect.size = len(rows[0]), len(rows)
+        return chunk
+
+    def unload_chunk(self, chunk):
+        if chunk.dirty:
+            self.edits[chunk.pos] = chunk.ids, chunk.rect.size
+
+    def get(self, pos):
+        chunk = self.get_chunk(pos)
+        return chunk.ids[(pos[1] - chunk.rect.y) * chunk.rect.w +
+                pos[0] - chunk.rect.x]
+
+    get_tile = get
+
+    def set(self, pos, n):
+        chunk = self.get_chunk(pos)
+        i = (pos[1] - chunk.rect.y) * chunk.rect.w + pos[0] - chunk.rect.x
+        if chunk.ids[i] == n:
+            return
+        chunk.ids = _writable(chunk.ids, n)
+        chunk.ids[i] = n
+        chunk.dirty = True
+        self._draw_tile(pos, n)
+
+    def update_view(self, view):
+        changed = self.require_view(view)
+        return TileLayer.update_view(self, view) or changed
+
+    def draw(self, surface, view):
+        for chunk in self.chunks.chunks.values():
+            r = self.visible(view, chunk.rect)
+            if r.w and r.h:
+                self._draw_ids(surface, view, chunk.ids, chunk.rect.w, r,
+                        chunk.rect.x, chunk.rect.y)
+
+
+def _writable(ids, n):
+    # return ids, or a copy of them, that tile id n can be stored in: ids
+    # from a level file may be read only or hold only bytes
+    if not 0 <= n <= 0xffff:
+        raise ValueError("tile id %r is not between 0 and 65535" % (n, ))
+    if not isinstance(ids, array) or ids.typecode != 'H':
+        ids = array('H', ids)
+    return ids
+
+
+def load_tile_sheet(fname, size):
+    """Slice a tile sheet into a list of tile images.
+
+    Arguments:
+        fname -- image to load
+        size -- (w, h) size of tiles in pixels
+
+    """
+    img = pygame.image.load(fname)
+    if pygame.display.get_surface() is not None:
+        img = img.convert_alpha()
+    tw, th = size[0], size[1]
+    tiles = []
+    for y in range(0, img.get_height(), th):
+        for x in range(0, img.get_width(), tw):
+            tiles.append(img.subsurface((x, y, tw, th)))
+    return tiles
+
+
+def split_tga_level(fname, chunk_size, pattern):
+    """Split a tga level into chunk files for a ChunkedTileMap.
+
+    Arguments:
+        fname -- tga level to split
+        chunk_size -- (w, h) of each chunk in tiles
+        pattern -- file name for each chunk, % (cx, cy)
+
+    Returns the (w, h) size of the level in tiles.
+
+    """
+    img = pygame.image.load(fname)
+    w, h = img.get_width(), img.get_height()
+    cw, ch = chunk_size
+    for cy in range(0, (h + ch - 1) // ch):
+        for cx in range(0, (w + cw - 1) // cw):
+            r = Rect(cx * cw, cy * ch, cw, ch).clip(img.get_rect())
+            pygame.image.save(img.subsurface(r).copy(), pattern % (cx, cy))
+    return w, h
+
+
 class SpriteCollection(SpriteCollectionMixin):
     def __init__(self, layer_group, sprite_group, sprite_file=None, *groups):
         self.layer_group = layer_group
@@ -200,6 +777,10 @@ class NewVid(object):
         self.sprites = SpriteCollection(sprite_file,self.layer_group)
 
     def draw(self, surface, view):
+        if self.map_bg.update_view(view):
+            self.map_bg.set_bg()
+            self.layer_group.repaint_rect(surface.get_rect())
+        self.old_view = Rect(view)
         self.layer_group.clear(surface, self.map_bg.get_bg())
         self.layer_group.draw(surface)
 
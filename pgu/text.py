@@ -1,15 +1,118 @@
-"""A collection of text rendering functions"""
+"""A collection of text rendering functions.
+
+Text is rendered through a shared TextCache, so text drawn again and again
+(such as the score in a HUD) is only rendered by the font once.
+
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache(object):
+    """A cache of rendered text, which keeps the most recently used.
+
+    Arguments:
+        max_pixels -- the most pixels of rendered text to keep; at 32 bits a
+            pixel the default is 4MB.  Set it to 0 to turn the cache off.
+
+    Attributes:
+        hits, misses -- how many renders were found in and missing from the
+            cache
+
+    """
+    def __init__(self, max_pixels=1024*1024):
+        self.max_pixels = max_pixels
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._pixels = 0
+
+    def render(self, font, text, antialias, color, background=None, border=0):
+        """Return font.render(text, antialias, color, background), from the
+        cache if it is there.  The surface is shared, so must not be drawn
+        on.
+
+        With a border, the text is drawn over eight black copies of itself
+        offset by border pixels, and the surface is border pixels larger on
+        each side.
+
+        Text bigger than the whole limit is rendered without being cached.
+
+        """
+        key = (font, _style(font), text, antialias, tuple(color),
+               background is not None and tuple(background), border)
+        img = self._cache.pop(key, None)
+        if img is None:
+            self.misses += 1
+            if border:
+                img = self._bordered(font, text, antialias, color, border)
+            elif background is None:
+                img = font.render(text, antialias, color)
+            else:
+                img = font.render(text, antialias, color, background)
+            w, h = img.get_size()
+            if w*h > self.max_pixels:
+                return img
+            self._pixels += w*h
+            while self._pixels > self.max_pixels:
+                _key, _img = self._cache.popitem(last=False)
+                w, h = _img.get_size()
+                self._pixels -= w*h
+        else:
+            self.hits += 1
+        self._cache[key] = img
+        return img
+
+    def _bordered(self, font, text, antialias, color, border):
+        tmp = font.render(text, antialias, (0, 0, 0))
+        w, h = tmp.get_size()
+        img = pygame.Surface((w+border*2, h+border*2), pygame.SRCALPHA)
+        for dx, dy in _dirs:
+            img.blit(tmp, (border+dx*border, border+dy*border))
+        img.blit(font.render(text, antialias, color), (border, border))
+        return img
+
+    def clear(self):
+        """Empty the cache."""
+        self._cache.clear()
+        self._pixels = 0
+
+    def stats(self):
+        """Return a dict of the cache statistics: hits, misses, hit_rate,
+        and the number of texts and their pixels cached."""
+        n = self.hits + self.misses
+        rate = 0.0
+        if n: rate = self.hits / float(n)
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': rate, 'texts': len(self._cache),
+                'pixels': self._pixels}
+
+
+def _style(font):
+    # Font-like objects, such as fonts.TileFont, have no style to key on
+    if not hasattr(font, 'get_bold'): return None
+    # get_strikethrough is new in pygame 2.0.1
+    strikethrough = getattr(font, 'get_strikethrough', None)
+    return (font.get_bold(), font.get_italic(), font.get_underline(),
+            strikethrough and strikethrough())
+
+# The offsets of the copies that make up a border
+_dirs = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+# The cache used by these functions and the gui
+cache = TextCache()
+
+
+def render(font, text, antialias, color, background=None, border=0):
+    """Render text with the shared cache, see TextCache.render."""
+    return cache.render(font, text, antialias, color, background, border)
 
 def write(s, font, pos, color, text, border=1):
     """Write text to a surface with a black border"""
-    # Render the text in black, at various offsets to fake a border
-    tmp = font.render(text, 1, (0, 0, 0))
-    dirs = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-    for dx, dy in dirs:
-        s.blit(tmp, (pos[0]+dx*border, pos[1]+dy*border))
-    # Now render the text properly, in the proper color
-    tmp = font.render(text, 1, color)
-    s.blit(tmp, pos)
+    # The text and its border are rendered once, onto one surface
+    tmp = render(font, text, 1, color, border=border)
+    s.blit(tmp, (pos[0]-border, pos[1]-border))
 
 def writec(s, font, color, text, border=1):
     """Write centered text to a surface with a black border"""
@@ -23,12 +126,12 @@ def writepre(s, font, rect, color, text):
     """Write preformatted text on a pygame surface"""
     r, c, txt = rect, color, text
     txt = txt.replace("\t", "        ")
-    tmp = font.render(" ", 1, c)
+    tmp = render(font, " ", 1, c)
     sw, sh = tmp.get_size()
     y = r.top
     for sentence in txt.split("\n"):
         x = r.left
-        tmp = font.render(sentence, 1, c)
+        tmp = render(font, sentence, 1, c)
         s.blit(tmp, (x, y))
         y += sh
 
@@ -42,7 +145,7 @@ def writewrap(s, font, rect, color, text, maxlines=None, wrapchar=False):
     """
     r, c, txt = rect, color, text
     txt = txt.replace("\t", " "*8)
-    tmp = font.render(" ", 1, c)
+    tmp = render(font, " ", 1, c)
     sw, sh = tmp.get_size()
     y = r.top
     row = 1
@@ -57,7 +160,7 @@ def writewrap(s, font, rect, color, text, maxlines=None, wrapchar=False):
         for word in words:
             if (not wrapchar):
                 word += " "
-            tmp = font.render(word, 1, c)
+            tmp = render(font, word, 1, c)
             (iw, ih) = tmp.get_size()
             if (x+iw > r.right):
                 x = r.left
@@ -1,8 +1,35 @@
 """A timer for games with set-rate FPS.
 """
 
+import math
 import pygame
 import time
+from array import array
+
+# A monotonic, high resolution clock where python has one
+_now = getattr(time, 'perf_counter', time.time)
+
+def wait_until(t, spin=0.002):
+    """Wait until the time _now() reaches t.
+
+    Sleeps for all but the last spin seconds, which are busy-waited, since
+    sleeping can overshoot by a millisecond or more.
+
+    """
+    left = t - _now()
+    if left > spin:
+        time.sleep(left - spin)
+    while _now() < t:
+        pass
+
+
+def percentile(v, p):
+    """Return the p'th percentile (0 to 100) of the sorted list v, by the
+    nearest rank method.  Returns 0.0 if v is empty."""
+    n = len(v)
+    if not n:
+        return 0.0
+    return v[max(0, min(n-1, int(math.ceil(p*n/100.0)) - 1))]
 
 
 class Clock(object):
@@ -21,31 +48,31 @@ class Clock(object):
     speed = 1
 
     def __init__(self):
-        #self.startTime = time.time()
+        #self.startTime = _now()
         self.lastGameTime = 0
         self.lastTickTime = 0
-        self.lastRealTime = time.time()
-        self.startTime = time.time()
+        self.lastRealTime = _now()
+        self.startTime = _now()
 
     # Set the rate at which this clock ticks relative to the real clock
     def set_speed(self, n):
         assert(n >= 0)
         self.lastGameTime = self.get_time()
-        self.lastRealTime = time.time()
+        self.lastRealTime = _now()
         self.speed = n
 
     # Pause the clock
     def pause(self):
         if (not self.paused):
             self.lastGameTime = self.get_time()
-            self.lastRealTime = time.time()
+            self.lastRealTime = _now()
             self.paused = True
 
     # Resume the clock
     def resume(self):
         if (self.paused):
             self.paused = False
-            self.lastRealTime = time.time()
+            self.lastRealTime = _now()
 
     def tick(self, fps=0):
         tm = self.get_time()
@@ -53,7 +80,7 @@ class Clock(object):
         if (fps > 0):
             minTime = 1.0/fps
             if (dt < minTime):
-                pygame.time.wait(int((minTime-dt)*1000))
+                wait_until(_now()+minTime-dt)
                 dt = minTime
         self.lastTickTime = tm
         return dt
@@ -63,26 +90,86 @@ class Clock(object):
     def get_time(self):
         if (self.paused):
             return self.lastGameTime
-        return self.speed*(time.time()-self.lastRealTime) + self.lastGameTime
+        return self.speed*(_now()-self.lastRealTime) + self.lastGameTime
 
     def get_real_time(self):
-        return (time.time()-self.startTime)
+        return (_now()-self.startTime)
 
 
 class Timer(object):
-    """A timer for games with set-rate FPS."""
+    """A timer for games with set-rate FPS.
 
-    def __init__(self,fps):
+    Arguments:
+        fps -- the frame rate to run at, or 0 to not wait at all
+        precise -- set to 1 to pace frames with a high resolution clock,
+            sleeping and then busy-waiting the last spin seconds of each
+            frame, rather than waiting in whole milliseconds
+        spin -- seconds to busy-wait at the end of each frame when precise
+
+    Attributes (when precise):
+        drift -- total seconds that frames have started late
+        frames -- number of frames timed
+
+    """
+
+    def __init__(self,fps,precise=False,spin=0.002):
         if fps == 0:
             self.tick = self._blank
             return
-        self.wait = 1000/fps
+        if precise:
+            self.tick = self._precise_tick
+            self.period = 1.0/fps
+            self.spin = spin
+            self.reset_stats()
+            self.nt = _now()+self.period
+            return
+        self.wait = 1000//fps
         self.nt = pygame.time.get_ticks()
         pygame.time.wait(0)
 
     def _blank(self):
         pass
 
+    def _precise_tick(self):
+        if _now() < self.nt:
+            wait_until(self.nt,self.spin)
+            now = _now()
+            self.drift += now-self.nt
+            self.nt += self.period
+        else:
+            #we are running behind, so don't try to catch up
+            now = _now()
+            self.drift += now-self.nt
+            self.nt = now+self.period
+        if self.last is not None:
+            #track the error in each frame's length (Welford's method)
+            err = now-self.last-self.period
+            self.frames += 1
+            d = err-self.mean
+            self.mean += d/self.frames
+            self.m2 += d*(err-self.mean)
+            self.worst = max(self.worst,abs(err))
+        self.last = now
+
+    def reset_stats(self):
+        """Clear the jitter statistics."""
+        self.drift = 0.0
+        self.frames = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.worst = 0.0
+        self.last = None
+
+    def jitter(self):
+        """Return a dict of statistics about frame length errors, in seconds:
+        mean, stddev and max (absolute) error, drift and frames.  Only
+        available when precise."""
+        stddev = 0.0
+        if self.frames > 1:
+            stddev = (self.m2/(self.frames-1))**0.5
+        return {'frames':self.frames, 'mean':self.mean, 'stddev':stddev,
+                'max':self.worst, 'drift':self.drift}
+
     def tick(self):
         """Wait correct amount of time each frame.  Call this once per frame."""
         self.ct = pygame.time.get_ticks()
@@ -96,18 +183,44 @@ class Timer(object):
 class Speedometer(object):
     """A timer replacement that returns out FPS once a second.
 
+    It also keeps the length of the last size frames in a ring buffer, for
+    frame time statistics and hitch detection.
+
+    Arguments:
+        size -- the number of recent frame lengths to keep
+        budget -- a frame longer than this many seconds is a hitch,
+            defaults to 1/30th of a second
+
     Attributes:
         fps -- always set to the current FPS
+        dt -- the length of the last frame in seconds
+        frame -- the number of frames timed
+        hitches -- the number of frames that went over budget
 
     """
-    def __init__(self):
+    def __init__(self,size=240,budget=1.0/30):
         self.frames = 0
         self.st = pygame.time.get_ticks()
         self.fps = 0
+        self.size = size
+        self.budget = budget
+        self.times = array('d',[0.0])*size
+        self.frame = 0
+        self.hitches = 0
+        self.dt = 0.0
+        self.last = None
 
     def tick(self):
         """ Call this once per frame."""
         r = None
+        now = _now()
+        if self.last is not None:
+            self.dt = dt = now-self.last
+            self.times[self.frame % self.size] = dt
+            self.frame += 1
+            if dt > self.budget:
+                self.hitches += 1
+        self.last = now
         self.frames += 1
         self.ct = pygame.time.get_ticks()
         if (self.ct - self.st) >= 1000:
@@ -115,5 +228,78 @@ class Speedometer(object):
             #print "%s: %d fps"%(self.__class__.__name__,self.fps)
             self.frames = 0
             self.st += 1000
-        pygame.time.wait(0) #NOTE: not sure why, but you gotta call this now and again
+            pygame.time.wait(0) #NOTE: not sure why, but you gotta call this now and again
+        return r
+
+    def history(self,window=None):
+        """Return the lengths of the last window frames, oldest first."""
+        n = min(self.frame,self.size)
+        if window is not None:
+            n = min(n,window)
+        times = self.times
+        i = self.frame % self.size
+        return [times[(i-n+j) % self.size] for j in range(n)]
+
+    def stats(self,window=None):
+        """Return a dict of statistics of the last window frames (all that are
+        kept by default), in seconds: min, max, mean, p50, p95, p99 and the
+        number of frames and hitches."""
+        v = sorted(self.history(window))
+        r = {'frames':len(v),'min':0.0,'max':0.0,'mean':0.0,
+            'p50':0.0,'p95':0.0,'p99':0.0,'hitches':0}
+        if not v:
+            return r
+        n = len(v)
+        r['min'],r['max'],r['mean'] = v[0],v[-1],sum(v)/n
+        for p in (50,95,99):
+            r['p%d'%p] = percentile(v,p)
+        r['hitches'] = len([t for t in v if t > self.budget])
         return r
+
+
+class SpeedometerOverlay(object):
+    """An on-screen display of a Speedometer.
+
+    Shows the fps and frame time statistics, which are re-rendered once a
+    second, over a graph of recent frame lengths.  The budget is drawn as a
+    line across the graph, and hitches are drawn in red.
+
+    Arguments:
+        speedometer -- the Speedometer to display
+        font -- a pygame.font.Font, defaults to pygame's default font
+        size -- (w, h) of the overlay in pixels
+
+    """
+    def __init__(self,speedometer,font=None,size=(160,64)):
+        self.speedometer = speedometer
+        if font is None:
+            font = pygame.font.Font(None,16)
+        self.font = font
+        self.surface = pygame.Surface(size)
+        self.text = None
+        self._fps = None
+
+    def paint(self,screen,pos=(0,0)):
+        """Draw the overlay on screen at pos.  Returns the rect drawn."""
+        sp = self.speedometer
+        s = self.surface
+        w,h = s.get_size()
+        if self.text is None or sp.fps != self._fps:
+            self._fps = sp.fps
+            st = sp.stats()
+            self.text = self.font.render('%d fps  p95 %.1fms  max %.1fms' % (
+                sp.fps,st['p95']*1000,st['max']*1000),True,(255,255,255))
+        s.fill((0,0,0))
+        top = self.text.get_height()
+        gh = h-top
+        scale = gh/(2.0*sp.budget)
+        line = pygame.draw.line
+        x = w-1
+        for t in reversed(sp.history(w)):
+            color = (0,192,0)
+            if t > sp.budget: color = (255,0,0)
+            line(s,color,(x,h-1),(x,h-1-min(gh,int(t*scale))))
+            x -= 1
+        line(s,(255,255,0),(0,h-1-gh//2),(w-1,h-1-gh//2))
+        s.blit(self.text,(0,0))
+        return screen.blit(s,pos)
@@ -23,6 +23,8 @@ from pygame.rect import Rect
 from pygame.locals import *
 import math
 
+from pgu.level import Level, save_level
+
 class Sprite(object):
     """The object used for Sprites.
 
@@ -117,6 +119,12 @@ class _Sprites(list):
         v.updated = 1
         self.removed.append(v)
 
+class VidPaintUpdateMixin(object):
+    """Mixin for engines that can not update parts of the screen: update
+    repaints all of it."""
+    def update(self, screen):
+        return self.paint(screen)
+
 class Vid(object):
     """An engine for rendering Sprites and Tiles.
 
@@ -139,7 +147,7 @@ class Vid(object):
     """
 
     def __init__(self):
-        self.tiles = [None for x in xrange(0, 256)]
+        self.tiles = [None for x in range(0, 256)]
         self.sprites = _Sprites()
         self.images = {} #just a store for images.
         self.layers = None
@@ -162,8 +170,8 @@ class Vid(object):
         """
         self.size = size
         w, h = size
-        self.layers = [[[0 for x in xrange(0, w)] for y in xrange(0, h)]
-            for z in xrange(0, 4)]
+        self.layers = [[[0 for x in range(0, w)] for y in range(0, h)]
+            for z in range(0, 4)]
         self.tlayer = self.layers[0]
         self.blayer = self.layers[1]
         if not bg: self.blayer = None
@@ -266,6 +274,45 @@ class Vid(object):
                 img.set_at((x, y), (t, b, c, _a))
         pygame.image.save(img, fname)
 
+    def load_level(self, fname, bg=0):
+        """Load a binary level (see [[level]]).
+
+        Arguments:
+            fname    -- level file to load
+            bg       -- set to 1 if you wish to load the background layer
+
+        """
+        level = Level(fname)
+        self.resize(level.size, bg)
+        for name, layer in (('tiles', self.tlayer),
+                ('background', self.blayer), ('codes', self.clayer)):
+            if layer is None or name not in level.layers:
+                continue
+            for y, row in enumerate(level.layers[name].rows()):
+                layer[y][:] = row.tolist()
+            row = None
+        if 'codes' not in level.layers:
+            for x, y, c in level.spawns:
+                self.clayer[y][x] = c
+        level.close()
+
+    def save_level(self, fname, chunk_size=None, compress=False):
+        """Save a binary level (see [[level]]).  Every non-zero code is
+        also saved in the spawn table.
+
+        Arguments:
+            fname      -- level file to save to
+            chunk_size -- (w, h) of each chunk, defaults to the whole level
+            compress   -- set to 1 to zlib compress each chunk
+
+        """
+        layers = [('tiles', self.tlayer), ('codes', self.clayer)]
+        if self.blayer:
+            layers.insert(1, ('background', self.blayer))
+        spawns = [(x, y, c) for y, row in enumerate(self.clayer)
+                for x, c in enumerate(row) if c]
+        save_level(fname, self.size, layers, chunk_size, compress, spawns)
+
 
 
     def tga_load_tiles(self, fname, size, tdata={}):
@@ -414,23 +461,23 @@ class Vid(object):
                 hits = []
                 ct, cb, cl, cr = rect.top, rect.bottom, rect.left, rect.right
                 #nasty ol loops
-                y = ct/th*th
+                y = ct//th*th
                 while y < cb:
-                    x = cl/tw*tw
-                    yy = y/th
+                    x = cl//tw*tw
+                    yy = y//th
                     while x < cr:
-                        xx = x/tw
+                        xx = x//tw
                         t = tiles[layer[yy][xx]]
                         if (s.groups & t.agroups)!=0:
                             #self.hit(xx, yy, t, s)
-                            d = math.hypot(rect.centerx-(xx*tw+tw/2),
-                                rect.centery-(yy*th+th/2))
+                            d = math.hypot(rect.centerx-(xx*tw+tw//2),
+                                rect.centery-(yy*th+th//2))
                             hits.append((d, t, xx, yy))
 
                         x += tw
                     y += th
 
-                hits.sort()
+                hits.sort(key=lambda hit: hit[0])
                 #if len(hits) > 0: print self.frame, hits
                 for d, t, xx, yy in hits:
                     self.hit(xx, yy, t, s)
@@ -444,22 +491,22 @@ class Vid(object):
                 hits = []
                 ct, cb, cl, cr = rect.top, rect.bottom, rect.left, rect.right
                 #nasty ol loops
-                y = ct/th*th
+                y = ct//th*th
                 while y < cb:
-                    x = cl/tw*tw
-                    yy = y/th
+                    x = cl//tw*tw
+                    yy = y//th
                     while x < cr:
-                        xx = x/tw
+                        xx = x//tw
                         t = tiles[layer[yy][xx]]
                         if (s.groups & t.agroups)!=0:
-                            d = math.hypot(rect.centerx-(xx*tw+tw/2),
-                                rect.centery-(yy*th+th/2))
+                            d = math.hypot(rect.centerx-(xx*tw+tw//2),
+                                rect.centery-(yy*th+th//2))
                             hits.append((d, t, xx, yy))
                             #self.hit(xx, yy, t, s)
                         x += tw
                     y += th
 
-                hits.sort()
+                hits.sort(key=lambda hit: hit[0])
                 #if len(hits) > 0: print self.frame, hits
                 for d, t, xx, yy in hits:
                     self.hit(xx, yy, t, s)
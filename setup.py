@@ -54,7 +54,7 @@ fonts   -- font wrappers, bitmapped fonts
         'author': "Phil Hassey",
         'author_email': "philhassey@yahoo.com",
         'url': 'http://www.imitationpickles.org/pgu/',
-        'packages': ['pgu','pgu.gui'],
+        'packages': ['pgu','pgu.gui','pgu.bench'],
         'classifiers': [
             'Development Status :: 4 - Beta',
             'Intended Audience :: Developers',
@@ -64,7 +64,7 @@ fonts   -- font wrappers, bitmapped fonts
             'Programming Language :: Python',
         ],
         'data_files': installdatafiles,
-    'scripts': ['scripts/tileedit','scripts/leveledit','scripts/tganew','scripts/levelfancy'],
+    'scripts': ['scripts/tileedit','scripts/leveledit','scripts/tganew','scripts/levelfancy','scripts/tga2level','scripts/themebundle'],
     }
     setup(**setup_args)
 
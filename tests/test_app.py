@@ -0,0 +1,98 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+from pygame.locals import *
+
+from pgu import gui
+from pgu.gui.app import coalesce_events
+
+
+def motion(pos, rel, buttons=(0, 0, 0)):
+    return pygame.event.Event(MOUSEMOTION, {'pos': pos, 'rel': rel,
+                                            'buttons': buttons})
+
+
+class CoalesceTest(unittest.TestCase):
+    def test_hover_motion_is_merged(self):
+        r = coalesce_events([motion((1, 1), (1, 1)), motion((3, 2), (2, 1)),
+                             motion((6, 2), (3, 0))])
+        self.assertEqual(len(r), 1)
+        self.assertEqual(r[0].pos, (6, 2))
+        self.assertEqual(r[0].rel, (6, 2))
+
+    def test_drag_motion_is_kept(self):
+        events = [motion((1, 1), (1, 1), (1, 0, 0)),
+                  motion((3, 2), (2, 1), (1, 0, 0)),
+                  motion((6, 2), (3, 0), (1, 0, 0))]
+        self.assertEqual(coalesce_events(events), events)
+
+    def test_press_splits_motion(self):
+        down = pygame.event.Event(MOUSEBUTTONDOWN, {'pos': (3, 2),
+                                                    'button': 1})
+        r = coalesce_events([motion((1, 1), (1, 1)), motion((3, 2), (2, 1)),
+                             down, motion((4, 2), (1, 0), (1, 0, 0)),
+                             motion((5, 2), (1, 0))])
+        self.assertEqual([e.type for e in r],
+                         [MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEMOTION,
+                          MOUSEMOTION])
+        self.assertEqual(r[0].rel, (3, 2))
+
+    def test_resize_keeps_last(self):
+        r = coalesce_events([
+            pygame.event.Event(VIDEORESIZE, {'size': (10, 10), 'w': 10,
+                                             'h': 10}),
+            pygame.event.Event(VIDEORESIZE, {'size': (20, 30), 'w': 20,
+                                             'h': 30})])
+        self.assertEqual(len(r), 1)
+        self.assertEqual(r[0].size, (20, 30))
+
+
+class LoopTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((100, 100))
+        self.app = gui.App()
+        self.widget = gui.Widget(width=100, height=100)
+        self.seen = []
+        self.widget.connect(MOUSEMOTION, self.moved)
+        self.app.init(self.widget, self.screen)
+        pygame.event.clear()
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def moved(self, _event):
+        self.seen.append((_event.pos, _event.buttons))
+
+    def post(self, events):
+        for e in events:
+            pygame.event.post(e)
+
+    def test_loop_merges_hover_and_keeps_drag(self):
+        self.post([motion((10, 10), (1, 1)), motion((20, 10), (10, 0))])
+        self.app.loop()
+        self.assertEqual(self.seen, [((20, 10), (0, 0, 0))])
+        self.seen[:] = []
+        drag = [motion((x, 10), (1, 0), (1, 0, 0)) for x in range(20, 25)]
+        self.post(drag)
+        self.app.loop()
+        self.assertEqual([pos for pos, b in self.seen],
+                         [(x, 10) for x in range(20, 25)])
+
+    def test_event_time_leaves_events_for_next_loop(self):
+        self.app.coalesce = False
+        self.app.event_time = 0
+        self.post([motion((x, 10), (1, 0)) for x in range(10, 13)])
+        self.app.loop()
+        self.assertEqual(len(self.seen), 1)
+        self.app.loop()
+        self.app.loop()
+        self.assertEqual([pos for pos, b in self.seen],
+                         [(10, 10), (11, 10), (12, 10)])
+
+
+if __name__ == '__main__':
+    unittest.main()
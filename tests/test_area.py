@@ -0,0 +1,142 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import gui
+
+
+class Pattern(gui.Widget):
+    def paint(self, s):
+        for y in range(0, self.rect.h, 4):
+            for x in range(0, self.rect.w, 4):
+                s.fill(((x * 3) % 256, (y * 5) % 256, (x + y) % 256),
+                       (x, y, 4, 4))
+
+
+class Block(gui.Widget):
+    def paint(self, s):
+        s.fill((255, 0, 255))
+
+
+class SlideBoxTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((120, 100))
+        self.app = gui.App()
+        self.content = Pattern(width=300, height=300)
+        self.box = gui.SlideBox(self.content, 60, 50)
+        self.top = gui.Container(width=120, height=100)
+        self.top.add(self.box, 10, 20)
+        self.scrolled = []
+        scroll = self.box._scroll
+        def spy(s, rects):
+            self.scrolled.append(scroll(s, rects))
+            return self.scrolled[-1]
+        self.box._scroll = spy
+
+    def start(self):
+        self.app.init(self.top, self.screen)
+        self.app.update(self.screen)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def view(self):
+        r = self.box.get_abs_rect()
+        return pygame.image.tostring(self.screen.subsurface(r), 'RGB')
+
+    def expected(self):
+        s = pygame.Surface((300, 300), 0, self.screen)
+        self.content.paint(s)
+        return pygame.image.tostring(
+            s.subsurface((self.box.offset[0], self.box.offset[1], 60, 50)),
+            'RGB')
+
+    def scroll(self, dx, dy):
+        self.box.offset[0] += dx
+        self.box.offset[1] += dy
+        self.box.reupdate()
+        self.app.update(self.screen)
+
+    def test_scroll_shows_content_at_offset(self):
+        self.start()
+        for dx, dy in ((5, 0), (0, 7), (13, 11), (-4, -9), (60, 0),
+                       (-3, 50), (0, -1)):
+            self.scroll(dx, dy)
+            self.assertEqual(self.view(), self.expected())
+        # Only the moves by less than the view are scrolled in place
+        self.assertEqual(self.scrolled,
+                         [True, True, True, True, False, False, True])
+
+    def test_changed_rects_are_blitted(self):
+        self.start()
+        self.content.paint = lambda s: s.fill((0, 255, 0))
+        self.content.repaint()
+        self.scroll(3, 4)
+        self.assertEqual(self.scrolled, [True])
+        r = self.box.get_abs_rect()
+        self.assertEqual(pygame.image.tostring(
+            self.screen.subsurface(r), 'RGB'), b'\x00\xff\x00' * 60 * 50)
+
+    def test_scroll_does_not_drag_a_widget_painted_over_it(self):
+        self.top.add(Block(width=10, height=10), 30, 40)
+        self.start()
+        self.scroll(5, 5)
+        self.assertEqual(self.scrolled, [False])
+        self.assertEqual(self.view(), self.expected())
+
+    def test_scroll_does_not_drag_a_window_below_the_top(self):
+        self.start()
+        below = gui.Container(width=10, height=10)
+        below.add(Block(width=10, height=10), 0, 0)
+        top = gui.Container(width=10, height=10)
+        top.add(Block(width=10, height=10), 0, 0)
+        self.app.open(below, (30, 40))
+        self.app.open(top, (100, 80))
+        self.app.chsize()
+        self.app.update(self.screen)
+        self.app.update(self.screen)
+        # as after a click outside the windows
+        self.app.focus(self.top)
+        self.scroll(5, 5)
+        self.assertEqual(self.scrolled, [False])
+        self.assertEqual(self.view(), self.expected())
+
+    def test_top_window_is_painted_again_after_a_scroll(self):
+        self.start()
+        top = gui.Container(width=10, height=10)
+        top.add(Block(width=10, height=10), 0, 0)
+        self.app.open(top, (30, 40))
+        self.app.chsize()
+        self.app.update(self.screen)
+        self.app.update(self.screen)
+        self.app.focus(self.top)
+        self.scroll(5, 5)
+        self.assertEqual(self.scrolled, [True])
+        self.assertEqual(pygame.image.tostring(
+            self.screen.subsurface((30, 40, 10, 10)), 'RGB'),
+            b'\xff\x00\xff' * 100)
+        self.app.close(top)
+        self.app.update(self.screen)
+        self.assertEqual(self.view(), self.expected())
+
+    def test_clipped_surface_is_not_scrolled(self):
+        self.start()
+        sub = self.screen.subsurface(self.box.get_abs_rect())
+        sub.set_clip((0, 0, 20, 50))
+        self.box.offset[0] += 5
+        # the theme gives update a new subsurface, so call it directly
+        gui.SlideBox.update(self.box, sub)
+        self.assertEqual(self.scrolled, [False])
+        content = pygame.Surface((300, 300), 0, self.screen)
+        self.content.paint(content)
+        self.assertEqual(
+            pygame.image.tostring(sub.subsurface((0, 0, 20, 50)), 'RGB'),
+            pygame.image.tostring(content.subsurface((5, 0, 20, 50)), 'RGB'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import random
+import unittest
+
+import pygame
+from pygame.locals import *
+
+from pgu import gui
+
+
+class HitIndexTest(unittest.TestCase):
+    # Containers of at least hit_index_min widgets test only the widgets in
+    # the grid cell under the mouse; these check that they find the same
+    # widgets, and move focus to the same one, as testing every widget does
+
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((400, 300))
+        self.rnd = random.Random(5)
+        self.app = gui.App()
+        self.top = gui.Container(width=400, height=300)
+        self.inner = gui.Container(width=200, height=150)
+        self.widgets = []
+        for c, n in ((self.top, 60), (self.inner, 40)):
+            for i in range(n):
+                w = gui.Widget(width=self.rnd.randint(4, 20),
+                        height=self.rnd.randint(4, 20))
+                c.add(w, self.rnd.randrange(c.style.width - 20),
+                        self.rnd.randrange(c.style.height - 20))
+                self.widgets.append(w)
+        self.top.add(self.inner, 150, 100)
+        self.app.init(self.top, self.screen)
+        self.app.update(self.screen)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def points(self, c, n=300):
+        return [(self.rnd.randrange(-10, c.rect.w + 10),
+                 self.rnd.randrange(-10, c.rect.h + 10)) for i in range(n)]
+
+    def check_hits(self, c):
+        self.assertTrue(len(c.widgets) >= c.hit_index_min)
+        for pos in self.points(c):
+            self.assertEqual(
+                [w for w in c._hits(pos) if w.collidepoint(pos)],
+                [w for w in c.widgets if w.collidepoint(pos)])
+
+    def expected_focus(self, w, dx_, dy_):
+        # Where the arrow keys moved the focus to by testing every widget
+        rect = w.get_abs_rect()
+        fx, fy = rect.centerx, rect.centery
+        best = None
+        for n, o in enumerate(self.top._get_widgets(self.app)):
+            if o is w: continue
+            orect = o.get_abs_rect()
+            if dx_ > 0 and orect.left < rect.right: continue
+            if dx_ < 0 and orect.right > rect.left: continue
+            if dy_ > 0 and orect.top < rect.bottom: continue
+            if dy_ < 0 and orect.bottom > rect.top: continue
+            dx, dy = orect.centerx - fx, orect.centery - fy
+            d = (dx * dx + dy * dy, n)
+            if best is None or d < best[:2]: best = d + (o,)
+        return best and best[2]
+
+    def check_focus(self):
+        for w in self.widgets:
+            for d in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                w.focus()
+                expected = self.expected_focus(w, *d)
+                w.container._move_focus(*d)
+                self.assertIs(self.focused(), expected or w)
+
+    def focused(self):
+        w = self.app
+        while isinstance(w, gui.Container):
+            w = w.myfocus
+        return w
+
+    def move(self, n):
+        # Move some widgets by setting their rects, without a layout
+        for w in self.rnd.sample(self.widgets, n):
+            w.rect.x = self.rnd.randrange(w.container.rect.w - w.rect.w)
+            w.rect.y = self.rnd.randrange(w.container.rect.h - w.rect.h)
+
+    def test_hits(self):
+        self.check_hits(self.top)
+        self.check_hits(self.inner)
+        self.move(20)
+        self.check_hits(self.top)
+        self.check_hits(self.inner)
+
+    def test_hits_after_add_and_remove(self):
+        self.check_hits(self.top)
+        w = self.top.widgets[3]
+        self.top.remove(w)
+        self.top.widgets.insert(10, w)
+        self.check_hits(self.top)
+        self.top.widgets[20] = gui.Widget(width=10, height=10)
+        self.top.widgets[20].rect = pygame.Rect(self.top.widgets[21].rect)
+        self.check_hits(self.top)
+
+    def test_click_after_move(self):
+        w = self.top.widgets[0]
+        self.top.event(pygame.event.Event(MOUSEBUTTONDOWN,
+                pos=(1000, 1000), button=1))
+        w.rect.topleft = (396, 296)
+        self.top.event(pygame.event.Event(MOUSEBUTTONDOWN,
+                pos=(398, 298), button=1))
+        self.assertIs(self.top.myfocus, w)
+
+    def test_focus(self):
+        self.check_focus()
+        self.move(20)
+        self.check_focus()
+        self.inner.rect.x += 37
+        self.check_focus()
+
+
+if __name__ == '__main__':
+    unittest.main()
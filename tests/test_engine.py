@@ -0,0 +1,152 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import engine
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Counter(engine.State):
+    def __init__(self, game, value=None):
+        engine.State.__init__(self, game, value)
+        self.loops = 0
+        self.next = None
+
+    def loop(self):
+        self.loops += 1
+        if self.loops == self.value:
+            return self.next
+
+
+class FixedStepTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self._clock = engine._clock
+        engine._clock = self.clock
+        self.game = engine.Game()
+        self.game.step = 0.25
+        self.game.max_steps = 5
+        self.game.accumulator = 0.0
+        self.game._last = self.clock.now
+        self.state = self.game.state = Counter(self.game)
+
+    def tearDown(self):
+        engine._clock = self._clock
+
+    def advance(self, dt):
+        self.clock.now += dt
+        return self.game.fixed_loop()
+
+    def test_steps_and_alpha(self):
+        self.assertEqual(self.advance(0.875), 0)
+        self.assertEqual(self.state.loops, 3)
+        self.assertEqual(self.game.steps, 3)
+        self.assertAlmostEqual(self.game.alpha, 0.5)
+        self.advance(0.125)
+        self.assertEqual(self.state.loops, 4)
+        self.assertAlmostEqual(self.game.alpha, 0.0)
+
+    def test_no_step_yet(self):
+        self.advance(0.125)
+        self.assertEqual(self.state.loops, 0)
+        self.assertEqual(self.game.steps, 0)
+        self.assertAlmostEqual(self.game.alpha, 0.5)
+
+    def test_max_steps_drops_time(self):
+        self.advance(25.0625)
+        self.assertEqual(self.state.loops, 5)
+        self.assertEqual(self.game.steps, 5)
+        self.assertAlmostEqual(self.game.alpha, 0.25)
+        self.advance(0.25)
+        self.assertEqual(self.state.loops, 6)
+
+    def test_state_change_stops_steps(self):
+        self.state.value = 2
+        self.state.next = Counter(self.game)
+        self.assertEqual(self.advance(1.25), 1)
+        self.assertEqual(self.state.loops, 2)
+        self.assertTrue(self.game.state is self.state.next)
+
+    def test_state_change_drops_time_left(self):
+        self.state.value = 2
+        old, new = self.state, Counter(self.game)
+        self.state.next = new
+        self.advance(1.25)
+        # The new state starts without the 0.75s the old one had left
+        self.assertEqual(self.game.accumulator, 0.0)
+        self.assertEqual(self.advance(0.125), 0)
+        self.assertEqual(new.loops, 0)
+        self.advance(0.125)
+        self.assertEqual(new.loops, 1)
+        self.assertEqual(old.loops, 2)
+
+    def test_init_drops_time_left(self):
+        self.advance(0.125)
+        self.game.state = new = Counter(self.game)
+        self.clock.now += 0.125
+        pygame.display.init()
+        self.addCleanup(pygame.display.quit)
+        self.game.screen = pygame.Surface((8, 8))
+        self.game._loop(None)
+        self.assertEqual(self.game.accumulator, 0.0)
+        self.advance(0.125)
+        self.assertEqual(new.loops, 0)
+
+
+class FrameProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self._clock = engine._clock
+        engine._clock = self.clock
+
+    def tearDown(self):
+        engine._clock = self._clock
+
+    def frame(self, prof, times):
+        prof.begin()
+        for name, dt in times:
+            self.clock.now += dt
+            prof.mark(name)
+        prof.end()
+
+    def test_history_is_a_ring(self):
+        prof = engine.FrameProfiler(3)
+        for n in range(1, 6):
+            self.frame(prof, [('loop', n * 0.5), ('paint', 0.25)])
+        self.assertEqual(prof.count, 5)
+        self.assertEqual(prof.history('loop'), [1.5, 2.0, 2.5])
+        self.assertEqual(prof.history('frame'), [1.75, 2.25, 2.75])
+        self.assertEqual(prof.history('event'), [0.0, 0.0, 0.0])
+
+    def test_stats(self):
+        prof = engine.FrameProfiler(100)
+        for n in range(1, 101):
+            self.frame(prof, [('loop', n)])
+        s = prof.stats('loop')
+        self.assertEqual((s['min'], s['max'], s['mean']), (1, 100, 50.5))
+        self.assertEqual((s['p50'], s['p95'], s['p99']), (50, 95, 99))
+        self.assertEqual(prof.percentile(50, 'paint'), 0.0)
+
+    def test_custom_phases_and_hooks(self):
+        prof = engine.FrameProfiler(10)
+        seen = []
+        prof.hooks.append(lambda p: seen.append(p.count))
+        self.frame(prof, [('loop', 1), ('ai', 2), ('ai', 0.5)])
+        self.assertEqual(prof.phases, ['loop', 'paint', 'event', 'tick', 'ai'])
+        self.assertEqual(prof.history('ai'), [2.5])
+        self.assertEqual(seen, [1])
+        self.assertEqual(set(prof.summary()), set(prof.phases + ['frame']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import shutil
+import tempfile
+import unittest
+
+import pygame
+
+from pgu import fonts
+
+
+HINTS = 'abcd'
+
+
+def pixels(s):
+    return pygame.image.tostring(s, 'RGBA')
+
+
+class TileFontTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode((100, 100))
+        self.dir = tempfile.mkdtemp()
+        # A 2x2 sheet of 4x4 tiles, each with a different opaque pattern
+        img = pygame.Surface((8, 8), pygame.SRCALPHA)
+        img.fill((0, 0, 0, 0))
+        for n in range(len(HINTS)):
+            x, y = (n % 2) * 4, (n // 2) * 4
+            img.fill((10, 20, 30, 255), (x + n % 4, y, 1, 4))
+            img.fill((10, 20, 30, 100), (x, y + 3, 4, 1))
+        self.fname = os.path.join(self.dir, 'font.png')
+        pygame.image.save(img, self.fname)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        pygame.display.quit()
+
+    def test_recolor_sets_the_opaque_pixels(self):
+        img = pygame.image.load(self.fname).convert_alpha()
+        want = img.copy()
+        w, h = want.get_size()
+        for y in range(h):
+            for x in range(w):
+                if want.get_at((x, y))[3] > 128:
+                    want.set_at((x, y), (200, 100, 50))
+        fonts._recolor(img, (200, 100, 50))
+        self.assertEqual(pixels(img), pixels(want))
+
+    def test_render(self):
+        f = fonts.TileFont(self.fname, (4, 4), HINTS)
+        s = f.render('abx', 0, (255, 0, 0))
+        self.assertEqual(s.get_size(), (12, 4))
+        # The opaque column of each glyph is in the color
+        self.assertEqual(tuple(s.get_at((0, 0))), (255, 0, 0, 255))
+        self.assertEqual(tuple(s.get_at((5, 1))), (255, 0, 0, 255))
+        self.assertEqual(s.get_at((1, 0))[3], 0)
+        # There is no x, so nothing is drawn for it
+        self.assertEqual(s.get_at((10, 0))[3], 0)
+
+    def test_render_is_cached(self):
+        f = fonts.TileFont(self.fname, (4, 4), HINTS, cache=2)
+        a = f.render('ab', 0, (255, 0, 0))
+        self.assertIs(f.render('ab', 0, [255, 0, 0]), a)
+        self.assertIsNot(f.render('ab', 0, (0, 255, 0)), a)
+        f.render('ba', 0, (255, 0, 0))
+        self.assertEqual(len(f._rendered), 2)
+        self.assertIsNot(f.render('ab', 0, (255, 0, 0)), a)
+
+    def test_glyphs_are_scaled_once(self):
+        f = fonts.TileFont(self.fname, (4, 4), HINTS)
+        f.render('abab', 0, (255, 0, 0))
+        self.assertEqual(len(f.glyphs), 2)
+        f.scale = (8, 8)
+        s = f.render('ab', 0, (255, 0, 0))
+        self.assertEqual(s.get_size(), (16, 8))
+        self.assertEqual(len(f.glyphs), 4)
+        want = pygame.transform.scale(f._glyph('a', (255, 0, 0), (4, 4)),
+                                      (8, 8))
+        self.assertEqual(pixels(s.subsurface((0, 0, 8, 8))), pixels(want))
+
+
+class BorderFontTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((100, 100))
+        self.font = pygame.font.Font(None, 20)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def test_render_is_cached(self):
+        f = fonts.BorderFont(self.font, 2, cache=2)
+        a = f.render('goat', 1, (255, 255, 255))
+        self.assertEqual(a.get_size(), f.size('goat'))
+        self.assertIs(f.render('goat', 1, [255, 255, 255]), a)
+        f.render('goat', 1, (255, 0, 0))
+        f.render('goats', 1, (255, 0, 0))
+        self.assertEqual(len(f._rendered), 2)
+        self.assertIsNot(f.render('goat', 1, (255, 255, 255)), a)
+
+    def test_style_of_the_font_is_part_of_the_key(self):
+        f = fonts.BorderFont(self.font)
+        a = f.render('goat', 1, (255, 255, 255))
+        self.font.set_bold(True)
+        b = f.render('goat', 1, (255, 255, 255))
+        self.assertIsNot(a, b)
+        self.assertEqual(pixels(b), pixels(f._render(
+            'goat', 1, (255, 255, 255), None)))
+        self.font.set_bold(False)
+        self.assertIs(f.render('goat', 1, (255, 255, 255)), a)
+
+
+if __name__ == '__main__':
+    unittest.main()
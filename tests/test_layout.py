@@ -0,0 +1,91 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import gui
+
+
+class RelayoutTest(unittest.TestCase):
+    n = 4
+
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((400, 300))
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def texts(self):
+        return [['cell %d,%d' % (r, c) for c in range(self.n)]
+                for r in range(self.n)]
+
+    def build(self, texts):
+        app = gui.App()
+        table = gui.Table()
+        labels = []
+        for row in texts:
+            table.tr()
+            for text in row:
+                labels.append(gui.Label(text))
+                table.td(labels[-1])
+        side = gui.Label('beside the table')
+        top = gui.Table(width=400, height=300)
+        top.tr()
+        top.td(table)
+        top.td(side)
+        app.init(top, self.screen)
+        app.update(self.screen)
+        return app, table, labels, side
+
+    def layout(self, widgets):
+        return [(w.get_abs_rect(), w.rect.size) for w in widgets]
+
+    def check(self, texts, changes):
+        app, table, labels, side = self.build(texts)
+        for (r, c), text in changes:
+            labels[r * self.n + c].set_text(text)
+            texts[r][c] = text
+        app.update(self.screen)
+        screen = pygame.image.tostring(self.screen, 'RGB')
+        got = self.layout(labels + [table, side])
+
+        app, table, labels, side = self.build(texts)
+        self.assertEqual(got, self.layout(labels + [table, side]))
+        self.assertEqual(screen, pygame.image.tostring(self.screen, 'RGB'))
+
+    def test_grow_a_cell(self):
+        self.check(self.texts(), [((1, 2), 'a much longer cell')])
+
+    def test_shrink_a_cell(self):
+        texts = self.texts()
+        texts[2][1] = 'the widest cell of all'
+        self.check(texts, [((2, 1), 'x')])
+
+    def test_same_size(self):
+        self.check(self.texts(), [((3, 3), 'cell 9,9')])
+
+    def test_several_cells(self):
+        self.check(self.texts(), [((0, 0), 'first'), ((3, 1), 'x' * 20),
+                                  ((0, 3), '')])
+
+    def test_only_the_affected_widgets_are_resized(self):
+        app, table, labels, side = self.build(self.texts())
+        calls = []
+        for w in labels + [table, side, app.widget]:
+            def resize(width=None, height=None, w=w, orig=w.resize):
+                calls.append(w)
+                return orig(width, height)
+            w.resize = resize
+        labels[5].set_text('cell 1,1')
+        app.update(self.screen)
+        self.assertTrue(labels[5] in calls)
+        self.assertFalse(side in calls)
+        self.assertFalse(app.widget in calls)
+        self.assertFalse(labels[0] in calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
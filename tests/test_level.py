@@ -0,0 +1,132 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import shutil
+import struct
+import tempfile
+import unittest
+
+import pygame
+
+from pgu import level, newvid, vid
+
+
+class LevelTest(unittest.TestCase):
+    size = (7, 5)
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dir, 'test.lvl')
+        w, h = self.size
+        self.tiles = [(x * 137 + y) % 1000 for y in range(h) for x in range(w)]
+        self.codes = [(x + y) % 3 for y in range(h) for x in range(w)]
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def save(self, **kw):
+        level.save_level(self.fname, self.size, [('tiles', self.tiles),
+                ('codes', self.codes)], spawns=[(1, 2, 3), (4, 0, 9)], **kw)
+        return level.Level(self.fname)
+
+    def check(self, lvl):
+        self.assertEqual(lvl.size, self.size)
+        self.assertEqual(lvl.layer_names, ['tiles', 'codes'])
+        self.assertEqual(list(lvl.layers['tiles'].data), self.tiles)
+        self.assertEqual(list(lvl.layers['codes'].data), self.codes)
+        self.assertEqual(lvl.layers['tiles'].itemsize, 2)
+        self.assertEqual(lvl.layers['codes'].itemsize, 1)
+        self.assertEqual(lvl.layers['tiles'].get((3, 4)),
+                self.tiles[4 * self.size[0] + 3])
+        self.assertEqual(lvl.spawns, [(1, 2, 3), (4, 0, 9)])
+
+    def test_round_trip(self):
+        lvl = self.save()
+        self.check(lvl)
+        lvl.close()
+
+    def test_round_trip_chunked(self):
+        lvl = self.save(chunk_size=(3, 2))
+        self.assertEqual(lvl.chunks, (3, 3))
+        self.assertEqual(lvl.chunk_rect((2, 2)), (6, 4, 1, 1))
+        self.check(lvl)
+        lvl.close()
+
+    def test_round_trip_compressed(self):
+        lvl = self.save(chunk_size=(3, 2), compress=True)
+        self.check(lvl)
+        lvl.close()
+
+    def test_bad_files(self):
+        with open(self.fname, 'wb') as f:
+            f.write(b'PGUL')
+        self.assertRaises(level.LevelError, level.Level, self.fname)
+        with open(self.fname, 'wb') as f:
+            f.write(b'x' * 100)
+        self.assertRaises(level.LevelError, level.Level, self.fname)
+
+    def test_bad_chunk_index(self):
+        self.save(chunk_size=(3, 2)).close()
+        with open(self.fname, 'r+b') as f:
+            # the length of the first chunk of the first layer
+            f.seek(level._HEADER.size + level._LAYER.size + 8)
+            f.write(struct.pack('<I', 1000))
+        self.assertRaises(level.LevelError, level.Level, self.fname)
+
+    def test_bad_compressed_chunk(self):
+        self.save(chunk_size=(3, 2), compress=True).close()
+        with open(self.fname, 'r+b') as f:
+            f.seek(level._HEADER.size + level._LAYER.size)
+            offset = struct.unpack('<Q', f.read(8))[0]
+            f.seek(offset)
+            f.write(b'junk')
+        lvl = level.Level(self.fname)
+        self.assertRaises(level.LevelError, lvl.layers['tiles'].chunk, (0, 0))
+        lvl.close()
+
+
+class TileLayerTest(unittest.TestCase):
+    def test_set_widens_byte_ids(self):
+        layer = newvid.TileLayer(None, size=(2, 2), ids=level._ids(b'\0' * 4, 1))
+        layer.set((1, 1), 300)
+        self.assertEqual(layer.get((1, 1)), 300)
+        self.assertEqual(list(layer.ids), [0, 0, 0, 300])
+
+    def test_set_rejects_big_ids(self):
+        layer = newvid.TileLayer(None, size=(2, 2))
+        self.assertRaises(ValueError, layer.set, (0, 0), 70000)
+        self.assertRaises(ValueError, layer.set, (0, 0), -1)
+
+
+class VidLevelTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fname = os.path.join(self.dir, 'test.lvl')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def make(self):
+        v = vid.Vid.__new__(vid.Vid)
+        v.size = (3, 2)
+        v.tlayer = [[1, 2, 3], [4, 5, 6]]
+        v.blayer = None
+        v.clayer = [[0, 7, 0], [0, 0, 8]]
+        return v
+
+    def test_save_level_spawns(self):
+        self.make().save_level(self.fname)
+        lvl = level.Level(self.fname)
+        self.assertEqual(lvl.spawns, [(1, 0, 7), (2, 1, 8)])
+        lvl.close()
+
+    def test_round_trip(self):
+        self.make().save_level(self.fname, chunk_size=(2, 2), compress=True)
+        v = vid.Vid()
+        v.load_level(self.fname)
+        self.assertEqual(v.tlayer, [[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(v.clayer, [[0, 7, 0], [0, 0, 8]])
+
+
+if __name__ == '__main__':
+    unittest.main()
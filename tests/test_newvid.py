@@ -0,0 +1,275 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import shutil
+import tempfile
+import unittest
+
+import pygame
+from pygame.rect import Rect
+
+from pgu import level, newvid
+
+
+class PosTest(unittest.TestCase):
+    def setUp(self):
+        self.interned = newvid._interned
+        self.max_interned = newvid.MAX_INTERNED
+        newvid._interned = {}
+
+    def tearDown(self):
+        newvid._interned = self.interned
+        newvid.MAX_INTERNED = self.max_interned
+
+    def test_forms(self):
+        p = newvid.Pos(1, 2)
+        self.assertEqual(p, (1, 2, 0))
+        self.assertEqual((p.x, p.y, p.z), (1, 2, 0))
+        self.assertIs(newvid.Pos((1, 2)), p)
+        self.assertIs(newvid.Pos([1, 2, 0]), newvid.Pos(1, 2, 0))
+        self.assertIs(newvid.Pos(p), p)
+        self.assertEqual(newvid.Pos(1.5, 2), (1.5, 2, 0))
+        self.assertEqual(newvid.Pos((1, 2.5, 3)), (1, 2.5, 3))
+        self.assertEqual(repr(p), 'Pos(x=1, y=2, z=0)')
+
+    def test_interning_is_bounded(self):
+        newvid.MAX_INTERNED = 3
+        ps = [newvid.Pos(x, 0) for x in range(5)]
+        self.assertEqual(len(newvid._interned), 3)
+        for x in range(3):
+            self.assertIs(newvid.Pos(x, 0), ps[x])
+        for x in range(3, 5):
+            p = newvid.Pos(x, 0)
+            self.assertIsNot(p, ps[x])
+            self.assertEqual(p, ps[x])
+        self.assertEqual(len(newvid._interned), 3)
+
+    def test_floats_are_not_interned(self):
+        newvid.Pos(0.5, 1)
+        self.assertEqual(newvid._interned, {})
+
+
+class Thing(newvid.GeometryMixin):
+    def __init__(self, pos, size=(16, 8)):
+        self.pos = newvid.Pos(pos)
+        self.size = size
+
+
+class GeometryTest(unittest.TestCase):
+    def setUp(self):
+        self.coords = [(0, 0), (15, 7), (16, 8), (33, 17), (-1, -9),
+                       (100, 3), (7.5, 4.25)]
+        self.sprites = [Thing(p) for p in
+                        [(0, 0), (3, -2), (-4, 1), (2, 2, 5), (1, 1)]]
+
+    def test_get_pos_many_matches_get_pos(self):
+        g = Thing((0, 0))
+        for offset in (None, (0, 0), (5, -3), (2.5, 1)):
+            self.assertEqual(g.get_pos_many(self.coords, offset),
+                             [g.get_pos(c, offset) for c in self.coords])
+        self.assertEqual(g.get_pos_many([]), [])
+
+    def test_dist_many_matches_dist(self):
+        for g in self.sprites:
+            self.assertEqual(g.dist_many(self.sprites),
+                             [g.dist(s) for s in self.sprites])
+        self.assertEqual(Thing((0, 0)).dist_many([]), [])
+
+
+class ChunkCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.loaded = []
+        self.unloaded = []
+        self.cache = newvid.ChunkCache(self.load, self.unload, max_chunks=2)
+
+    def load(self, pos):
+        self.loaded.append(pos)
+        return newvid.Chunk(pos, Rect(pos[0], pos[1], 1, 1), [[0]])
+
+    def unload(self, chunk):
+        self.unloaded.append(chunk.pos)
+
+    def test_require_evicts_least_recently_used(self):
+        self.cache.require([(0, 0), (1, 0)])
+        self.cache.get((0, 0))
+        changed = self.cache.require([(2, 0)])
+        self.assertEqual(changed, [(2, 0), (1, 0)])
+        self.assertEqual(self.unloaded, [(1, 0)])
+        self.assertEqual(len(self.cache), 2)
+
+    def test_require_keeps_needed_chunks(self):
+        self.cache.require([(0, 0), (1, 0), (2, 0)])
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.unloaded, [])
+
+    def test_get_is_bounded(self):
+        for x in range(10):
+            self.cache.get((x, 0))
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.unloaded, [(x, 0) for x in range(8)])
+
+    def test_dirty_chunks_are_handed_to_unload(self):
+        self.cache.get((0, 0)).dirty = True
+        for x in range(1, 10):
+            self.cache.get((x, 0))
+        self.assertFalse((0, 0) in self.cache)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.unloaded[0], (0, 0))
+
+    def test_clear(self):
+        self.cache.require([(0, 0), (1, 0)])
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(sorted(self.unloaded), [(0, 0), (1, 0)])
+
+
+class ChunkedMapTest(unittest.TestCase):
+    size = (20, 12)
+    chunk_size = (4, 4)
+
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode((64, 64))
+        self.dir = tempfile.mkdtemp()
+        tiles = pygame.Surface((16 * 4, 16))
+        for n in range(4):
+            tiles.fill((n * 60, 0, 0), (n * 16, 0, 16, 16))
+        pygame.image.save(tiles, os.path.join(self.dir, 'tiles.tga'))
+        w, h = self.size
+        self.ids = [(x + y) % 4 for y in range(h) for x in range(w)]
+        level.save_level(os.path.join(self.dir, 'world.lvl'), self.size,
+                [('tiles', self.ids)], self.chunk_size)
+        self.map_file = os.path.join(self.dir, 'map.yaml')
+        with open(self.map_file, 'w') as f:
+            f.write('tile_size: [16, 16]\ntiles: tiles.tga\n'
+                    'level: world.lvl\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        pygame.display.quit()
+
+    def id_at(self, pos):
+        return self.ids[pos[1] * self.size[0] + pos[0]]
+
+    def positions(self):
+        w, h = self.size
+        return [(x, y) for y in range(h) for x in range(w)]
+
+
+class ChunkedTileMapTest(ChunkedMapTest):
+    def make(self):
+        self.tile_group = pygame.sprite.Group()
+        tmap = newvid.ChunkedTileMap(pygame.sprite.LayeredDirty(),
+                pygame.sprite.LayeredDirty(), None, self.tile_group)
+        tmap.max_chunks = tmap.chunks.max_chunks = 4
+        tmap.load_map(self.map_file)
+        return tmap
+
+    def test_get_tile_is_bounded(self):
+        tmap = self.make()
+        for pos in self.positions():
+            self.assertEqual(tmap.get_tile(pos), self.id_at(pos))
+            self.assertTrue(len(tmap.chunks) <= 4)
+        self.assertTrue(len(self.tile_group) <= 4 * 16)
+        # the background is drawn from the chunks, not the groups
+        self.assertEqual(len(tmap.layer_group), 0)
+        self.assertEqual(len(tmap.bg_group), 0)
+
+    def test_update_view_streams_chunks(self):
+        tmap = self.make()
+        tmap.preload = 0
+        self.assertTrue(tmap.update_view(Rect(0, 0, 64, 64)))
+        self.assertEqual(sorted(tmap.chunks.chunks.keys()), [(0, 0)])
+        self.assertFalse(tmap.update_view(Rect(0, 0, 64, 64)))
+        self.assertTrue(tmap.update_view(Rect(64, 64, 64, 64)))
+        self.assertTrue((1, 1) in tmap.chunks)
+
+    def test_set_tile(self):
+        tmap = self.make()
+        tmap.update_view(Rect(0, 0, 64, 64))
+        tile = newvid.Tile(tmap.tiles[3], tmap.tile_size, (1, 1), {}, (0, 0))
+        tmap.set_tile(tile, (5, 6))
+        self.assertEqual(tile.pos[:2], (5, 6))
+        self.assertEqual(tile.rect.topleft, (80, 96))
+        self.assertTrue(self.tile_group.has(tile))
+        self.assertFalse(tmap.layer_group.has(tile))
+        self.assertTrue(tmap.update_view(Rect(0, 0, 64, 64)))
+        self.assertTrue(tile in tmap.get_chunk((5, 6)).sprites)
+        # the change survives its chunk being evicted and loaded again
+        for pos in self.positions():
+            tmap.get_tile(pos)
+            self.assertTrue(len(tmap.chunks) <= 4)
+        self.assertFalse(tile.alive())
+        self.assertEqual(tmap.get_tile((5, 6)), 3)
+        chunk = tmap.get_chunk((5, 6))
+        self.assertTrue(chunk.dirty)
+        self.assertEqual(chunk.sprites[2 * 4 + 1].image, tmap.tiles[3])
+        for pos in self.positions():
+            tmap.get_tile(pos)
+        self.assertEqual(tmap.get_tile((5, 6)), 3)
+
+
+class ChunkedTileLayerTest(ChunkedMapTest):
+    def make(self):
+        layer = newvid.ChunkedTileLayer(pygame.sprite.LayeredDirty())
+        layer.max_chunks = layer.chunks.max_chunks = 2
+        layer.load_map(self.map_file)
+        return layer
+
+    def test_get_is_bounded(self):
+        layer = self.make()
+        for pos in self.positions():
+            self.assertEqual(layer.get(pos), self.id_at(pos))
+            self.assertTrue(len(layer.chunks) <= 2)
+
+    def test_set(self):
+        layer = self.make()
+        layer.set((1, 1), 3)
+        layer.set((19, 11), 2)
+        for n in range(2):
+            for pos in self.positions():
+                layer.get(pos)
+                self.assertTrue(len(layer.chunks) <= 2)
+            self.assertEqual(layer.get((1, 1)), 3)
+            self.assertEqual(layer.get((19, 11)), 2)
+        self.assertEqual(layer.get((2, 1)), self.id_at((2, 1)))
+
+    def test_set_redraws_visible_tile(self):
+        layer = self.make()
+        layer.update_view(Rect(0, 0, 64, 64))
+        layer.set_bg()
+        layer.set((1, 1), 3)
+        self.assertEqual(layer.surface.get_at((16, 16)),
+                layer.tiles[3].get_at((0, 0)))
+
+
+class ScrollTest(ChunkedMapTest):
+    # Draw a view scrolled 16 pixels right with NewVid, and check the tile
+    # colors along the top row of the screen
+    def draw(self, tmap, view):
+        screen = pygame.display.get_surface()
+        screen.fill((0, 0, 255))
+        vid = newvid.NewVid(screen, tmap.layer_group, None, tmap)
+        vid.draw(screen, view)
+        return [screen.get_at((x, 0))[0] for x in range(0, 64, 16)]
+
+    def check(self, tmap):
+        self.assertEqual(self.draw(tmap, Rect(16, 0, 64, 64)),
+                [60, 120, 180, 0])
+        self.assertEqual(self.draw(tmap, Rect(0, 0, 64, 64)),
+                [0, 60, 120, 180])
+
+    def test_chunked_tile_map(self):
+        layer_group = pygame.sprite.LayeredDirty()
+        tmap = newvid.ChunkedTileMap(layer_group,
+                pygame.sprite.LayeredDirty(), self.map_file)
+        self.check(tmap)
+
+    def test_chunked_tile_layer(self):
+        tmap = newvid.ChunkedTileLayer(pygame.sprite.LayeredDirty(),
+                self.map_file)
+        self.check(tmap)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import gui
+
+
+class Counted(gui.Widget):
+    # A widget that counts its paints and paints a pattern
+    def __init__(self, color, **params):
+        gui.Widget.__init__(self, **params)
+        self.color = color
+        self.paints = 0
+
+    def paint(self, s):
+        self.paints += 1
+        s.fill(self.color, (0, 0, s.get_width() // 2, s.get_height()))
+
+
+class RetainedTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((200, 150))
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def build(self, retained, budget=None):
+        app = gui.App()
+        if budget is not None:
+            app.retained_budget = budget
+        c = gui.Container(width=200, height=150)
+        self.counted = []
+        for n in range(3):
+            w = Counted((80 * n, 255, 0), width=40, height=20,
+                    retained=retained)
+            c.add(w, 10 + 50 * n, 10)
+            self.counted.append(w)
+        t = gui.Table()
+        for y in range(3):
+            t.tr()
+            for x in range(3):
+                t.td(gui.Button('%d,%d' % (x, y), retained=retained))
+        c.add(t, 10, 50)
+        app.init(c, self.screen)
+        self.app = app
+        return app
+
+    def pixels(self):
+        return pygame.image.tostring(self.screen, 'RGB')
+
+    def test_paints_the_same_pixels(self):
+        self.build(False).paint(self.screen)
+        plain = self.pixels()
+        app = self.build(True)
+        app.paint(self.screen)
+        self.assertEqual(self.pixels(), plain)
+        self.screen.fill((0, 0, 0))
+        app.paint(self.screen)
+        self.assertEqual(self.pixels(), plain)
+        self.assertEqual([w.paints for w in self.counted], [1, 1, 1])
+        self.assertEqual(app.retained_stats()[0], 3 + 9)
+
+    def test_repaint_and_chsize_drop_the_painting(self):
+        app = self.build(True)
+        app.paint(self.screen)
+        a, b, c = self.counted
+        a.repaint()
+        app.update(self.screen)
+        app.paint(self.screen)
+        self.assertEqual([w.paints for w in self.counted], [2, 1, 1])
+        b.chsize()
+        app.paint(self.screen)
+        self.assertEqual([w.paints for w in self.counted], [2, 2, 1])
+        app.paint(self.screen)
+        self.assertEqual([w.paints for w in self.counted], [2, 2, 1])
+
+    def test_moving_drops_the_painting(self):
+        app = self.build(True)
+        app.paint(self.screen)
+        self.counted[2].rect.x += 5
+        app.paint(self.screen)
+        self.assertEqual([w.paints for w in self.counted], [1, 1, 2])
+
+    def test_budget_drops_least_recently_painted(self):
+        size = 40 * 20 * self.screen.get_bytesize()
+        app = self.build(False, 2 * size)
+        for w in self.counted:
+            w.retained = True
+        app.paint(self.screen)
+        a, b, c = self.counted
+        self.assertEqual(list(app._retained), [b, c])
+        self.assertEqual(app.retained_stats(), (2, 2 * size))
+        app.paint(self.screen)
+        self.assertEqual([w.paints for w in self.counted], [2, 2, 2])
+
+    def test_budget_skips_larger_paintings(self):
+        size = 40 * 20 * self.screen.get_bytesize()
+        app = self.build(False, size - 1)
+        self.counted[0].retained = True
+        app.paint(self.screen)
+        app.paint(self.screen)
+        self.assertEqual(app.retained_stats(), (0, 0))
+        self.assertEqual(self.counted[0].paints, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
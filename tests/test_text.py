@@ -0,0 +1,165 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import gui, text
+
+
+def pixels(s):
+    return pygame.image.tostring(s, 'RGBA')
+
+
+class Plain(object):
+    # A font-like object without get_bold, as fonts.TileFont
+    def __init__(self):
+        self.renders = 0
+
+    def size(self, t):
+        return len(t) * 4, 8
+
+    def render(self, t, antialias, color, background=None):
+        self.renders += 1
+        s = pygame.Surface(self.size(t), pygame.SRCALPHA)
+        s.fill(color)
+        return s
+
+
+class TextCacheTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.font.init()
+        pygame.display.set_mode((100, 100))
+        self.font = pygame.font.Font(None, 20)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def test_hits_and_misses(self):
+        c = text.TextCache()
+        a = c.render(self.font, 'goat', 1, (255, 255, 255))
+        self.assertIs(c.render(self.font, 'goat', 1, [255, 255, 255]), a)
+        self.assertEqual(pixels(a), pixels(
+            self.font.render('goat', 1, (255, 255, 255))))
+        c.render(self.font, 'goat', 0, (255, 255, 255))
+        c.render(self.font, 'goat', 1, (255, 0, 0))
+        c.render(self.font, 'goat', 1, (255, 0, 0), (0, 0, 0))
+        c.render(self.font, 'goats', 1, (255, 0, 0))
+        st = c.stats()
+        self.assertEqual((st['hits'], st['misses'], st['texts']), (1, 5, 5))
+        self.assertAlmostEqual(st['hit_rate'], 1 / 6.0)
+
+    def test_keeps_most_recently_used(self):
+        f = Plain()
+        c = text.TextCache(3 * 4 * 8)
+        for t in 'abc':
+            c.render(f, t, 1, (0, 0, 0))
+        c.render(f, 'a', 1, (0, 0, 0))
+        c.render(f, 'd', 1, (0, 0, 0))
+        self.assertEqual(c.stats()['texts'], 3)
+        self.assertEqual(c.stats()['pixels'], 3 * 4 * 8)
+        renders = f.renders
+        c.render(f, 'a', 1, (0, 0, 0))
+        self.assertEqual(f.renders, renders)
+        c.render(f, 'b', 1, (0, 0, 0))
+        self.assertEqual(f.renders, renders + 1)
+        c.clear()
+        self.assertEqual((c.stats()['texts'], c.stats()['pixels']), (0, 0))
+
+    def test_is_bounded_by_pixels(self):
+        f = Plain()
+        c = text.TextCache(10 * 4 * 8)
+        for t in ['a' * n for n in range(1, 12)] * 2:
+            c.render(f, t, 1, (0, 0, 0))
+            st = c.stats()
+            self.assertTrue(st['pixels'] <= c.max_pixels)
+            self.assertEqual(st['pixels'], sum(
+                img.get_width() * img.get_height()
+                for img in c._cache.values()))
+        # The longest text is too big to keep, and longer texts push out
+        # shorter ones
+        self.assertEqual(sorted(len(key[2]) for key in c._cache), [10])
+        c.max_pixels = 0
+        c.clear()
+        c.render(f, 'a', 1, (0, 0, 0))
+        c.render(f, 'a', 1, (0, 0, 0))
+        self.assertEqual(c.stats()['texts'], 0)
+
+    def test_style_is_part_of_the_key(self):
+        c = text.TextCache()
+        a = c.render(self.font, 'goat', 1, (0, 0, 0))
+        self.font.set_bold(True)
+        b = c.render(self.font, 'goat', 1, (0, 0, 0))
+        self.assertIsNot(a, b)
+        self.assertEqual(pixels(b), pixels(
+            self.font.render('goat', 1, (0, 0, 0))))
+        self.font.set_bold(False)
+        self.assertIs(c.render(self.font, 'goat', 1, (0, 0, 0)), a)
+
+    @unittest.skipUnless(hasattr(pygame.font.Font, 'set_strikethrough'),
+                         'pygame has no strikethrough')
+    def test_strikethrough_is_part_of_the_key(self):
+        c = text.TextCache()
+        a = c.render(self.font, 'goat', 1, (0, 0, 0))
+        self.font.set_strikethrough(True)
+        b = c.render(self.font, 'goat', 1, (0, 0, 0))
+        self.assertIsNot(a, b)
+        self.assertEqual(pixels(b), pixels(
+            self.font.render('goat', 1, (0, 0, 0))))
+        self.font.set_strikethrough(False)
+        self.assertIs(c.render(self.font, 'goat', 1, (0, 0, 0)), a)
+
+    def test_font_without_style(self):
+        c = text.TextCache()
+        f = Plain()
+        a = c.render(f, 'goat', 1, (1, 2, 3))
+        self.assertIs(c.render(f, 'goat', 1, (1, 2, 3)), a)
+        self.assertEqual(f.renders, 1)
+
+    def test_border(self):
+        c = text.TextCache()
+        w, h = self.font.size('goat')
+        img = c.render(self.font, 'goat', 1, (255, 255, 255), border=2)
+        self.assertEqual(img.get_size(), (w + 4, h + 4))
+        self.assertTrue(img.get_flags() & pygame.SRCALPHA)
+        self.assertIsNot(img, c.render(self.font, 'goat', 1, (255, 255, 255)))
+
+    def test_write_blits_the_bordered_text(self):
+        s = pygame.Surface((100, 40))
+        f = Plain()
+        text.write(s, f, (10, 10), (255, 0, 0), 'ab', 1)
+        # The border is drawn black around the text
+        self.assertEqual(tuple(s.get_at((10, 10)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(s.get_at((17, 17)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(s.get_at((9, 9)))[:3], (0, 0, 0))
+        self.assertEqual(tuple(s.get_at((18, 18)))[:3], (0, 0, 0))
+
+
+class WidgetTextTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((200, 100))
+        text.cache.clear()
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def test_label_and_input_paint_from_the_cache(self):
+        app = gui.App()
+        c = gui.Container(width=200, height=100)
+        c.add(gui.Label('Marbles'), 0, 0)
+        c.add(gui.Input('Marbles'), 0, 40)
+        app.init(c, self.screen)
+        app.paint(self.screen)
+        misses = text.cache.misses
+        hits = text.cache.hits
+        app.paint(self.screen)
+        self.assertEqual(text.cache.misses, misses)
+        self.assertTrue(text.cache.hits > hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import random
+import unittest
+
+import pygame
+from pygame.locals import *
+
+from pgu import gui
+
+
+def wrap(font, value, max_line_w):
+    # The lines as TextArea.doLines worked them out before it wrapped
+    # paragraph by paragraph, wrapping the whole value every time
+    lines = []
+    inx = 0
+    line_start = 0
+    while inx >= 0:
+        prev_word_start = inx
+        spc_inx = value.find(' ', inx+1)
+        nl_inx = value.find('\n', inx+1)
+        if min(spc_inx, nl_inx) == -1:
+            inx = max(spc_inx, nl_inx)
+        else:
+            inx = min(spc_inx, nl_inx)
+        lw, line_h = font.size(value[line_start:inx])
+        if lw > max_line_w:
+            lines.append(value[line_start:prev_word_start + 1])
+            line_start = prev_word_start + 1
+        if inx < 0:
+            if line_start < len(value):
+                lines.append(value[line_start:])
+            else:
+                lines.append('')
+        elif value[inx] == '\n':
+            lines.append(value[line_start:inx + 1].replace('\n', ' '))
+            line_start = inx + 1
+    return lines
+
+
+WORDS = ['a', 'goat', 'marbles', 'cuzco', 'the', 'harpo', 'zeppo',
+         'chico', 'gummo', 'groucho', '', 'x' * 12]
+
+
+class TextAreaTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.font.init()
+        self.screen = pygame.display.set_mode((240, 200))
+        self.app = gui.App()
+        self.ta = gui.TextArea('', 200, 160)
+        c = gui.Container(width=240, height=200)
+        c.add(self.ta, 10, 10)
+        self.app.init(c, self.screen)
+        self.app.update(self.screen)
+        self.rnd = random.Random(3)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def text(self):
+        return ' '.join(self.rnd.choice(WORDS)
+                        for n in range(self.rnd.randint(0, 6)))
+
+    def edit(self, value):
+        # Replace, insert or remove some text somewhere in the value
+        a = self.rnd.randint(0, len(value))
+        b = min(len(value), a + self.rnd.randint(0, 8))
+        new = self.rnd.choice(['', '\n', ' ', self.text(),
+                               self.text() + '\n' + self.text()])
+        return value[:a] + new + value[b:]
+
+    def check(self, max_line_w):
+        ta = self.ta
+        lines = wrap(ta.font, ta.value, max_line_w)
+        self.assertEqual(ta.lines, lines)
+        ends = []
+        cnt = 0
+        for line in lines:
+            cnt += len(line)
+            ends.append(cnt)
+        self.assertEqual(ta._line_ends, ends)
+
+    def test_lines_match_wrapping_the_whole_value(self):
+        ta = self.ta
+        value = ''
+        for n in range(300):
+            value = self.edit(value)
+            ta.value = value
+            ta.doLines(100)
+            self.check(100)
+
+    def test_width_change_wraps_again(self):
+        ta = self.ta
+        ta.value = '\n'.join(self.text() for n in range(10))
+        for w in (100, 60, 180, 100):
+            ta.doLines(w)
+            self.check(w)
+
+    def test_cursor_position(self):
+        ta = self.ta
+        for n in range(50):
+            ta.value = self.edit(ta.value)
+            ta.doLines(100)
+            for pos in range(len(ta.value) + 1):
+                ta.pos = pos
+                ta.updateCursorPos()
+                # The cursor is on the first line that ends after it
+                cnt = 0
+                for vpos, line in enumerate(ta.lines):
+                    if cnt + len(line) > pos:
+                        break
+                    cnt += len(line)
+                else:
+                    vpos = len(ta.lines) - 1
+                    cnt -= len(ta.lines[vpos])
+                self.assertEqual((ta.vpos, ta.hpos), (vpos, pos - cnt))
+                ta.setCursorByHVPos()
+                self.assertEqual(ta.pos, pos)
+
+    def view(self):
+        r = self.ta.get_abs_rect()
+        return pygame.image.tostring(self.screen.subsurface(r), 'RGB')
+
+    def test_typing_draws_what_a_repaint_does(self):
+        ta = self.ta
+        ta.focus()
+        self.app.update(self.screen)
+        keys = [(K_a, 'a'), (K_SPACE, ' '), (K_e, 'e'), (K_RETURN, '\r'),
+                (K_BACKSPACE, ''), (K_DELETE, ''), (K_LEFT, ''),
+                (K_RIGHT, ''), (K_UP, ''), (K_DOWN, ''), (K_HOME, ''),
+                (K_END, '')]
+        for n in range(200):
+            key, uni = self.rnd.choice(keys[:4] * 3 + keys[4:])
+            if key == K_SPACE and self.rnd.random() < 0.5:
+                uni = self.rnd.choice(WORDS)
+            self.app.event(pygame.event.Event(
+                KEYDOWN, key=key, unicode=uni, mod=0))
+            self.app.update(self.screen)
+            if n % 10 == 0:
+                drawn = self.view()
+                ta.repaint()
+                self.app.update(self.screen)
+                self.assertEqual(drawn, self.view())
+        self.check(ta.rect.w - 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
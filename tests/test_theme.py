@@ -0,0 +1,164 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import shutil
+import tempfile
+import time
+import unittest
+
+import pygame
+
+from pgu import gui
+from pgu.gui import theme
+
+
+class BundleTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode((64, 64))
+        self.dir = tempfile.mkdtemp()
+        self.dname = os.path.join(self.dir, 'default')
+        shutil.copytree(theme._find_dir('default'), self.dname)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        pygame.display.quit()
+
+    def compile(self):
+        fname = theme.compile_theme(self.dname)
+        # the bundle must be newer than the files copied with it
+        t = time.time() + 10
+        os.utime(fname, (t, t))
+        return fname
+
+    def images(self, th):
+        r = {}
+        for key in th.config:
+            try:
+                v = th._get(*key)
+            except (IOError, pygame.error):
+                # the default theme names a few files it does not have
+                continue
+            if isinstance(v, pygame.Surface):
+                r[key] = (v.get_size(),
+                          pygame.image.tostring(v.convert_alpha(), 'RGBA'))
+        return r
+
+    def test_bundle_matches_dir(self):
+        plain = theme.Theme(self.dname)
+        self.compile()
+        bundled = theme.Theme(self.dname)
+        self.assertTrue(bundled._pixels)
+        self.assertEqual(plain.config, bundled.config)
+        self.assertEqual(self.images(plain), self.images(bundled))
+
+    def test_stale_bundle_is_ignored(self):
+        fname = self.compile()
+        t = os.path.getmtime(fname) + 10
+        os.utime(os.path.join(self.dname, 'config.txt'), (t, t))
+        self.assertFalse(theme.Theme(self.dname)._pixels)
+
+    def test_warmup(self):
+        th = theme.Theme(self.dname)
+        th.warmup()
+        self.assertTrue(len(th.cache) > len(th.config) * 0.9)
+        self.assertTrue(isinstance(th.cache['button', '', 'background'],
+                                   pygame.Surface))
+
+
+class RenderTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode((64, 64))
+        self.theme = theme.Theme()
+        self.box = pygame.Surface((9, 9), pygame.SRCALPHA)
+        for i in range(9):
+            self.box.fill((i * 25, 255 - i * 25, 100, 55 + i * 20),
+                          ((i % 3) * 3, (i // 3) * 3, 3, 3))
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def render(self, size):
+        s = pygame.Surface((40, 40), pygame.SRCALPHA)
+        s.fill((10, 20, 30, 255))
+        self.theme.render(s, self.box, pygame.Rect((2, 3), size))
+        return pygame.image.tostring(s, 'RGBA')
+
+    def test_cached_box_matches_tiles(self):
+        first = self.render((20, 17))
+        self.assertEqual(self.render((20, 17)), first)
+        self.assertEqual(self.theme.box_stats()['hits'], 1)
+        self.theme.max_box_pixels = 0
+        self.assertEqual(self.render((20, 17)), first)
+        self.assertEqual(self.theme.box_stats()['hits'], 1)
+
+    def test_cache_is_bounded_by_pixels(self):
+        self.theme.max_box_pixels = 1000
+        for n in range(10, 30):
+            self.render((n, 20))
+        stats = self.theme.box_stats()
+        self.assertTrue(stats['pixels'] <= 1000)
+        self.assertEqual(stats['pixels'],
+                         sum([w * h for (b, w, h) in self.theme._boxes]))
+        self.assertEqual(list(self.theme._boxes)[-1][1:], (29, 20))
+        self.render((40, 30))
+        self.assertFalse((self.box, 40, 30) in self.theme._boxes)
+
+
+class SharedStyleTest(unittest.TestCase):
+    # Widgets of the same cls and pcls share the style values looked up in
+    # the theme, see Style.__getattr__
+    def setUp(self):
+        pygame.display.init()
+        pygame.display.set_mode((64, 64))
+        self.dir = tempfile.mkdtemp()
+        self.red = os.path.join(self.dir, 'red')
+        os.mkdir(self.red)
+        with open(os.path.join(self.red, 'config.txt'), 'w') as f:
+            f.write('label color #ff0000\nlabel padding_left 7\n')
+        self.app = gui.App(theme.Theme('default'))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        pygame.display.quit()
+
+    def test_own_style_is_kept(self):
+        plain = gui.Label('plain')
+        own = gui.Label('own', color=(1, 2, 3), style={'padding_left': 5})
+        after = gui.Label('after')
+        self.assertEqual(plain.style.color, (0, 0, 0, 255))
+        self.assertEqual(own.style.color, (1, 2, 3))
+        self.assertEqual(own.style.padding_left, 5)
+        self.assertEqual(after.style.color, (0, 0, 0, 255))
+        self.assertEqual(after.style.padding_left, 0)
+        plain.style.color = (4, 5, 6)
+        self.assertEqual(after.style.color, (0, 0, 0, 255))
+        self.assertEqual(self.app.theme.styles[('label', '')]['color'],
+                         (0, 0, 0, 255))
+
+    def test_pcls_is_shared_separately(self):
+        a, b = gui.Label('a'), gui.Label('b')
+        a.style.font
+        b.pcls = 'hover'
+        self.assertEqual(b.style.color, (0, 0, 0, 255))
+        self.assertTrue(('label', 'hover') in self.app.theme.styles)
+
+    def test_loading_another_dir(self):
+        w = gui.Label('w')
+        self.assertEqual(w.style.color, (0, 0, 0, 255))
+        self.app.theme._preload(self.red)
+        self.assertEqual(w.style.color, (255, 0, 0, 255))
+        self.assertEqual(gui.Label('new').style.padding_left, 7)
+
+    def test_switching_themes(self):
+        w = gui.Label('w')
+        self.assertEqual(w.style.color, (0, 0, 0, 255))
+        self.app.theme = theme.Theme(['default', self.red])
+        self.assertEqual(w.style.color, (255, 0, 0, 255))
+        self.app.theme = theme.Theme('default')
+        self.assertEqual(w.style.color, (0, 0, 0, 255))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import timer
+
+
+class PercentileTest(unittest.TestCase):
+    def test_nearest_rank(self):
+        v = list(range(1, 101))
+        self.assertEqual(timer.percentile(v, 50), 50)
+        self.assertEqual(timer.percentile(v, 95), 95)
+        self.assertEqual(timer.percentile(v, 99), 99)
+        self.assertEqual(timer.percentile(v, 100), 100)
+        self.assertEqual(timer.percentile(v, 0), 1)
+
+    def test_small(self):
+        self.assertEqual(timer.percentile([], 50), 0.0)
+        self.assertEqual(timer.percentile([7], 99), 7)
+        self.assertEqual(timer.percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(timer.percentile([1, 2, 3, 4], 95), 4)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.t = 0.0
+        # how late each wait ends
+        self.late = 0.0
+
+    def now(self):
+        return self.t
+
+    def wait_until(self, t, spin=0.002):
+        self.t = max(self.t, t) + self.late
+
+
+class PreciseTimerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self._now, self._wait_until = timer._now, timer.wait_until
+        timer._now = self.clock.now
+        timer.wait_until = self.clock.wait_until
+        self.timer = timer.Timer(4, precise=True)
+
+    def tearDown(self):
+        timer._now, timer.wait_until = self._now, self._wait_until
+
+    def test_on_time(self):
+        for n in range(10):
+            self.clock.t += 0.125
+            self.timer.tick()
+        self.assertEqual(self.clock.t, 2.5)
+        j = self.timer.jitter()
+        self.assertEqual(j, {'frames': 9, 'mean': 0.0, 'stddev': 0.0,
+                             'max': 0.0, 'drift': 0.0})
+
+    def test_late_waits_drift(self):
+        self.clock.late = 0.125
+        for n in range(4):
+            self.timer.tick()
+        # each frame starts 1/8s late, but on the same schedule, so the
+        # frames are the right length
+        self.assertEqual(self.clock.t, 4 * 0.25 + 0.125)
+        j = self.timer.jitter()
+        self.assertEqual(j['drift'], 0.5)
+        self.assertEqual(j['frames'], 3)
+        self.assertEqual(j['mean'], 0.0)
+        self.assertEqual(j['max'], 0.0)
+
+    def test_late_frames_drift(self):
+        self.timer.tick()
+        self.assertEqual(self.clock.t, 0.25)
+        # a frame that runs 3/4s over starts the next one late, without
+        # trying to catch up
+        self.clock.t += 1.0
+        self.timer.tick()
+        self.assertEqual(self.clock.t, 1.25)
+        self.assertEqual(self.timer.jitter()['drift'], 0.75)
+        self.timer.tick()
+        self.assertEqual(self.clock.t, 1.5)
+        j = self.timer.jitter()
+        self.assertEqual(j['drift'], 0.75)
+        self.assertEqual(j['frames'], 2)
+        self.assertEqual(j['max'], 0.75)
+        self.assertEqual(j['mean'], 0.375)
+        self.assertEqual(j['stddev'], (2 * 0.375 ** 2) ** 0.5)
+
+    def test_reset_stats(self):
+        self.clock.late = 0.125
+        self.timer.tick()
+        self.timer.tick()
+        self.timer.reset_stats()
+        self.assertEqual(self.timer.jitter(), {'frames': 0, 'mean': 0.0,
+                'stddev': 0.0, 'max': 0.0, 'drift': 0.0})
+
+
+class SpeedometerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self._now = timer._now
+        timer._now = self.clock.now
+        self.sp = timer.Speedometer(size=8, budget=0.5)
+
+    def tearDown(self):
+        timer._now = self._now
+
+    def run_frames(self, lengths):
+        self.sp.tick()
+        for dt in lengths:
+            self.clock.t += dt
+            self.sp.tick()
+
+    def test_empty(self):
+        self.assertEqual(self.sp.history(), [])
+        self.assertEqual(self.sp.stats(), {'frames': 0, 'min': 0.0,
+                'max': 0.0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0,
+                'p99': 0.0, 'hitches': 0})
+        self.sp.tick()
+        self.assertEqual(self.sp.history(), [])
+
+    def test_history_wraps_around(self):
+        lengths = [0.125 * n for n in range(1, 13)]
+        self.run_frames(lengths)
+        self.assertEqual(self.sp.frame, 12)
+        self.assertEqual(self.sp.history(), lengths[-8:])
+        self.assertEqual(self.sp.history(3), lengths[-3:])
+        self.assertEqual(self.sp.history(20), lengths[-8:])
+        self.assertEqual(self.sp.dt, lengths[-1])
+
+    def test_stats(self):
+        lengths = [0.25, 0.125, 1.0, 0.25, 0.75, 0.125]
+        self.run_frames(lengths)
+        st = self.sp.stats()
+        self.assertEqual(st['frames'], 6)
+        self.assertEqual((st['min'], st['max']), (0.125, 1.0))
+        self.assertEqual(st['mean'], 2.5 / 6)
+        self.assertEqual(st['p50'], 0.25)
+        self.assertEqual((st['p95'], st['p99']), (1.0, 1.0))
+        self.assertEqual(st['hitches'], 2)
+        self.assertEqual(self.sp.hitches, 2)
+        st = self.sp.stats(2)
+        self.assertEqual((st['frames'], st['hitches']), (2, 1))
+        self.assertEqual(st['p50'], 0.125)
+
+    def test_hitches_past_the_ring(self):
+        # hitches counts every frame, stats only those kept
+        self.run_frames([1.0] * 4 + [0.25] * 8)
+        self.assertEqual(self.sp.hitches, 4)
+        self.assertEqual(self.sp.stats()['hitches'], 0)
+
+    def test_overlay(self):
+        pygame.font.init()
+        self.run_frames([0.25, 1.0])
+        o = timer.SpeedometerOverlay(self.sp, size=(40, 30))
+        screen = pygame.Surface((100, 100))
+        r = o.paint(screen, (10, 10))
+        self.assertEqual(r, pygame.Rect(10, 10, 40, 30))
+        # The last frame is a hitch, drawn in red at the right
+        self.assertEqual(tuple(screen.get_at((49, 38)))[:3], (255, 0, 0))
+        self.assertEqual(tuple(screen.get_at((48, 38)))[:3], (0, 192, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
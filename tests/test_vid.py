@@ -0,0 +1,60 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+
+from pgu import tilevid, vid
+
+
+class TilevidTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((64, 48))
+        self.g = tilevid.Tilevid()
+        sheet = pygame.Surface((16 * 4, 16))
+        for n in range(4):
+            sheet.fill((n * 60, 0, 0), (n * 16, 0, 16, 16))
+        self.g.tga_load_tiles(sheet, (16, 16))
+        self.g.resize((10, 10))
+        for y in range(10):
+            for x in range(10):
+                self.g.tlayer[y][x] = (x + y) % 4
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def row(self, y):
+        return [self.screen.get_at((x, y))[0] for x in range(0, 64, 16)]
+
+    def test_paint_scrolled(self):
+        self.g.view.x, self.g.view.y = 24, 16
+        self.g.paint(self.screen)
+        # tile column 1 starts 8 pixels left of the screen
+        self.assertEqual(self.row(0), [120, 180, 0, 60])
+        self.assertEqual(self.screen.get_at((8, 0))[0], 180)
+
+    def test_update_draws_moved_sprites(self):
+        img = pygame.Surface((8, 8))
+        img.fill((255, 255, 255))
+        s = vid.Sprite(img, (4, 4))
+        self.g.sprites.append(s)
+        self.g.paint(self.screen)
+        self.assertEqual(tuple(self.screen.get_at((4, 4)))[:3],
+                (255, 255, 255))
+        s.rect.x = 20
+        self.g.loop()
+        self.g.update(self.screen)
+        self.assertEqual(self.screen.get_at((4, 4))[0], 0)
+        self.assertEqual(tuple(self.screen.get_at((20, 4)))[:3],
+                (255, 255, 255))
+
+    def test_view_to_tile(self):
+        self.assertEqual(self.g.view_to_tile((33, 47)), (2, 2))
+        self.g.view.x = 16
+        self.assertEqual(self.g.screen_to_tile((0, 0)), (1, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
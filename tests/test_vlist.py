@@ -0,0 +1,115 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import random
+import unittest
+
+import pygame
+from pygame.locals import *
+
+from pgu import gui
+from pgu.gui.area import _Heights
+
+
+class HeightsTest(unittest.TestCase):
+    def check(self, h, heights):
+        self.assertEqual(h.total, sum(heights))
+        top = 0
+        for row, n in enumerate(heights):
+            self.assertEqual(h.offset(row), top)
+            for y in (top, top + n - 1):
+                if n:
+                    self.assertEqual(h.find(y), row)
+            top += n
+        self.assertEqual(h.find(top), len(heights))
+
+    def test_append_set_rebuild(self):
+        rnd = random.Random(1)
+        heights = [rnd.randint(1, 30) for n in range(100)]
+        h = _Heights()
+        for n in heights:
+            h.append(n)
+        self.check(h, heights)
+        for n in range(50):
+            row = rnd.randrange(len(heights))
+            heights[row] = rnd.randint(1, 30)
+            h.set(row, heights[row])
+        self.check(h, heights)
+        del heights[17]
+        h.rebuild(heights)
+        self.check(h, heights)
+
+
+class VirtualListTest(unittest.TestCase):
+    items = 5000
+
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((200, 200))
+        self.app = gui.App()
+        self.list = gui.VirtualList(150, 120)
+        for n in range(self.items):
+            self.list.add('item %d' % n, value=n)
+        self.app.init(self.list, self.screen)
+        self.app.update(self.screen)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def shown(self):
+        rows = self.list.rows
+        return [(w.value, w.widget.value, w.rect.y) for w in rows.widgets]
+
+    def scroll(self, y):
+        self.list.vscrollbar.value = y
+        self.app.update(self.screen)
+
+    def test_only_rows_in_view_have_widgets(self):
+        shown = self.shown()
+        h = self.list.row_height
+        self.assertTrue(0 < len(shown) <= 120 // h + 2)
+        self.assertEqual(shown[0], (0, 'item 0', 0))
+        for value, label, y in shown:
+            self.assertEqual(label, 'item %d' % value)
+            self.assertEqual(y, value * h)
+
+    def test_scrolling_reuses_widgets(self):
+        h = self.list.row_height
+        before = set(self.list.rows.widgets)
+        self.scroll(h * 2500 + h // 2)
+        shown = self.shown()
+        self.assertEqual(shown[0][0], 2500)
+        self.assertEqual(shown[0][2], -(h // 2))
+        for value, label, y in shown:
+            self.assertEqual(label, 'item %d' % value)
+        self.assertEqual(set(self.list.rows.widgets), before)
+        self.scroll(self.list.vscrollbar.max)
+        self.assertEqual(self.shown()[-1][0], self.items - 1)
+
+    def test_click_selects(self):
+        h = self.list.row_height
+        self.scroll(h * 100)
+        r = self.list.rows.get_abs_rect()
+        pos = (r.x + 5, r.y + h * 3 + h // 2)
+        self.click(pos)
+        self.assertEqual(self.list.value, 103)
+        # the same rows in view, moved by less than a row
+        self.scroll(h * 100 + h // 2 + 1)
+        self.click(pos)
+        self.assertEqual(self.list.value, 104)
+
+    def click(self, pos):
+        for t in (MOUSEBUTTONDOWN, MOUSEBUTTONUP):
+            self.app.event(pygame.event.Event(t, {'pos': pos, 'button': 1}))
+
+    def test_remove_and_clear(self):
+        self.list.remove(0)
+        self.app.update(self.screen)
+        self.assertEqual(self.shown()[0][:2], (1, 'item 1'))
+        self.list.clear()
+        self.app.update(self.screen)
+        self.assertEqual(self.shown(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
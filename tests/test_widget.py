@@ -0,0 +1,160 @@
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import unittest
+
+import pygame
+from pygame.locals import *
+
+from pgu import gui
+from pgu.gui.const import CHANGE, CLICK
+
+
+class Recorder(gui.Widget):
+    # A widget that keeps the events it is given, and their pos as it was
+    def __init__(self, **params):
+        gui.Widget.__init__(self, **params)
+        self.seen = []
+        self.kept = []
+        self.connect(MOUSEBUTTONDOWN, self.keep)
+
+    def keep(self, _event):
+        self.kept.append(_event)
+
+    def event(self, e):
+        if 'pos' in e.dict:
+            self.seen.append((e.type, e.pos))
+
+
+class RelativeEventTest(unittest.TestCase):
+    def setUp(self):
+        pygame.display.init()
+        self.screen = pygame.display.set_mode((200, 150))
+        self.app = gui.App()
+        self.outer = gui.Container(width=200, height=150)
+        self.inner = gui.Container(width=100, height=80)
+        self.w = Recorder(width=30, height=20)
+        self.inner.add(self.w, 12, 9)
+        self.outer.add(self.inner, 40, 30)
+        self.app.init(self.outer, self.screen)
+        self.app.update(self.screen)
+
+    def tearDown(self):
+        pygame.display.quit()
+
+    def test_nested_containers_deliver_relative_pos(self):
+        dx = self.inner.rect.x + self.w.rect.x
+        dy = self.inner.rect.y + self.w.rect.y
+        events = [(MOUSEMOTION, (60, 45)), (MOUSEBUTTONDOWN, (61, 46)),
+                  (MOUSEMOTION, (70, 50)), (MOUSEBUTTONUP, (70, 50))]
+        for etype, pos in events:
+            params = {'pos': pos}
+            if etype == MOUSEMOTION:
+                params.update(rel=(1, 1), buttons=(0, 0, 0))
+            else:
+                params['button'] = 1
+            e = pygame.event.Event(etype, params)
+            self.app.event(e)
+            # The event is as it was once it has been handled
+            self.assertEqual(e.pos, pos)
+        seen = [(t, p) for t, p in self.w.seen if t in
+                (MOUSEMOTION, MOUSEBUTTONDOWN, MOUSEBUTTONUP)]
+        self.assertEqual(seen, [(t, (p[0] - dx, p[1] - dy))
+                                for t, p in events])
+
+    def test_callbacks_may_keep_the_event(self):
+        self.app.event(pygame.event.Event(MOUSEBUTTONDOWN, pos=(61, 46),
+                                          button=1))
+        self.assertEqual([e.pos for e in self.w.kept],
+                         [(61 - 52, 46 - 39)])
+
+
+def old_args(func, params, magic):
+    # The arguments Widget.send worked out for each call before connect
+    # did it once (with the event code given for _code, as intended)
+    values = list(params)
+    code = func.__code__
+    names = list(code.co_varnames)[:code.co_argcount]
+    if hasattr(func, '__self__'):
+        names.pop(0)
+    args = []
+    for name in names:
+        if name in magic:
+            args.append(magic[name])
+        elif len(values):
+            args.append(values.pop(0))
+        else:
+            break
+    args.extend(values)
+    return args
+
+
+class Target(object):
+    def __init__(self, calls):
+        self.calls = calls
+
+    def method(self, value, _event):
+        self.calls.append((value, _event))
+
+    def value(self, v):
+        self.calls.append((v, ))
+
+
+class ConnectTest(unittest.TestCase):
+    def setUp(self):
+        self.w = gui.Widget()
+        self.calls = []
+
+    def callbacks(self):
+        calls = self.calls
+        def none():
+            calls.append(())
+        def value(v):
+            calls.append((v, ))
+        def value_event(v, _event):
+            calls.append((v, _event))
+        def event_value(_event, v):
+            calls.append((_event, v))
+        def everything(_widget, a, _code, b=None, _event=None):
+            calls.append((_widget, a, _code, b, _event))
+        def rest(*args):
+            calls.append(args)
+        target = Target(calls)
+        return [(none, ()), (value, (1, )),
+                (value_event, (1, )), (event_value, (1, )),
+                (everything, (1, 2)), (everything, (1, )),
+                (rest, (1, 2)), (target.method, (1, )),
+                (target.value, (1, ))]
+
+    def test_send_calls_as_before(self):
+        e = pygame.event.Event(USEREVENT, code=7)
+        magic = {'_event': e, '_code': CLICK, '_widget': self.w}
+        for func, params in self.callbacks():
+            self.w.connect(CLICK, func, *params)
+            self.w.send(CLICK, e)
+            self.w.disconnect(CLICK)
+            sent = list(self.calls)
+            self.calls[:] = []
+            func(*old_args(func, params, magic))
+            self.assertEqual(sent, self.calls)
+            self.assertEqual(len(sent), 1)
+            self.calls[:] = []
+
+    def test_connect_once(self):
+        def value(v):
+            self.calls.append(v)
+        self.w.connect(CLICK, value, 1)
+        self.w.connect(CLICK, value, 2)
+        self.w.send(CLICK)
+        self.w.send(CHANGE)
+        self.assertEqual(self.calls, [1])
+
+    def test_builtin(self):
+        out = []
+        self.w.connect(CLICK, out.append, 'clicked')
+        self.w.send(CLICK)
+        self.assertEqual(out, ['clicked'])
+
+
+if __name__ == '__main__':
+    unittest.main()